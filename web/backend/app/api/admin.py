@@ -0,0 +1,51 @@
+"""Admin API: request profiles and the sampling profiler"""
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from app.config import settings
+from app.services.profiling import profiles, sampler, token_matches
+
+
+async def require_admin(x_profile_token: Optional[str] = Header(None)) -> None:
+    if not settings.PROFILING_TOKEN:
+        # Profiling is off; don't advertise the endpoints
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not token_matches(settings.PROFILING_TOKEN, x_profile_token):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("/profiles")
+async def list_profiles():
+    """Recently profiled requests, newest first"""
+    return {"profiles": profiles.list()}
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(profile_id: str, sort: str = "cumulative", limit: int = 40):
+    """pstats report of one profiled request"""
+    return profiles.report(profile_id, sort, limit)
+
+
+@router.post("/profiler/sample")
+async def start_sampling(seconds: float = 10, interval_ms: float = 5):
+    """Sample the event loop thread for ``seconds`` and write collapsed stacks"""
+    return sampler.start(seconds, interval_ms / 1000)
+
+
+@router.get("/profiler/sample")
+async def get_sampling():
+    """State of the current or last sampling run"""
+    return {"running": sampler.running, "last": sampler.last}
+
+
+@router.delete("/profiler/sample")
+async def stop_sampling():
+    """End the current sampling run early; its stacks are still written"""
+    sampler.stop()
+    return {"running": sampler.running, "last": sampler.last}
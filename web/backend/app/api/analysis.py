@@ -1,10 +1,44 @@
 """Skin Analysis API"""
 
-from fastapi import APIRouter, HTTPException
+import base64
+import binascii
+from datetime import date
+from uuid import uuid4
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from typing import Optional
 from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.mock.data import MOCK_ANALYSIS, MOCK_ANALYSIS_HISTORY
+from app.config import settings
+from app.db.database import get_session
+from app.db.models import Analysis
+from app.db.repositories import AnalysisRepository
+from app.mock.data import DEMO_USER, mock_analysis
+from app.services.imaging import (
+    MIN_FRAME_SIDE,
+    SpooledBuffer,
+    analysis_frame,
+    decode_image,
+    decode_raw,
+    require_pillow,
+    spool_request,
+)
+from app.services.dashboard import dashboard
+from app.services.landmarks import LandmarkDecoder, face_geometry, iter_landmark_frames
+from app.services.pagination import MAX_PAGE_SIZE, TEXT, decode_cursor, encode_cursor
+from app.services.skin_engine import build_report, scan_engine
+from app.services.timeseries import (
+    PERIODS,
+    RESOLUTIONS,
+    SERIES_FIELDS,
+    UserSeries,
+    analysis_series,
+    format_change,
+    series_changes,
+    series_points,
+)
 
 router = APIRouter()
 
@@ -14,39 +48,232 @@ class ScanRequest(BaseModel):
     mode: str = "quick"  # quick or detailed
 
 
+def _history_point(analysis: Analysis) -> dict:
+    metrics = analysis.data.get("metrics", {})
+    return {
+        "date": analysis.date,
+        "score": analysis.overall_score,
+        "hydration": metrics.get("hydration", {}).get("score"),
+        "oil": metrics.get("oil", {}).get("score"),
+    }
+
+
+async def _user_series(session: AsyncSession, user_id: str) -> UserSeries:
+    analyses = AnalysisRepository(session)
+    # The count revalidates the cached series against scans made through other workers
+    return await analysis_series.load(
+        user_id, lambda: analyses.history(user_id), await analyses.count_by_user(user_id)
+    )
+
+
+def _new_buffer() -> SpooledBuffer:
+    return SpooledBuffer(settings.SCAN_SPOOL_MAX_MEMORY, settings.SCAN_MAX_UPLOAD_BYTES)
+
+
+async def _decode_frame(
+    buffer: SpooledBuffer,
+    mode: str,
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    pixel_format: str = "rgb",
+):
+    """Small RGB copy of the uploaded frame, sized for metric computation.
+
+    Encoded images are decoded in the scan worker pool, off the event loop.
+    """
+    max_side = settings.SCAN_ANALYSIS_SIZE * (2 if mode == "detailed" else 1)
+    if width is None and height is None:
+        require_pillow()
+        try:
+            frame = await scan_engine.run(decode_image, bytes(buffer.view()), max_side)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Could not decode image")
+    elif width is None or height is None:
+        raise HTTPException(status_code=400, detail="Raw frames need both width and height")
+    else:
+        # Raw frames are viewed in place; striding makes the only copy
+        frame = analysis_frame(decode_raw(buffer.view(), width, height, pixel_format), max_side)
+    if min(frame.shape[:2]) < MIN_FRAME_SIDE:
+        raise HTTPException(
+            status_code=400, detail=f"Frame too small; need at least {MIN_FRAME_SIDE}x{MIN_FRAME_SIDE} pixels"
+        )
+    return frame
+
+
+async def _run_scan(frame, session: AsyncSession) -> dict:
+    result = await scan_engine.analyze(frame)
+
+    analyses = AnalysisRepository(session)
+    previous = await analyses.latest(DEMO_USER["id"])
+    report = build_report(result, previous.data.get("metrics") if previous else None)
+    analysis = await analyses.add(
+        id=f"analysis-{uuid4().hex[:12]}",
+        user_id=DEMO_USER["id"],
+        date=date.today().isoformat(),
+        overall_score=report.pop("overall_score"),
+        data=report,
+    )
+    analysis_series.record(analysis)
+    dashboard.invalidate(DEMO_USER["id"], "skin_score")
+    return analysis.to_dict()
+
+
 @router.post("/scan")
-async def scan_skin(request: ScanRequest):
+async def scan_skin(request: ScanRequest, session: AsyncSession = Depends(get_session)):
     """Perform skin analysis scan"""
-    # In demo mode, return mock analysis
-    return MOCK_ANALYSIS
+    if not request.image:
+        # In demo mode, return mock analysis
+        return mock_analysis()
+
+    encoded = request.image.split(",", 1)[-1]  # tolerate data: URLs
+    with _new_buffer() as buffer:
+        try:
+            buffer.write(base64.b64decode(encoded))
+        except binascii.Error:
+            raise HTTPException(status_code=400, detail="Invalid base64 image")
+        frame = await _decode_frame(buffer, request.mode)
+    return await _run_scan(frame, session)
+
+
+@router.post("/scan/upload")
+async def scan_upload(
+    request: Request,
+    mode: str = "quick",
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    pixel_format: str = "rgb",
+    session: AsyncSession = Depends(get_session),
+):
+    """Skin analysis from a streamed upload.
+
+    Accepts multipart/form-data with an ``image`` file part, or the image
+    as the request body. Raw frames need ``width`` and ``height``; encoded
+    images (JPEG, PNG) need Pillow.
+    """
+    with _new_buffer() as buffer:
+        fields = await spool_request(request, buffer)
+        if not buffer.size:
+            raise HTTPException(status_code=400, detail="No image uploaded")
+        try:
+            width = int(fields["width"]) if "width" in fields else width
+            height = int(fields["height"]) if "height" in fields else height
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid frame size")
+        frame = await _decode_frame(
+            buffer,
+            fields.get("mode", mode),
+            width,
+            height,
+            fields.get("pixel_format", pixel_format),
+        )
+    return await _run_scan(frame, session)
+
+
+@router.post("/landmarks")
+async def analyze_landmarks(request: Request):
+    """Face box, head pose and stillness from a binary landmark stream.
+
+    The body, or a multipart ``landmarks`` part, holds landmark frames back
+    to back starting with a keyframe (format in ``app.services.landmarks``).
+    Motion is the mean per-frame landmark displacement, in frame units.
+    """
+    with _new_buffer() as buffer:
+        await spool_request(request, buffer, field="landmarks")
+        if not buffer.size:
+            raise HTTPException(status_code=400, detail="No landmarks uploaded")
+        decoder = LandmarkDecoder()
+        frames = 0
+        motion = 0.0
+        previous = None
+        for data in iter_landmark_frames(buffer.view()):
+            seq, coords = decoder.decode(data)
+            if previous is not None and previous.shape == coords.shape:
+                motion += float(np.hypot(*(coords[:, :2] - previous[:, :2]).T).mean())
+            previous = coords
+            frames += 1
+    return {
+        "frames": frames,
+        "points": len(previous),
+        "seq": seq,
+        "face": face_geometry(previous),
+        "motion": round(motion / (frames - 1), 5) if frames > 1 else None,
+        "bytes": buffer.size,
+    }
 
 
 @router.get("/history")
-async def get_analysis_history(limit: int = 10):
-    """Get analysis history"""
+async def get_analysis_history(
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    resolution: Optional[str] = None,
+    session: AsyncSession = Depends(get_session),
+):
+    """Get analysis history, per scan or rolled up daily/weekly/monthly"""
+    if resolution is not None:
+        return await _rollup_history(session, resolution, limit, cursor)
+
+    analyses = AnalysisRepository(session)
+    after = decode_cursor(cursor, "date", (TEXT, TEXT))
+
+    # Fetch one extra row to know whether another page follows
+    history = await analyses.history(DEMO_USER["id"], limit=limit + 1, after=after)
+    last_key = None
+    if len(history) > limit:
+        history = history[:limit]
+        last_key = (history[-1].date, history[-1].id) if history else None
+
+    response = {"analyses": [_history_point(a) for a in history]}
+    if include_total:
+        response["total"] = await analyses.count_by_user(DEMO_USER["id"])
+    response["next_cursor"] = encode_cursor("date", last_key)
+    return response
+
+
+async def _rollup_history(session: AsyncSession, resolution: str, limit: int, cursor: Optional[str]) -> dict:
+    if resolution not in RESOLUTIONS:
+        raise HTTPException(status_code=400, detail=f"Unknown resolution: {resolution}")
+    sort = f"history:{resolution}"
+    after = decode_cursor(cursor, sort, (int,))
+
+    series = await _user_series(session, DEMO_USER["id"])
+    keys, means, counts = series.page(resolution, limit + 1, after=after[0] if after else None)
+    last_key = None
+    if len(keys) > limit:
+        keys, means, counts = keys[:limit], means[:limit], counts[:limit]
+        last_key = (keys[-1],) if keys else None
     return {
-        "analyses": MOCK_ANALYSIS_HISTORY[:limit],
-        "total": len(MOCK_ANALYSIS_HISTORY),
+        "resolution": resolution,
+        "analyses": series_points(resolution, keys, means, counts),
+        "next_cursor": encode_cursor(sort, last_key),
     }
 
 
 @router.get("/trends")
-async def get_analysis_trends(period: str = "30d"):
+async def get_analysis_trends(period: str = "30d", session: AsyncSession = Depends(get_session)):
     """Get skin analysis trends over time"""
+    if period not in PERIODS:
+        raise HTTPException(status_code=400, detail=f"Unknown period: {period}")
+
+    # A bounded number of rollup points, however long the history is
+    series = await _user_series(session, DEMO_USER["id"])
+    resolution, keys, means, counts = series.period(period)
+    changes = series_changes(means)
     return {
         "period": period,
-        "data_points": MOCK_ANALYSIS_HISTORY,
+        "resolution": resolution,
+        "data_points": series_points(resolution, keys, means, counts),
         "summary": {
-            "score_change": "+6",
-            "hydration_change": "+7",
-            "oil_change": "-6",
+            f"{field}_change": format_change(change)
+            for field, change in zip(SERIES_FIELDS, changes.tolist())
         },
     }
 
 
 @router.get("/{analysis_id}")
-async def get_analysis(analysis_id: str):
+async def get_analysis(analysis_id: str, session: AsyncSession = Depends(get_session)):
     """Get specific analysis by ID"""
-    if analysis_id == MOCK_ANALYSIS["id"]:
-        return MOCK_ANALYSIS
+    analysis = await AnalysisRepository(session).get(analysis_id)
+    if analysis and analysis.user_id == DEMO_USER["id"]:
+        return analysis.to_dict()
     raise HTTPException(status_code=404, detail="Analysis not found")
@@ -1,10 +1,21 @@
 """Inventory API"""
 
-from fastapi import APIRouter, HTTPException
+import math
+from datetime import date
+from uuid import uuid4
+
+from fastapi import APIRouter, Depends, HTTPException
 from typing import Optional
 from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.mock.data import MOCK_INVENTORY, MOCK_PRODUCTS, get_product_by_id
+from app.db.database import get_session
+from app.db.repositories import InventoryRepository, SubscriptionRepository
+from app.mock.data import DEMO_USER, get_product_by_id
+from app.services.dashboard import dashboard
+from app.services.forecast import day_numbers, epoch_day, forecast_one, observe_usage
+from app.services.loader import Loaders, get_loaders
+from app.services.replenish import replenish_job
 
 router = APIRouter()
 
@@ -20,15 +31,20 @@ class UpdateInventoryRequest(BaseModel):
 
 
 @router.get("")
-async def get_inventory():
+async def get_inventory(
+    session: AsyncSession = Depends(get_session),
+    loaders: Loaders = Depends(get_loaders),
+):
     """Get user's product inventory"""
-    # Enrich with product details
+    items = await InventoryRepository(session).list_by_user(DEMO_USER["id"])
+
+    # Enrich with product details, fetched in one batch
+    products = await loaders.products.load_many(item.product_id for item in items)
     enriched = []
-    for item in MOCK_INVENTORY:
-        product = get_product_by_id(item["product_id"])
+    for item, product in zip(items, products):
         if product:
             enriched.append({
-                **item,
+                **item.to_dict(),
                 "product": product,
             })
 
@@ -51,101 +67,149 @@ async def get_inventory():
 
 
 @router.post("")
-async def add_to_inventory(request: AddInventoryRequest):
+async def add_to_inventory(
+    request: AddInventoryRequest,
+    session: AsyncSession = Depends(get_session),
+):
     """Add product to inventory"""
     product = get_product_by_id(request.product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
+    purchase_date = request.purchase_date or date.today().isoformat()
+    item = await InventoryRepository(session).add(
+        id=f"inv-{uuid4().hex[:12]}",
+        user_id=DEMO_USER["id"],
+        product_id=request.product_id,
+        purchase_date=purchase_date,
+        open_date=purchase_date,
+        total_amount=request.amount,
+        remaining_percent=100,
+        measured_at=date.today().isoformat(),
+        status="good",
+    )
+    dashboard.invalidate(DEMO_USER["id"], "products_tracked")
+
     return {
         "message": "Product added to inventory",
         "item": {
-            "id": f"inv-{len(MOCK_INVENTORY) + 1:03d}",
+            "id": item.id,
             "product_id": request.product_id,
             "product": product,
-            "remaining_percent": 100,
-            "status": "good",
+            "remaining_percent": item.remaining_percent,
+            "status": item.status,
         },
     }
 
 
 @router.patch("/{inventory_id}")
-async def update_inventory(inventory_id: str, request: UpdateInventoryRequest):
+async def update_inventory(
+    inventory_id: str,
+    request: UpdateInventoryRequest,
+    session: AsyncSession = Depends(get_session),
+):
     """Update inventory item usage"""
-    for item in MOCK_INVENTORY:
-        if item["id"] == inventory_id:
-            # Determine status based on remaining percent
-            status = "good"
-            if request.remaining_percent <= 15:
-                status = "critical"
-            elif request.remaining_percent <= 40:
-                status = "running_low"
-
-            return {
-                "message": "Inventory updated",
-                "item": {
-                    **item,
-                    "remaining_percent": request.remaining_percent,
-                    "status": status,
-                },
-            }
+    inventory = InventoryRepository(session)
+    item = await inventory.get(inventory_id)
+    if not item:
+        raise HTTPException(status_code=404, detail="Inventory item not found")
+
+    # Fold the new reading into the item's smoothed usage rate
+    today = date.today()
+    previous = forecast_one(item, today)
+    last_day = day_numbers([item.measured_at or item.open_date])[0]
+    item.usage_rate = observe_usage(
+        item.remaining_percent,
+        request.remaining_percent,
+        None if math.isnan(last_day) else float(last_day),
+        float(epoch_day(today)),
+        previous["usage_rate"],
+    )
+    item.remaining_percent = request.remaining_percent
+    item.measured_at = today.isoformat()
+    forecast = forecast_one(item, today)
+    item = await inventory.update(
+        inventory_id,
+        estimated_days_left=forecast["estimated_days_left"],
+        status=forecast["status"],
+    )
+    if forecast["status"] != "good" and forecast["status"] != previous["status"]:
+        await replenish_job.record(
+            session, item.user_id, item.id, item.product_id, forecast["status"], forecast["estimated_days_left"]
+        )
 
-    raise HTTPException(status_code=404, detail="Inventory item not found")
+    return {
+        "message": "Inventory updated",
+        "item": item.to_dict(),
+    }
 
 
 @router.delete("/{inventory_id}")
-async def delete_inventory(inventory_id: str):
+async def delete_inventory(inventory_id: str, session: AsyncSession = Depends(get_session)):
     """Remove item from inventory"""
-    for item in MOCK_INVENTORY:
-        if item["id"] == inventory_id:
-            return {"message": "Item removed from inventory"}
+    if not await InventoryRepository(session).delete(inventory_id):
+        raise HTTPException(status_code=404, detail="Inventory item not found")
+    dashboard.invalidate(DEMO_USER["id"], "products_tracked")
+
+    return {"message": "Item removed from inventory"}
 
-    raise HTTPException(status_code=404, detail="Inventory item not found")
+
+@router.get("/replenish-events")
+async def get_replenish_events(after: int = 0, session: AsyncSession = Depends(get_session)):
+    """Replenish alerts raised since event ``after``"""
+    events = await replenish_job.events_for(session, DEMO_USER["id"], after)
+    return {
+        "events": events,
+        "last_event": events[-1]["sequence"] if events else after,
+    }
 
 
 @router.get("/subscriptions")
-async def get_subscriptions():
+async def get_subscriptions(
+    session: AsyncSession = Depends(get_session),
+    loaders: Loaders = Depends(get_loaders),
+):
     """Get user's product subscriptions"""
+    subscriptions = await SubscriptionRepository(session).active(DEMO_USER["id"])
+    products = await loaders.products.load_many(sub.product_id for sub in subscriptions)
     return {
         "subscriptions": [
             {
-                "id": "sub-001",
-                "product_id": "product-001",
-                "product": get_product_by_id("product-001"),
-                "frequency_months": 2,
-                "price_at_subscription": 950,
-                "discount_percent": 10,
-                "status": "active",
-                "next_delivery": "2025-02-15",
-            },
-            {
-                "id": "sub-002",
-                "product_id": "product-004",
-                "product": get_product_by_id("product-004"),
-                "frequency_months": 3,
-                "price_at_subscription": 480,
-                "discount_percent": 5,
-                "status": "active",
-                "next_delivery": "2025-03-01",
-            },
+                **sub.to_dict(),
+                "product": product,
+            }
+            for sub, product in zip(subscriptions, products)
         ]
     }
 
 
 @router.post("/subscriptions")
-async def create_subscription(product_id: str, frequency_months: int = 2):
+async def create_subscription(
+    product_id: str,
+    frequency_months: int = 2,
+    session: AsyncSession = Depends(get_session),
+):
     """Create a new subscription"""
     product = get_product_by_id(product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
+    subscription = await SubscriptionRepository(session).add(
+        id=f"sub-{uuid4().hex[:12]}",
+        user_id=DEMO_USER["id"],
+        product_id=product_id,
+        frequency_months=frequency_months,
+        price_at_subscription=product["price"],
+        status="active",
+    )
+
     return {
         "message": "Subscription created",
         "subscription": {
-            "id": "sub-new",
+            "id": subscription.id,
             "product_id": product_id,
             "product": product,
             "frequency_months": frequency_months,
-            "status": "active",
+            "status": subscription.status,
         },
     }
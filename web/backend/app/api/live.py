@@ -0,0 +1,34 @@
+"""Live mirror API"""
+
+from fastapi import APIRouter, WebSocket
+
+from app.services.live import live_sessions
+
+router = APIRouter()
+
+# Close code for "try again later" when the session cap is reached
+TRY_AGAIN_LATER = 1013
+
+
+@router.websocket("/ws")
+async def live_mirror(websocket: WebSocket):
+    """Stream video and landmark frames in, and lighting/face/metrics updates out"""
+    await websocket.accept()
+    session = live_sessions.open(websocket)
+    if session is None:
+        await websocket.close(code=TRY_AGAIN_LATER, reason="Too many live sessions")
+        return
+    try:
+        await session.run()
+    finally:
+        live_sessions.close(session)
+
+
+@router.get("/sessions")
+async def get_live_sessions():
+    """Active live sessions with frame counts and latency"""
+    return {
+        "active": len(live_sessions),
+        "max_sessions": live_sessions.max_sessions,
+        "sessions": live_sessions.stats(),
+    }
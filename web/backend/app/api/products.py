@@ -1,121 +1,276 @@
 """Products API"""
 
-from fastapi import APIRouter, HTTPException
-from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from typing import List, Optional
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.db.database import get_session
+from app.db.repositories import InventoryRepository, PriceAlertRepository
 from app.mock.data import (
-    MOCK_PRODUCTS,
-    MOCK_PRICE_HISTORY,
+    PRODUCT_STORE,
+    PRODUCT_SEARCH,
+    DEMO_USER,
+    PRICE_ALERTS,
+    PRICE_HISTORY,
     MOCK_SHOPPING_ALERTS,
     get_product_by_id,
 )
+from app.services.alerts import URGENCY_ORDER
+from app.services.loader import Loaders, get_loaders
+from app.services.prices import PRICE_PERIODS
+from app.services.pagination import (
+    MAX_PAGE_SIZE,
+    NUMBER,
+    TEXT,
+    count_cache,
+    decode_cursor,
+    encode_cursor,
+)
+from app.services.response_cache import response_cache
 
 router = APIRouter()
 
+# sort -> (sorted index, descending)
+PRODUCT_SORTS = {
+    "popular": ("popular", True),
+    "price_low": ("price", False),
+    "price_high": ("price", True),
+    "rating": ("rating", True),
+}
+
 
 @router.get("")
 async def get_products(
     category: Optional[str] = None,
     subcategory: Optional[str] = None,
     sort: str = "popular",
-    limit: int = 20,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    include_total: bool = True,
 ):
     """Get list of products"""
-    products = MOCK_PRODUCTS
-
-    if category:
-        products = [p for p in products if p["category"] == category]
-    if subcategory:
-        products = [p for p in products if p["subcategory"] == subcategory]
+    if sort not in PRODUCT_SORTS:
+        sort = "popular"
+    index, descending = PRODUCT_SORTS[sort]
+    products, last_key = PRODUCT_STORE.page(
+        index,
+        limit,
+        after=decode_cursor(cursor, sort, (NUMBER, TEXT)),
+        reverse=descending,
+        category=category,
+        subcategory=subcategory,
+    )
 
-    # Sort
-    if sort == "price_low":
-        products = sorted(products, key=lambda x: x["price"])
-    elif sort == "price_high":
-        products = sorted(products, key=lambda x: x["price"], reverse=True)
-    elif sort == "rating":
-        products = sorted(products, key=lambda x: x["rating"], reverse=True)
-
-    return {
-        "products": products[:limit],
-        "total": len(products),
-    }
+    response = {"products": products}
+    if include_total:
+        response["total"] = count_cache.store_count(
+            "products", PRODUCT_STORE, category=category, subcategory=subcategory
+        )
+    response["next_cursor"] = encode_cursor(sort, last_key)
+    return response
 
 
 @router.get("/search")
-async def search_products(q: str, limit: int = 20):
+async def search_products(
+    q: str,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+):
     """Search products"""
-    query = q.lower()
-    results = [
-        p for p in MOCK_PRODUCTS
-        if query in p["name"].lower() or query in p["brand"].lower()
-    ]
-    return {"results": results[:limit], "total": len(results)}
+    results, total, last_key = PRODUCT_SEARCH.search(
+        q,
+        limit=limit,
+        after=decode_cursor(cursor, "relevance", (NUMBER, TEXT)),
+        count_total=include_total,
+    )
+    response = {"results": results}
+    if include_total:
+        response["total"] = total
+    response["next_cursor"] = encode_cursor("relevance", last_key)
+    return response
+
+
+# Inventory statuses that surface as replenish suggestions
+REPLENISH_STATUSES = ("critical", "running_low")
+MAX_REPLENISH_SOON = 3
 
 
 @router.get("/smart-recommendations")
-async def get_smart_recommendations():
+async def get_smart_recommendations(
+    loaders: Loaders = Depends(get_loaders),
+    session: AsyncSession = Depends(get_session),
+):
     """Get AI-powered smart recommendations"""
+    low = await InventoryRepository(session).list_by_status(DEMO_USER["id"], REPLENISH_STATUSES)
+    low.sort(key=lambda item: (item.estimated_days_left is None, item.estimated_days_left))
+    replenish_products = await loaders.products.load_many([item.product_id for item in low])
+    trending, skin_based = await loaders.products.load_many(["product-006", "product-001"])
+    # Thresholds may have been set through another worker
+    rules = await PriceAlertRepository(session).list_by_user(DEMO_USER["id"])
+    PRICE_ALERTS.sync_user(DEMO_USER["id"], {rule.product_id: rule.threshold for rule in rules})
     return {
         "replenish_soon": [
             {
-                "product": get_product_by_id("product-002"),
-                "days_left": 7,
-                "recommendation": "MAC Chili 即将用完，618大促预计折扣20%",
+                "product": product,
+                "days_left": item.estimated_days_left,
+                "recommendation": f"{product['name']} 预计 {item.estimated_days_left} 天后用完",
             }
+            for item, product in zip(low[:MAX_REPLENISH_SOON], replenish_products)
+            if product
         ],
         "trending_match": [
             {
-                "product": get_product_by_id("product-006"),
+                "product": trending,
                 "trend_source": "tiktok",
                 "match_reason": "与您关注的「拿铁妆」趋势相关",
             }
         ],
         "skin_based": [
             {
-                "product": get_product_by_id("product-001"),
+                "product": skin_based,
                 "skin_concern": "hydration",
                 "effectiveness": "高效补水",
             }
         ],
-        "alerts": MOCK_SHOPPING_ALERTS,
+        "alerts": _shopping_alerts(DEMO_USER["id"], low, replenish_products),
+    }
+
+
+def _replenish_alert(item, product: dict) -> dict:
+    return {
+        "id": f"alert-replenish-{item.id}",
+        "type": "replenish",
+        "product_id": item.product_id,
+        "message": f"您的 {product['name']} 即将用完",
+        "detail": f"预计还能使用 {item.estimated_days_left} 天",
+        "urgency": "high" if item.status == "critical" else "medium",
+        "suggested_action": "立即补货",
+    }
+
+
+def _shopping_alerts(user_id: str, low: list, products: list) -> list:
+    """Forecast replenish alerts, live price-drop alerts and static ones, most urgent first"""
+    alerts = [a for a in MOCK_SHOPPING_ALERTS if a["type"] not in ("price_drop", "replenish")]
+    alerts += [_replenish_alert(item, product) for item, product in zip(low, products) if product]
+    alerts += PRICE_ALERTS.alerts_for(user_id)
+    return sorted(alerts, key=lambda a: URGENCY_ORDER.get(a.get("urgency"), len(URGENCY_ORDER)))
+
+
+# Upper bound on ids per batch statistics request
+MAX_BATCH_IDS = 200
+
+# Date used for products that have no recorded history
+FALLBACK_PRICE_DATE = "2024-12-15"
+
+
+def _check_period(period: str) -> None:
+    if period not in PRICE_PERIODS:
+        raise HTTPException(status_code=400, detail=f"Unknown period: {period}")
+
+
+def _fallback_statistics(product: dict) -> dict:
+    price = product["price"]
+    return {
+        "current": price,
+        "average": price,
+        "lowest": price,
+        "highest": price,
+        "percentiles": {"p10": price, "p50": price, "p90": price},
+        "points": 1,
     }
 
 
+@router.get("/price-statistics")
+async def get_price_statistics(
+    ids: List[str] = Query(default=[]),
+    period: str = "30d",
+):
+    """Price statistics for many products at once.
+
+    ``ids`` may be repeated or comma-separated.
+    """
+    _check_period(period)
+    product_ids = [pid for value in ids for pid in value.split(",") if pid]
+    if len(product_ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per request")
+
+    statistics = PRICE_HISTORY.statistics(product_ids, period)
+    missing = []
+    for product_id in product_ids:
+        if product_id not in statistics:
+            product = get_product_by_id(product_id)
+            if product:
+                statistics[product_id] = _fallback_statistics(product)
+            else:
+                missing.append(product_id)
+    return {"period": period, "statistics": statistics, "missing": missing}
+
+
 @router.get("/{product_id}")
-async def get_product(product_id: str):
+async def get_product(request: Request, product_id: str):
     """Get product details"""
     product = get_product_by_id(product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    return product
+    return response_cache.respond(request, PRODUCT_STORE.revision(product_id), lambda: product)
 
 
 @router.get("/{product_id}/price-history")
 async def get_price_history(product_id: str, period: str = "30d"):
     """Get product price history"""
-    history = MOCK_PRICE_HISTORY.get(product_id, [])
+    _check_period(period)
+    history = PRICE_HISTORY.points(product_id, period)
+    statistics = PRICE_HISTORY.statistics([product_id], period).get(product_id)
 
     if not history:
         product = get_product_by_id(product_id)
         if product:
-            history = [{"date": "2024-12-15", "price": product["price"]}]
+            history = [{"date": FALLBACK_PRICE_DATE, "price": product["price"]}]
+            statistics = _fallback_statistics(product)
 
-    prices = [p["price"] for p in history]
-    avg_price = sum(prices) / len(prices) if prices else 0
-    min_price = min(prices) if prices else 0
+    statistics = statistics or {"current": 0, "average": 0, "lowest": 0}
+    min_price = statistics["lowest"]
 
     return {
         "product_id": product_id,
         "period": period,
         "prices": history,
-        "statistics": {
-            "current": prices[-1] if prices else 0,
-            "average": round(avg_price),
-            "lowest": min_price,
-        },
+        "statistics": statistics,
         "prediction": {
             "next_sale": "2025-06-18",
             "expected_price": round(min_price * 0.9) if min_price else 0,
         },
     }
+
+
+class PriceAlertRequest(BaseModel):
+    threshold: float
+
+
+@router.put("/{product_id}/price-alert")
+async def set_price_alert(
+    product_id: str,
+    request: PriceAlertRequest,
+    session: AsyncSession = Depends(get_session),
+):
+    """Alert when the product's price drops to or below a threshold"""
+    if not get_product_by_id(product_id):
+        raise HTTPException(status_code=404, detail="Product not found")
+    await PriceAlertRepository(session).save(DEMO_USER["id"], product_id, request.threshold)
+    PRICE_ALERTS.set_threshold(DEMO_USER["id"], product_id, request.threshold)
+    return {
+        "product_id": product_id,
+        "threshold": request.threshold,
+        "message": "Price alert saved",
+    }
+
+
+@router.delete("/{product_id}/price-alert")
+async def delete_price_alert(product_id: str, session: AsyncSession = Depends(get_session)):
+    """Remove a price alert"""
+    if not await PriceAlertRepository(session).remove(DEMO_USER["id"], product_id):
+        raise HTTPException(status_code=404, detail="Price alert not found")
+    PRICE_ALERTS.remove_threshold(DEMO_USER["id"], product_id)
+    return {"message": "Price alert removed"}
@@ -1,17 +1,42 @@
 """Recommendations API"""
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Query, Request
 from typing import Optional
 from pydantic import BaseModel
-
-from app.mock.data import MOCK_STYLES, MOCK_TRENDS, MOCK_PRODUCTS
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db.database import get_session
+from app.db.repositories import AnalysisRepository, UserRepository
+from app.mock.data import (
+    AR_PREVIEWS,
+    DEMO_USER,
+    PRODUCT_EMBEDDINGS,
+    PRODUCT_STORE,
+    STYLE_MATCHES,
+    STYLE_STORE,
+    STYLE_VIEWS,
+    TREND_STORE,
+)
+from app.services.loader import Loaders, get_loaders
+from app.services.pagination import MAX_PAGE_SIZE, NUMBER, TEXT, decode_cursor, encode_cursor
+from app.services.recommender import match_reason, user_features
+from app.services.response_cache import response_cache
 
 router = APIRouter()
 
+# Trend styles per page of /makeup's ``trending`` list
+TRENDING_PAGE_SIZE = 5
+
 
 class ARPreviewRequest(BaseModel):
     style_id: str
     face_image: Optional[str] = None  # base64
+    resolution: int = settings.AR_PREVIEW_RESOLUTION  # longest side of the preview
+    # Raw frames (like /api/analysis/scan/upload) need width and height
+    width: Optional[int] = None
+    height: Optional[int] = None
+    pixel_format: str = "rgb"
 
 
 @router.get("/makeup")
@@ -19,22 +44,43 @@ async def get_makeup_recommendations(
     occasion: Optional[str] = None,
     skin_type: Optional[str] = None,
     mood: Optional[str] = None,
-    limit: int = 10,
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    trending_cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_session),
 ):
     """Get personalized makeup style recommendations"""
-    styles = MOCK_STYLES
-
-    if occasion:
-        styles = [s for s in styles if s["occasion"] == occasion]
-
-    # Sort by match score
-    styles = sorted(styles, key=lambda x: x["match_score"], reverse=True)
 
-    trending = [s for s in MOCK_STYLES if s.get("trend_source")]
+    async def fetch_profile():
+        user = await UserRepository(session).get(DEMO_USER["id"])
+        if user is None:
+            return DEMO_USER["skin_profile"], DEMO_USER["preferences"]
+        return user.skin_profile, user.preferences
+
+    # Highest match score for this user first; cached until their profile changes
+    version = await UserRepository(session).profile_version(DEMO_USER["id"])
+    ranking = await STYLE_MATCHES.ranking(
+        DEMO_USER["id"], fetch_profile, mood=mood, skin_type=skin_type, version=version
+    )
+    matches = [m for m in ranking if occasion is None or m[2] == occasion][:limit]
+    found = STYLE_STORE.get_map([style_id for _, style_id, _, _ in matches])
+    styles = [
+        {**found[style_id], "match_score": score, "match_reason": reason}
+        for score, style_id, _, reason in matches
+        if style_id in found
+    ]
+
+    # Every trend style, most engaged first, a page at a time
+    trending, last_key = STYLE_STORE.page(
+        "trend_engagement",
+        TRENDING_PAGE_SIZE,
+        after=decode_cursor(trending_cursor, "trend_engagement", (NUMBER, TEXT)),
+        reverse=True,
+    )
 
     return {
-        "personalized": styles[:limit],
-        "trending": trending[:5],
+        "personalized": styles,
+        "trending": trending,
+        "trending_next_cursor": encode_cursor("trend_engagement", last_key),
     }
 
 
@@ -42,56 +88,81 @@ async def get_makeup_recommendations(
 async def get_product_recommendations(
     category: Optional[str] = None,
     skin_concerns: Optional[str] = None,
-    limit: int = 10,
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_session),
 ):
     """Get product recommendations based on skin analysis"""
-    products = MOCK_PRODUCTS
-
-    if category:
-        products = [p for p in products if p["category"] == category]
-
-    # Add recommendation reasons
+    user = await UserRepository(session).get(DEMO_USER["id"])
+    latest = await AnalysisRepository(session).latest(DEMO_USER["id"])
+    features = user_features(
+        user.skin_profile if user else DEMO_USER["skin_profile"],
+        user.preferences if user else DEMO_USER["preferences"],
+        latest.data.get("metrics") if latest else None,
+        [c.strip() for c in (skin_concerns or "").split(",") if c.strip()],
+    )
+
+    # Score the whole catalog against the user and keep the best ``limit``
+    ranked = PRODUCT_EMBEDDINGS.top_k(features, limit, category=category)
+    products = PRODUCT_STORE.get_map([product_id for product_id, _, _ in ranked])
     recommended = []
-    for product in products[:limit]:
-        recommended.append({
-            **product,
-            "match_reason": f"适合您的{product.get('suitable_skin_types', ['all'])[0]}肤质"
-        })
+    for product_id, score, feature in ranked:
+        product = products.get(product_id)
+        if product:
+            recommended.append({
+                **product,
+                "match_score": min(100, round(score * 100)),
+                "match_reason": match_reason(feature, product),
+            })
 
     return {"recommended": recommended}
 
 
 @router.get("/styles/{style_id}")
-async def get_style_details(style_id: str):
+async def get_style_details(style_id: str, loaders: Loaders = Depends(get_loaders)):
     """Get detailed style information"""
-    for style in MOCK_STYLES:
-        if style["id"] == style_id:
-            # Include related products
-            style_products = []
-            for pid in style.get("products", []):
-                for p in MOCK_PRODUCTS:
-                    if p["id"] == pid:
-                        style_products.append(p)
-                        break
-            return {
-                **style,
-                "product_details": style_products,
-            }
-    return {"error": "Style not found"}
+    # Materialized with related products
+    style = await STYLE_VIEWS.load(style_id, loaders)
+    if not style:
+        return {"error": "Style not found"}
+    return style
 
 
 @router.post("/ar-preview")
 async def get_ar_preview(request: ARPreviewRequest):
     """Get AR makeup preview"""
-    # In demo mode, return a placeholder response
+    if not request.face_image:
+        # In demo mode, return a placeholder response
+        return {
+            "style_id": request.style_id,
+            "preview_image": None,
+            "message": "AR preview generated successfully",
+        }
+    preview = await AR_PREVIEWS.preview(
+        request.style_id,
+        request.face_image,
+        request.resolution,
+        request.width,
+        request.height,
+        request.pixel_format,
+    )
     return {
         "style_id": request.style_id,
-        "preview_image": None,  # Would contain base64 image in real implementation
+        **preview,
         "message": "AR preview generated successfully",
     }
 
 
+@router.get("/ar-preview/cache")
+async def get_ar_preview_cache():
+    """AR preview cache size and hit counts"""
+    return AR_PREVIEWS.stats()
+
+
 @router.get("/trends")
-async def get_trending_styles():
+async def get_trending_styles(request: Request):
     """Get trending makeup styles from social media"""
-    return {"trends": MOCK_TRENDS}
+    return response_cache.respond(
+        request,
+        TREND_STORE.version,
+        lambda: {"trends": TREND_STORE.all()},
+    )
@@ -1,41 +1,72 @@
 """Trends API"""
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Query, Request
+from itertools import islice
 from typing import Optional
 
-from app.mock.data import MOCK_TRENDS, MOCK_STYLES, MOCK_PRODUCTS
+from app.mock.data import TREND_PIPELINE, TREND_STORE, STYLE_STORE, PRODUCT_STORE
+from app.services.pagination import MAX_PAGE_SIZE, NUMBER, TEXT, decode_cursor, encode_cursor
+from app.services.response_cache import response_cache
 
 router = APIRouter()
 
 
 @router.get("/makeup")
 async def get_makeup_trends(
+    request: Request,
     source: Optional[str] = None,
     period: str = "7d",
-    limit: int = 10,
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
 ):
     """Get trending makeup styles from social media"""
-    trends = MOCK_TRENDS
+    after = decode_cursor(cursor, "trend_score", (NUMBER, TEXT))
 
-    if source:
-        trends = [t for t in trends if t["source"] == source]
+    def build():
+        # Highest trend score first
+        trends, last_key = TREND_STORE.page(
+            "trend_score", limit, after=after, reverse=True, source=source
+        )
+
+        return {
+            "trends": trends,
+            "period": period,
+            "sources": ["xiaohongshu", "tiktok", "instagram", "weibo"],
+            "next_cursor": encode_cursor("trend_score", last_key),
+        }
 
-    # Sort by trend score
-    trends = sorted(trends, key=lambda x: x["trend_score"], reverse=True)
+    return response_cache.respond(request, TREND_STORE.version, build)
 
-    return {
-        "trends": trends[:limit],
-        "period": period,
-        "sources": ["xiaohongshu", "tiktok", "instagram", "weibo"],
-    }
+
+def _format_growth(change) -> str:
+    return "新上榜" if change is None else f"{change:+d}%"
 
 
 @router.get("/products")
-async def get_product_trends(limit: int = 10):
+async def get_product_trends(limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE)):
     """Get trending products"""
+    # Mentions over the feed's sliding window, once a feed has been ingested
+    snapshot = TREND_PIPELINE.snapshot
+    if snapshot["products"]:
+        entries = snapshot["products"][:limit]
+        products = PRODUCT_STORE.get_map([e["product_id"] for e in entries])
+        return {
+            "hot_products": [
+                {
+                    "product": products[e["product_id"]],
+                    "trend_score": e["trend_score"],
+                    "mentions": e["mentions"],
+                    "growth": _format_growth(e["growth"]),
+                }
+                for e in entries
+                if e["product_id"] in products
+            ],
+            "as_of": snapshot["as_of"],
+        }
+
     # Mock trending products
     trending = []
-    for i, product in enumerate(MOCK_PRODUCTS[:limit]):
+    for i, product in enumerate(islice(PRODUCT_STORE, limit)):
         trending.append({
             "product": product,
             "trend_score": 95 - i * 5,
@@ -47,13 +78,29 @@ async def get_product_trends(limit: int = 10):
 
 
 @router.get("/styles")
-async def get_style_trends():
+async def get_style_trends(request: Request):
     """Get trending makeup styles"""
-    trending_styles = [s for s in MOCK_STYLES if s.get("trend_source")]
-    return {
-        "trending_styles": sorted(
-            trending_styles,
-            key=lambda x: x.get("trend_engagement", 0),
-            reverse=True
+    snapshot = TREND_PIPELINE.snapshot
+
+    def build():
+        # Partial index holding only styles with a trend source
+        trending_styles, _ = STYLE_STORE.page(
+            "trend_engagement", len(STYLE_STORE), reverse=True
         )
-    }
+        if not snapshot["hashtags"]:
+            return {"trending_styles": trending_styles}
+
+        # Engagement of each style's hashtag over the feed's sliding window
+        engagement = {(e["source"], e["hashtag"]): e["engagement"] for e in snapshot["hashtags"]}
+        live = [
+            {
+                **style,
+                "trend_engagement": engagement.get((style["trend_source"], style.get("hashtag")), 0),
+            }
+            for style in trending_styles
+        ]
+        live.sort(key=lambda style: -style["trend_engagement"])
+        return {"trending_styles": live, "as_of": snapshot["as_of"]}
+
+    version = (STYLE_STORE.version, snapshot["as_of"], snapshot["events"])
+    return response_cache.respond(request, version, build)
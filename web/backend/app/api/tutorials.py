@@ -1,10 +1,19 @@
 """Tutorials API"""
 
-from fastapi import APIRouter, HTTPException
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from typing import Optional
 from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.mock.data import MOCK_TUTORIALS, MOCK_PRODUCTS, get_tutorial_by_id
+from app.db.database import get_session
+from app.db.repositories import TutorialProgressRepository
+from app.mock.data import DEMO_USER, TUTORIAL_STORE, TUTORIAL_VIEWS, get_tutorial_by_id
+from app.services.dashboard import dashboard
+from app.services.loader import Loaders, get_loaders
+from app.services.pagination import MAX_PAGE_SIZE, TEXT, count_cache, decode_cursor, encode_cursor
+from app.services.response_cache import response_cache
 
 router = APIRouter()
 
@@ -16,74 +25,85 @@ class TutorialProgressRequest(BaseModel):
 
 @router.get("")
 async def get_tutorials(
+    request: Request,
     difficulty: Optional[int] = None,
     category: Optional[str] = None,
-    limit: int = 20,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    include_total: bool = True,
 ):
     """Get list of tutorials"""
-    tutorials = MOCK_TUTORIALS
+    after = decode_cursor(cursor, "id", (TEXT,))
+
+    def build():
+        tutorials, last_key = TUTORIAL_STORE.page(
+            "id", limit, after=after, difficulty=difficulty or None
+        )
+        response = {"tutorials": tutorials}
+        if include_total:
+            response["total"] = count_cache.store_count(
+                "tutorials", TUTORIAL_STORE, difficulty=difficulty or None
+            )
+        response["next_cursor"] = encode_cursor("id", last_key)
+        return response
 
-    if difficulty:
-        tutorials = [t for t in tutorials if t["difficulty"] == difficulty]
+    return response_cache.respond(request, TUTORIAL_STORE.version, build)
 
+
+@router.get("/progress")
+async def get_progress(session: AsyncSession = Depends(get_session)):
+    """Get user's tutorial progress"""
+    in_progress = await TutorialProgressRepository(session).in_progress(DEMO_USER["id"])
     return {
-        "tutorials": tutorials[:limit],
-        "total": len(tutorials),
+        "in_progress": [
+            {
+                "tutorial_id": p.tutorial_id,
+                "current_step": p.current_step,
+                "last_accessed": p.last_accessed,
+            }
+            for p in in_progress
+        ]
     }
 
 
 @router.get("/{tutorial_id}")
-async def get_tutorial(tutorial_id: str):
+async def get_tutorial(
+    request: Request,
+    tutorial_id: str,
+    loaders: Loaders = Depends(get_loaders),
+):
     """Get detailed tutorial information"""
-    tutorial = get_tutorial_by_id(tutorial_id)
+    # Materialized with product details, rebuilt only when its inputs change
+    tutorial = await TUTORIAL_VIEWS.load(tutorial_id, loaders)
     if not tutorial:
         raise HTTPException(status_code=404, detail="Tutorial not found")
 
-    # Enrich with product details
-    enriched_steps = []
-    for step in tutorial["steps"]:
-        step_products = []
-        for pid in step.get("products", []):
-            for p in MOCK_PRODUCTS:
-                if p["id"] == pid:
-                    step_products.append(p)
-                    break
-        enriched_steps.append({
-            **step,
-            "product_details": step_products,
-        })
-
-    return {
-        **tutorial,
-        "steps": enriched_steps,
-    }
+    return response_cache.respond(request, TUTORIAL_VIEWS.revision(tutorial_id), lambda: tutorial)
 
 
 @router.post("/{tutorial_id}/progress")
-async def update_progress(tutorial_id: str, request: TutorialProgressRequest):
+async def update_progress(
+    tutorial_id: str,
+    request: TutorialProgressRequest,
+    session: AsyncSession = Depends(get_session),
+):
     """Update tutorial progress"""
     tutorial = get_tutorial_by_id(tutorial_id)
     if not tutorial:
         raise HTTPException(status_code=404, detail="Tutorial not found")
 
+    await TutorialProgressRepository(session).save(
+        DEMO_USER["id"],
+        tutorial_id,
+        current_step=request.current_step,
+        completed=request.completed,
+        last_accessed=datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+    )
+    dashboard.invalidate(DEMO_USER["id"], "tutorials_completed")
+
     return {
         "tutorial_id": tutorial_id,
         "current_step": request.current_step,
         "completed": request.completed,
         "message": "Progress updated successfully",
     }
-
-
-@router.get("/progress")
-async def get_progress():
-    """Get user's tutorial progress"""
-    # Mock in-progress tutorials
-    return {
-        "in_progress": [
-            {
-                "tutorial_id": "tutorial-001",
-                "current_step": 3,
-                "last_accessed": "2024-12-15T09:30:00",
-            }
-        ]
-    }
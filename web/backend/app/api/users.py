@@ -1,10 +1,16 @@
 """Users API"""
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import Optional
 from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.mock.data import DEMO_USER, MOCK_ACTIVITY_FEED, MOCK_CALENDAR_EVENTS
+from app.db.database import get_session
+from app.db.models import User
+from app.db.repositories import UserRepository
+from app.mock.data import ACTIVITY_STORE, DEMO_USER, MOCK_CALENDAR_EVENTS, STYLE_MATCHES
+from app.services.dashboard import UNAVAILABLE, dashboard
+from app.services.pagination import MAX_PAGE_SIZE, TEXT, count_cache, decode_cursor, encode_cursor
 
 router = APIRouter()
 
@@ -22,39 +28,67 @@ class UpdateSkinProfileRequest(BaseModel):
     allergies: Optional[list] = None
 
 
+async def _get_user(users: UserRepository) -> User:
+    user = await users.get(DEMO_USER["id"])
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+
 @router.get("/profile")
-async def get_profile():
+async def get_profile(session: AsyncSession = Depends(get_session)):
     """Get user profile"""
-    return DEMO_USER
+    user = await _get_user(UserRepository(session))
+    return user.to_dict()
 
 
 @router.patch("/profile")
-async def update_profile(request: UpdateProfileRequest):
+async def update_profile(
+    request: UpdateProfileRequest,
+    session: AsyncSession = Depends(get_session),
+):
     """Update user profile"""
-    updated = {**DEMO_USER}
+    users = UserRepository(session)
+    user = await _get_user(users)
+
+    changes = {}
     if request.name:
-        updated["name"] = request.name
+        changes["name"] = request.name
     if request.avatar:
-        updated["avatar"] = request.avatar
+        changes["avatar"] = request.avatar
+    if request.skin_profile:
+        changes["skin_profile"] = {**user.skin_profile, **request.skin_profile}
     if request.preferences:
-        updated["preferences"] = {**updated["preferences"], **request.preferences}
+        changes["preferences"] = {**user.preferences, **request.preferences}
+
+    if changes:
+        user = await users.update_profile(user.id, **changes)
+        STYLE_MATCHES.invalidate(user.id)
+        dashboard.invalidate(user.id, "user")
 
     return {
         "message": "Profile updated",
-        "profile": updated,
+        "profile": user.to_dict(),
     }
 
 
 @router.get("/skin-profile")
-async def get_skin_profile():
+async def get_skin_profile(session: AsyncSession = Depends(get_session)):
     """Get user's skin profile"""
-    return DEMO_USER["skin_profile"]
+    user = await _get_user(UserRepository(session))
+    return user.skin_profile
 
 
 @router.post("/skin-profile")
-async def update_skin_profile(request: UpdateSkinProfileRequest):
+async def update_skin_profile(
+    request: UpdateSkinProfileRequest,
+    session: AsyncSession = Depends(get_session),
+):
     """Update skin profile"""
-    profile = {**DEMO_USER["skin_profile"]}
+    users = UserRepository(session)
+    user = await _get_user(users)
+
+    profile = {**user.skin_profile}
     if request.skin_type:
         profile["skin_type"] = request.skin_type
     if request.concerns:
@@ -62,6 +96,10 @@ async def update_skin_profile(request: UpdateSkinProfileRequest):
     if request.allergies:
         profile["allergies"] = request.allergies
 
+    await users.update_profile(user.id, skin_profile=profile)
+    STYLE_MATCHES.invalidate(user.id)
+    dashboard.invalidate(user.id, "user")
+
     return {
         "message": "Skin profile updated",
         "profile": profile,
@@ -69,12 +107,24 @@ async def update_skin_profile(request: UpdateSkinProfileRequest):
 
 
 @router.get("/activity")
-async def get_activity(limit: int = 10):
+async def get_activity(
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+):
     """Get user activity feed"""
-    return {
-        "activities": MOCK_ACTIVITY_FEED[:limit],
-        "total": len(MOCK_ACTIVITY_FEED),
-    }
+    # Newest first
+    activities, last_key = ACTIVITY_STORE.page(
+        "timestamp",
+        limit,
+        after=decode_cursor(cursor, "timestamp", (TEXT, TEXT)),
+        reverse=True,
+    )
+    response = {"activities": activities}
+    if include_total:
+        response["total"] = count_cache.store_count("activity", ACTIVITY_STORE)
+    response["next_cursor"] = encode_cursor("timestamp", last_key)
+    return response
 
 
 @router.get("/calendar")
@@ -95,14 +145,20 @@ async def sync_calendar(provider: str = "google"):
 @router.get("/dashboard")
 async def get_dashboard():
     """Get dashboard summary data"""
+    # Sections load concurrently; slow ones fall back to their last good value
+    values, sections = await dashboard.load(DEMO_USER["id"])
+    user = values["user"]
+    if user is None and sections["user"] != UNAVAILABLE:
+        raise HTTPException(status_code=404, detail="User not found")
     return {
-        "user": DEMO_USER,
-        "streak": DEMO_USER["streak"],
-        "recent_activity": MOCK_ACTIVITY_FEED[:5],
-        "upcoming_events": MOCK_CALENDAR_EVENTS[:3],
+        "user": user,
+        "streak": user["streak"] if user else None,
+        "recent_activity": values["recent_activity"] or [],
+        "upcoming_events": values["upcoming_events"] or [],
         "quick_stats": {
-            "skin_score": 78,
-            "tutorials_completed": 12,
-            "products_tracked": 4,
+            "skin_score": values["skin_score"],
+            "tutorials_completed": values["tutorials_completed"],
+            "products_tracked": values["products_tracked"],
         },
+        "sections": sections,
     }
@@ -17,6 +17,69 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str = "sqlite+aiosqlite:///./agentic_mirror.db"
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_BUSY_TIMEOUT_MS: int = 5000
+    DB_ECHO: bool = False
+    SEED_DEMO_DATA: bool = True
+
+    # Catalog snapshot built with `python -m app.mock.snapshot build`, mapped
+    # at startup in place of the demo catalog (unset = demo catalog). Workers
+    # share its pages and reload when a new generation is renamed over it.
+    CATALOG_SNAPSHOT_PATH: Optional[str] = None
+    CATALOG_SNAPSHOT_POLL_SECONDS: float = 5.0  # 0 = never reload
+    CATALOG_CACHE_ITEMS: int = 2048  # decoded items kept per store and worker
+
+    # Response cache
+    RESPONSE_CACHE_SIZE: int = 1024
+    RESPONSE_CACHE_MAX_AGE: int = 10
+
+    # Skin scan
+    SCAN_WORKERS: int = 0  # 0 = one per CPU, up to 4
+    SCAN_SPOOL_MAX_MEMORY: int = 8 * 1024 * 1024
+    SCAN_MAX_UPLOAD_BYTES: int = 64 * 1024 * 1024
+    SCAN_ANALYSIS_SIZE: int = 512
+    ANALYSIS_SERIES_MAX_USERS: int = 10000
+
+    # Dashboard: each section load waits at most this long before falling back
+    DASHBOARD_TIMEOUT_SECONDS: float = 0.5
+
+    # AR previews (rendered in the scan worker pool)
+    AR_PREVIEW_RESOLUTION: int = 512
+    AR_PREVIEW_MAX_RESOLUTION: int = 1024
+    AR_PREVIEW_CACHE_BYTES: int = 64 * 1024 * 1024
+
+    # Inventory replenish job (interval 0 = run once at startup)
+    REPLENISH_INTERVAL_SECONDS: int = 3600
+    REPLENISH_CHUNK_SIZE: int = 50000
+
+    # Live mirror WebSocket sessions
+    LIVE_MAX_SESSIONS: int = 500
+    LIVE_MAX_FRAME_BYTES: int = 8 * 1024 * 1024
+    LIVE_OUTBOX_SIZE: int = 32
+    LIVE_ANALYSIS_SIZE: int = 256
+    LIVE_METRICS_INTERVAL: float = 1.0
+    LIVE_MAX_INFLIGHT_METRICS: int = 0  # 0 = twice the scan workers
+    LIVE_PING_SECONDS: float = 5.0
+
+    # Social trend feed: a JSONL replay file ingested at startup (unset = off)
+    TREND_FEED_PATH: Optional[str] = None
+    TREND_FEED_FOLLOW: bool = False
+    TREND_PUBLISH_SECONDS: float = 5.0
+
+    # Price updates: a JSONL feed of {"product_id", "date", "price"} (unset = off)
+    PRICE_FEED_PATH: Optional[str] = None
+    PRICE_FEED_FOLLOW: bool = False
+
+    # Per-route request metrics, served at /metrics
+    METRICS_ENABLED: bool = True
+
+    # Profiling: requests with an X-Profile-Token header matching the token
+    # are profiled, and /api/admin serves the results (unset = off)
+    PROFILING_TOKEN: Optional[str] = None
+    PROFILING_DIR: Optional[str] = None  # also keep .prof files / sampler output here
+    PROFILING_KEEP: int = 50
+    PROFILING_MAX_SECONDS: float = 60.0
 
     # CORS
     CORS_ORIGINS: list[str] = ["http://localhost:3001", "http://127.0.0.1:3001"]
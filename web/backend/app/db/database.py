@@ -0,0 +1,109 @@
+"""Async database engine and session management"""
+
+from typing import AsyncIterator, List, Optional
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import Connection, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.schema import CreateColumn
+
+from app.config import settings
+from app.db.models import Base
+
+engine: Optional[AsyncEngine] = None
+SessionLocal: Optional[async_sessionmaker] = None
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets several uvicorn workers read while one writes
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.execute(f"PRAGMA busy_timeout={settings.DB_BUSY_TIMEOUT_MS}")
+    cursor.close()
+
+
+def create_engine(url: str) -> AsyncEngine:
+    """Create a pooled async engine for the given URL"""
+    options = {"echo": settings.DB_ECHO, "pool_pre_ping": True}
+    parsed = make_url(url)
+    is_sqlite = parsed.get_backend_name() == "sqlite"
+    in_memory = is_sqlite and parsed.database in (None, "", ":memory:")
+    if not in_memory:
+        # aiosqlite defaults to NullPool; keep connections open instead
+        options["poolclass"] = AsyncAdaptedQueuePool
+        options["pool_size"] = settings.DB_POOL_SIZE
+        options["max_overflow"] = settings.DB_MAX_OVERFLOW
+
+    new_engine = create_async_engine(url, **options)
+    if is_sqlite:
+        event.listen(new_engine.sync_engine, "connect", _set_sqlite_pragmas)
+    return new_engine
+
+
+def add_missing_columns(connection: Connection) -> List[str]:
+    """Add model columns that existing tables lack; returns ``table.column`` names.
+
+    ``create_all`` creates missing tables but never alters existing ones, so
+    a database created before a column was added would fail every query on
+    it. Added columns take their server default, or NULL, in existing rows.
+    """
+    inspector = inspect(connection)
+    added = []
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        present = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in present:
+                continue
+            definition = CreateColumn(column).compile(dialect=connection.dialect)
+            connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {definition}"))
+            added.append(f"{table.name}.{column.name}")
+    return added
+
+
+async def init_db(url: Optional[str] = None) -> AsyncEngine:
+    """Open the engine, create tables and seed demo data if needed"""
+    global engine, SessionLocal
+
+    engine = create_engine(url or settings.DATABASE_URL)
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        added = await conn.run_sync(add_missing_columns)
+    if added:
+        print(f"Added database columns: {', '.join(added)}")
+
+    if settings.SEED_DEMO_DATA:
+        from app.db.seed import seed_demo_data
+
+        async with SessionLocal() as session:
+            await seed_demo_data(session)
+
+    return engine
+
+
+async def close_db() -> None:
+    global engine, SessionLocal
+
+    if engine is not None:
+        await engine.dispose()
+    engine = None
+    SessionLocal = None
+
+
+async def get_session() -> AsyncIterator[AsyncSession]:
+    """FastAPI dependency yielding a pooled session"""
+    if SessionLocal is None:
+        raise RuntimeError("Database is not initialized")
+    async with SessionLocal() as session:
+        yield session
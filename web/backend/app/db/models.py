@@ -0,0 +1,207 @@
+"""Database models"""
+
+from typing import Any, Dict, Optional
+
+from sqlalchemy import JSON, Boolean, Float, ForeignKey, Index, Integer, String, UniqueConstraint
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class User(Base):
+    __tablename__ = "users"
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    name: Mapped[str] = mapped_column(String(128))
+    email: Mapped[str] = mapped_column(String(255), unique=True, index=True)
+    avatar: Mapped[Optional[str]] = mapped_column(String(512))
+    skin_profile: Mapped[Dict[str, Any]] = mapped_column(JSON, default=dict)
+    preferences: Mapped[Dict[str, Any]] = mapped_column(JSON, default=dict)
+    streak: Mapped[int] = mapped_column(Integer, default=0)
+    join_date: Mapped[Optional[str]] = mapped_column(String(10))
+    # Bumped on every profile write, so per-worker caches can tell they are stale
+    profile_version: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "email": self.email,
+            "avatar": self.avatar,
+            "skin_profile": self.skin_profile,
+            "preferences": self.preferences,
+            "streak": self.streak,
+            "join_date": self.join_date,
+        }
+
+
+class InventoryItem(Base):
+    __tablename__ = "inventory_items"
+    __table_args__ = (
+        Index("ix_inventory_user_status", "user_id", "status"),
+    )
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    user_id: Mapped[str] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    product_id: Mapped[str] = mapped_column(String(64), index=True)
+    purchase_date: Mapped[Optional[str]] = mapped_column(String(10))
+    open_date: Mapped[Optional[str]] = mapped_column(String(10))
+    total_amount: Mapped[Optional[int]] = mapped_column(Integer)
+    remaining_percent: Mapped[int] = mapped_column(Integer, default=100)
+    estimated_days_left: Mapped[Optional[int]] = mapped_column(Integer)
+    status: Mapped[str] = mapped_column(String(32), default="good")
+    # Smoothed percent used per day, and the date remaining_percent was last reported
+    usage_rate: Mapped[Optional[float]] = mapped_column(Float)
+    measured_at: Mapped[Optional[str]] = mapped_column(String(10))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "product_id": self.product_id,
+            "purchase_date": self.purchase_date,
+            "open_date": self.open_date,
+            "total_amount": self.total_amount,
+            "remaining_percent": self.remaining_percent,
+            "estimated_days_left": self.estimated_days_left,
+            "status": self.status,
+            "usage_rate": self.usage_rate,
+            "measured_at": self.measured_at,
+        }
+
+
+class Analysis(Base):
+    __tablename__ = "analyses"
+    __table_args__ = (
+        Index("ix_analyses_user_date", "user_id", "date"),
+    )
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    user_id: Mapped[str] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    date: Mapped[str] = mapped_column(String(10))
+    overall_score: Mapped[int] = mapped_column(Integer)
+    # Full analysis payload (metrics, skin_tone, problem_areas, ...)
+    data: Mapped[Dict[str, Any]] = mapped_column(JSON, default=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "date": self.date,
+            "overall_score": self.overall_score,
+            **self.data,
+        }
+
+
+class TutorialProgress(Base):
+    __tablename__ = "tutorial_progress"
+    __table_args__ = (
+        UniqueConstraint("user_id", "tutorial_id", name="uq_progress_user_tutorial"),
+        Index("ix_progress_user_completed", "user_id", "completed"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[str] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    tutorial_id: Mapped[str] = mapped_column(String(64))
+    current_step: Mapped[int] = mapped_column(Integer, default=0)
+    completed: Mapped[bool] = mapped_column(Boolean, default=False)
+    last_accessed: Mapped[str] = mapped_column(String(19))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "tutorial_id": self.tutorial_id,
+            "current_step": self.current_step,
+            "completed": self.completed,
+            "last_accessed": self.last_accessed,
+        }
+
+
+class Subscription(Base):
+    __tablename__ = "subscriptions"
+    __table_args__ = (
+        Index("ix_subscriptions_user_status", "user_id", "status"),
+    )
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    user_id: Mapped[str] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    product_id: Mapped[str] = mapped_column(String(64), index=True)
+    frequency_months: Mapped[int] = mapped_column(Integer, default=2)
+    price_at_subscription: Mapped[Optional[int]] = mapped_column(Integer)
+    discount_percent: Mapped[int] = mapped_column(Integer, default=0)
+    status: Mapped[str] = mapped_column(String(32), default="active")
+    next_delivery: Mapped[Optional[str]] = mapped_column(String(10))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "product_id": self.product_id,
+            "frequency_months": self.frequency_months,
+            "price_at_subscription": self.price_at_subscription,
+            "discount_percent": self.discount_percent,
+            "status": self.status,
+            "next_delivery": self.next_delivery,
+        }
+
+
+class PriceAlertRule(Base):
+    __tablename__ = "price_alert_rules"
+    __table_args__ = (
+        UniqueConstraint("user_id", "product_id", name="uq_price_alert_user_product"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[str] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    product_id: Mapped[str] = mapped_column(String(64), index=True)
+    threshold: Mapped[float] = mapped_column(Float)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "user_id": self.user_id,
+            "product_id": self.product_id,
+            "threshold": self.threshold,
+        }
+
+
+class ReplenishEvent(Base):
+    __tablename__ = "replenish_events"
+    __table_args__ = (
+        Index("ix_replenish_events_user_id", "user_id", "id"),
+    )
+
+    # The id doubles as the feed sequence clients page with
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[str] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    inventory_id: Mapped[str] = mapped_column(String(64))
+    product_id: Mapped[str] = mapped_column(String(64))
+    status: Mapped[str] = mapped_column(String(32))
+    days_left: Mapped[Optional[int]] = mapped_column(Integer)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "sequence": self.id,
+            "type": "replenish",
+            "inventory_id": self.inventory_id,
+            "product_id": self.product_id,
+            "status": self.status,
+            "days_left": self.days_left,
+        }
+
+
+class JobLease(Base):
+    """Which process runs a background job, until ``expires_at`` (epoch seconds)"""
+
+    __tablename__ = "job_leases"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    owner: Mapped[str] = mapped_column(String(64))
+    expires_at: Mapped[float] = mapped_column(Float)
+
+
+class SeedMarker(Base):
+    """A demo seed section already applied to this database"""
+
+    __tablename__ = "seed_markers"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
@@ -0,0 +1,334 @@
+"""Async repositories over the database models"""
+
+from typing import Any, Dict, Generic, Iterable, List, Optional, Sequence, Set, Type, TypeVar
+
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import (
+    Analysis,
+    Base,
+    InventoryItem,
+    JobLease,
+    PriceAlertRule,
+    ReplenishEvent,
+    SeedMarker,
+    Subscription,
+    TutorialProgress,
+    User,
+)
+
+ModelT = TypeVar("ModelT", bound=Base)
+
+# Rows per executemany batch for bulk paths
+BULK_CHUNK_SIZE = 5000
+
+
+class Repository(Generic[ModelT]):
+    """Common CRUD and bulk operations for a single model"""
+
+    model: Type[ModelT]
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get(self, item_id: Any) -> Optional[ModelT]:
+        return await self.session.get(self.model, item_id)
+
+    async def get_many(self, item_ids: Sequence[Any]) -> List[ModelT]:
+        if not item_ids:
+            return []
+        pk = self.model.__mapper__.primary_key[0]
+        result = await self.session.scalars(select(self.model).where(pk.in_(item_ids)))
+        return list(result)
+
+    async def list_by_user(self, user_id: str) -> List[ModelT]:
+        result = await self.session.scalars(
+            select(self.model).where(self.model.user_id == user_id)
+        )
+        return list(result)
+
+    async def count_by_user(self, user_id: str) -> int:
+        return await self.session.scalar(
+            select(func.count()).select_from(self.model).where(self.model.user_id == user_id)
+        )
+
+    async def add(self, **values: Any) -> ModelT:
+        item = self.model(**values)
+        self.session.add(item)
+        await self.session.commit()
+        return item
+
+    async def update(self, item_id: Any, **values: Any) -> Optional[ModelT]:
+        item = await self.get(item_id)
+        if item is None:
+            return None
+        for key, value in values.items():
+            setattr(item, key, value)
+        await self.session.commit()
+        return item
+
+    async def delete(self, item_id: Any) -> bool:
+        pk = self.model.__mapper__.primary_key[0]
+        result = await self.session.execute(delete(self.model).where(pk == item_id))
+        await self.session.commit()
+        return result.rowcount > 0
+
+    async def bulk_insert(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """Insert many rows with executemany, chunked to bound memory"""
+        count = 0
+        chunk: List[Dict[str, Any]] = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= BULK_CHUNK_SIZE:
+                await self.session.execute(insert(self.model), chunk)
+                count += len(chunk)
+                chunk = []
+        if chunk:
+            await self.session.execute(insert(self.model), chunk)
+            count += len(chunk)
+        await self.session.commit()
+        return count
+
+    async def bulk_update(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """Update many rows by primary key; each row must include the key"""
+        count = 0
+        chunk: List[Dict[str, Any]] = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= BULK_CHUNK_SIZE:
+                await self.session.execute(update(self.model), chunk)
+                count += len(chunk)
+                chunk = []
+        if chunk:
+            await self.session.execute(update(self.model), chunk)
+            count += len(chunk)
+        await self.session.commit()
+        return count
+
+
+class UserRepository(Repository[User]):
+    model = User
+
+    async def update_profile(self, user_id: str, **values: Any) -> Optional[User]:
+        """Update profile fields and bump ``profile_version`` in the same write"""
+        user = await self.get(user_id)
+        if user is None:
+            return None
+        for key, value in values.items():
+            setattr(user, key, value)
+        user.profile_version = User.profile_version + 1
+        await self.session.commit()
+        await self.session.refresh(user, ["profile_version"])
+        return user
+
+    async def profile_version(self, user_id: str) -> Optional[int]:
+        return await self.session.scalar(select(User.profile_version).where(User.id == user_id))
+
+
+class InventoryRepository(Repository[InventoryItem]):
+    model = InventoryItem
+
+    async def list_by_status(self, user_id: str, statuses: Sequence[str]) -> List[InventoryItem]:
+        result = await self.session.scalars(
+            select(InventoryItem).where(
+                InventoryItem.user_id == user_id,
+                InventoryItem.status.in_(statuses),
+            )
+        )
+        return list(result)
+
+
+class AnalysisRepository(Repository[Analysis]):
+    model = Analysis
+
+    async def history(
+        self,
+        user_id: str,
+        limit: Optional[int] = None,
+        after: Optional[Sequence[str]] = None,
+    ) -> List[Analysis]:
+        """Analyses for a user, oldest first, optionally after a (date, id) key"""
+        query = (
+            select(Analysis)
+            .where(Analysis.user_id == user_id)
+            .order_by(Analysis.date, Analysis.id)
+        )
+        if after is not None:
+            after_date, after_id = after
+            query = query.where(or_(
+                Analysis.date > after_date,
+                and_(Analysis.date == after_date, Analysis.id > after_id),
+            ))
+        if limit is not None:
+            query = query.limit(limit)
+        result = await self.session.scalars(query)
+        return list(result)
+
+    async def latest(self, user_id: str) -> Optional[Analysis]:
+        return await self.session.scalar(
+            select(Analysis)
+            .where(Analysis.user_id == user_id)
+            .order_by(Analysis.date.desc(), Analysis.id.desc())
+            .limit(1)
+        )
+
+
+class TutorialProgressRepository(Repository[TutorialProgress]):
+    model = TutorialProgress
+
+    async def get_for(self, user_id: str, tutorial_id: str) -> Optional[TutorialProgress]:
+        return await self.session.scalar(
+            select(TutorialProgress).where(
+                TutorialProgress.user_id == user_id,
+                TutorialProgress.tutorial_id == tutorial_id,
+            )
+        )
+
+    async def save(self, user_id: str, tutorial_id: str, **values: Any) -> TutorialProgress:
+        """Insert or update the progress row for (user, tutorial)"""
+        progress = await self.get_for(user_id, tutorial_id)
+        if progress is None:
+            progress = TutorialProgress(user_id=user_id, tutorial_id=tutorial_id, **values)
+            self.session.add(progress)
+        else:
+            for key, value in values.items():
+                setattr(progress, key, value)
+        await self.session.commit()
+        return progress
+
+    async def in_progress(self, user_id: str) -> List[TutorialProgress]:
+        result = await self.session.scalars(
+            select(TutorialProgress)
+            .where(TutorialProgress.user_id == user_id, TutorialProgress.completed.is_(False))
+            .order_by(TutorialProgress.last_accessed.desc())
+        )
+        return list(result)
+
+    async def completed_count(self, user_id: str) -> int:
+        return await self.session.scalar(
+            select(func.count())
+            .select_from(TutorialProgress)
+            .where(TutorialProgress.user_id == user_id, TutorialProgress.completed.is_(True))
+        )
+
+
+class SubscriptionRepository(Repository[Subscription]):
+    model = Subscription
+
+    async def active(self, user_id: str) -> List[Subscription]:
+        result = await self.session.scalars(
+            select(Subscription).where(
+                Subscription.user_id == user_id,
+                Subscription.status == "active",
+            )
+        )
+        return list(result)
+
+
+class PriceAlertRepository(Repository[PriceAlertRule]):
+    model = PriceAlertRule
+
+    async def get_for(self, user_id: str, product_id: str) -> Optional[PriceAlertRule]:
+        return await self.session.scalar(
+            select(PriceAlertRule).where(
+                PriceAlertRule.user_id == user_id,
+                PriceAlertRule.product_id == product_id,
+            )
+        )
+
+    async def save(self, user_id: str, product_id: str, threshold: float) -> PriceAlertRule:
+        """Insert or update the threshold for (user, product)"""
+        rule = await self.get_for(user_id, product_id)
+        if rule is None:
+            rule = PriceAlertRule(user_id=user_id, product_id=product_id, threshold=threshold)
+            self.session.add(rule)
+        else:
+            rule.threshold = threshold
+        await self.session.commit()
+        return rule
+
+    async def remove(self, user_id: str, product_id: str) -> bool:
+        result = await self.session.execute(
+            delete(PriceAlertRule).where(
+                PriceAlertRule.user_id == user_id,
+                PriceAlertRule.product_id == product_id,
+            )
+        )
+        await self.session.commit()
+        return result.rowcount > 0
+
+    async def all(self) -> List[PriceAlertRule]:
+        result = await self.session.scalars(select(PriceAlertRule))
+        return list(result)
+
+
+class ReplenishEventRepository(Repository[ReplenishEvent]):
+    model = ReplenishEvent
+
+    async def since(self, user_id: str, after: int = 0, limit: int = 20) -> List[ReplenishEvent]:
+        """The newest ``limit`` events after sequence ``after``, oldest first"""
+        result = await self.session.scalars(
+            select(ReplenishEvent)
+            .where(ReplenishEvent.user_id == user_id, ReplenishEvent.id > after)
+            .order_by(ReplenishEvent.id.desc())
+            .limit(limit)
+        )
+        return list(result)[::-1]
+
+    async def trim(self, keep: int) -> int:
+        """Delete all but the newest ``keep`` events"""
+        newest = await self.session.scalar(select(func.max(ReplenishEvent.id)))
+        if newest is None or newest <= keep:
+            return 0
+        result = await self.session.execute(
+            delete(ReplenishEvent).where(ReplenishEvent.id <= newest - keep)
+        )
+        await self.session.commit()
+        return result.rowcount
+
+
+class JobLeaseRepository(Repository[JobLease]):
+    model = JobLease
+
+    async def acquire(self, name: str, owner: str, seconds: float, now: float) -> bool:
+        """Take or renew the lease on job ``name``; False while another owner holds it"""
+        result = await self.session.execute(
+            update(JobLease)
+            .where(JobLease.name == name, or_(JobLease.owner == owner, JobLease.expires_at < now))
+            .values(owner=owner, expires_at=now + seconds)
+        )
+        if result.rowcount:
+            await self.session.commit()
+            return True
+        try:
+            await self.add(name=name, owner=owner, expires_at=now + seconds)
+        except IntegrityError:
+            # Held by someone else, or taken concurrently
+            await self.session.rollback()
+            return False
+        return True
+
+    async def release(self, name: str, owner: str) -> None:
+        await self.session.execute(
+            update(JobLease)
+            .where(JobLease.name == name, JobLease.owner == owner)
+            .values(expires_at=0.0)
+        )
+        await self.session.commit()
+
+
+class SeedMarkerRepository(Repository[SeedMarker]):
+    model = SeedMarker
+
+    async def names(self) -> Set[str]:
+        return set(await self.session.scalars(select(SeedMarker.name)))
+
+    async def mark(self, names: Iterable[str]) -> None:
+        """Record sections as applied; ones another worker recorded first are skipped"""
+        for name in names:
+            try:
+                await self.add(name=name)
+            except IntegrityError:
+                await self.session.rollback()
@@ -0,0 +1,133 @@
+"""Seed the database with demo data"""
+
+from typing import Awaitable, Callable, Dict
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.repositories import (
+    AnalysisRepository,
+    InventoryRepository,
+    PriceAlertRepository,
+    SeedMarkerRepository,
+    SubscriptionRepository,
+    TutorialProgressRepository,
+    UserRepository,
+)
+from app.mock.data import (
+    DEMO_USER,
+    MOCK_ANALYSIS_HISTORY,
+    MOCK_INVENTORY,
+    MOCK_PRICE_ALERT_RULES,
+    MOCK_SUBSCRIPTIONS,
+    MOCK_TUTORIAL_PROGRESS,
+    mock_analysis,
+)
+
+
+def _history_rows(user_id: str):
+    for entry in MOCK_ANALYSIS_HISTORY:
+        yield {
+            "id": f"analysis-{entry['date']}",
+            "user_id": user_id,
+            "date": entry["date"],
+            "overall_score": entry["score"],
+            "data": {
+                "metrics": {
+                    "hydration": {"score": entry["hydration"]},
+                    "oil": {"score": entry["oil"]},
+                },
+            },
+        }
+
+
+async def _seed_users(session: AsyncSession) -> None:
+    await UserRepository(session).bulk_insert([DEMO_USER])
+
+
+async def _seed_inventory(session: AsyncSession) -> None:
+    await InventoryRepository(session).bulk_insert(MOCK_INVENTORY)
+
+
+async def _seed_analyses(session: AsyncSession) -> None:
+    user_id = DEMO_USER["id"]
+    analysis = mock_analysis()
+    analysis_data = {
+        k: v for k, v in analysis.items()
+        if k not in ("id", "user_id", "date", "overall_score")
+    }
+    await AnalysisRepository(session).bulk_insert([
+        *_history_rows(user_id),
+        {
+            "id": analysis["id"],
+            "user_id": user_id,
+            "date": analysis["date"],
+            "overall_score": analysis["overall_score"],
+            "data": analysis_data,
+        },
+    ])
+
+
+async def _seed_subscriptions(session: AsyncSession) -> None:
+    await SubscriptionRepository(session).bulk_insert(
+        {**sub, "user_id": DEMO_USER["id"]} for sub in MOCK_SUBSCRIPTIONS
+    )
+
+
+async def _seed_tutorial_progress(session: AsyncSession) -> None:
+    await TutorialProgressRepository(session).bulk_insert(
+        {**progress, "user_id": DEMO_USER["id"]} for progress in MOCK_TUTORIAL_PROGRESS
+    )
+
+
+async def _seed_price_alerts(session: AsyncSession) -> None:
+    await PriceAlertRepository(session).bulk_insert(MOCK_PRICE_ALERT_RULES)
+
+
+# Sections in dependency order; new demo data gets a new section, so
+# databases seeded by an earlier version receive it on their next start
+SEED_SECTIONS: Dict[str, Callable[[AsyncSession], Awaitable[None]]] = {
+    "users": _seed_users,
+    "inventory": _seed_inventory,
+    "analyses": _seed_analyses,
+    "subscriptions": _seed_subscriptions,
+    "tutorial_progress": _seed_tutorial_progress,
+    "price_alerts": _seed_price_alerts,
+}
+
+# Sections a database had when the demo user existed but markers did not
+LEGACY_SECTIONS = ("users", "inventory", "analyses", "subscriptions", "tutorial_progress")
+
+
+async def seed_demo_data(session: AsyncSession) -> bool:
+    """Apply each demo seed section this database hasn't had yet; returns True if any ran.
+
+    Applied sections are recorded in ``seed_markers``, so rows a user later
+    deletes are not seeded again.
+    """
+    markers = SeedMarkerRepository(session)
+    applied = await markers.names()
+    if not applied and await UserRepository(session).get(DEMO_USER["id"]) is not None:
+        await markers.mark(LEGACY_SECTIONS)
+        applied = set(LEGACY_SECTIONS)
+
+    seeded = False
+    for name, seed in SEED_SECTIONS.items():
+        if name in applied:
+            continue
+        try:
+            await seed(session)
+            seeded = True
+        except IntegrityError:
+            # Another worker seeded this section concurrently
+            await session.rollback()
+        await markers.mark([name])
+    return seeded
+
+
+async def seed_generated_data(session: AsyncSession, generator) -> Dict[str, int]:
+    """Bulk insert users and inventories from a DatasetGenerator"""
+    return {
+        "users": await UserRepository(session).bulk_insert(generator.iter_users()),
+        "inventory": await InventoryRepository(session).bulk_insert(generator.iter_inventory()),
+    }
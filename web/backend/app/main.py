@@ -1,17 +1,63 @@
-from fastapi import FastAPI
+import time
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from app.config import settings
-from app.api import analysis, recommendations, tutorials, products, inventory, trends, users
+from app.db import database
+from app.db.database import close_db, init_db
+from app.db.repositories import PriceAlertRepository
+from app.mock.data import PRICE_ALERTS, PRICE_FEED, TREND_PIPELINE
+from app.mock.snapshot import snapshot_watcher
+from app.services.metrics import PROMETHEUS_CONTENT_TYPE, MetricsMiddleware, metrics
+from app.services.profiling import ProfilingMiddleware, profiles, sampler
+from app.services.replenish import replenish_job
+from app.services.skin_engine import scan_engine
+from app.api import analysis, recommendations, tutorials, products, inventory, trends, users, live, admin
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     print(f"Starting {settings.APP_NAME}...")
+    # CPU time so far is the interpreter plus importing the app and demo data
+    startup = metrics.startup
+    startup["import"] = time.process_time()
+    started = time.perf_counter()
+    await init_db()
+    async with database.SessionLocal() as session:
+        PRICE_ALERTS.load_rules(rule.to_dict() for rule in await PriceAlertRepository(session).all())
+    startup["database"] = time.perf_counter() - started
+    if settings.CATALOG_SNAPSHOT_PATH:
+        snapshot = snapshot_watcher.load()
+        startup["catalog_snapshot"] = snapshot["seconds"]
+        print(
+            f"Loaded catalog snapshot {snapshot['path']} generation {snapshot['generation']} "
+            f"({snapshot['items']['products']:,} products)"
+        )
+        snapshot_watcher.start()
+    replenish_job.start(database.SessionLocal)
+    if settings.TREND_FEED_PATH:
+        TREND_PIPELINE.start(
+            settings.TREND_FEED_PATH, settings.TREND_FEED_FOLLOW, settings.TREND_PUBLISH_SECONDS
+        )
+    if settings.PRICE_FEED_PATH:
+        PRICE_FEED.start(settings.PRICE_FEED_PATH, settings.PRICE_FEED_FOLLOW)
+    startup["lifespan"] = time.perf_counter() - started
+    print(
+        "Started in "
+        + ", ".join(f"{phase} {seconds * 1000:.0f} ms" for phase, seconds in startup.items())
+    )
     yield
     # Shutdown
+    sampler.stop()
+    await snapshot_watcher.stop()
+    await TREND_PIPELINE.stop()
+    await PRICE_FEED.stop()
+    await replenish_job.stop()
+    await close_db()
+    scan_engine.shutdown()
     print(f"Shutting down {settings.APP_NAME}...")
 
 
@@ -31,6 +77,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Only installed when a token is configured, so it costs nothing otherwise
+if settings.PROFILING_TOKEN:
+    app.add_middleware(ProfilingMiddleware, token=settings.PROFILING_TOKEN, store=profiles)
+
+# Outermost, so its latency covers the other middleware too
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(analysis.router, prefix="/api/analysis", tags=["Analysis"])
 app.include_router(recommendations.router, prefix="/api/recommendations", tags=["Recommendations"])
@@ -39,6 +93,8 @@ app.include_router(products.router, prefix="/api/products", tags=["Products"])
 app.include_router(inventory.router, prefix="/api/inventory", tags=["Inventory"])
 app.include_router(trends.router, prefix="/api/trends", tags=["Trends"])
 app.include_router(users.router, prefix="/api/users", tags=["Users"])
+app.include_router(live.router, prefix="/api/live", tags=["Live"])
+app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
 
 
 @app.get("/")
@@ -55,6 +111,12 @@ async def health():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Per-route request metrics for this worker, in Prometheus text format"""
+    return Response(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -1,8 +1,26 @@
 """Mock data for AgenticMirror Demo API"""
 
-from datetime import datetime, timedelta
+from datetime import date
 from typing import Dict, List, Any, Optional
 
+from app.config import settings
+from app.services.alerts import PriceAlertEngine
+from app.services.ar_preview import ARPreviewRenderer
+from app.services.catalog import CatalogStore
+from app.services.price_feed import PriceFeed
+from app.services.prices import PriceHistory
+from app.services.recommender import ProductEmbeddings
+from app.services.search import SearchIndex
+from app.services.style_match import StyleMatchCache
+from app.services.trend_stream import TrendPipeline
+from app.services.views import (
+    MaterializedView,
+    enrich_style,
+    enrich_tutorial,
+    style_product_ids,
+    tutorial_product_ids,
+)
+
 # Demo User
 DEMO_USER = {
     "id": "demo-user-001",
@@ -26,11 +44,11 @@ DEMO_USER = {
     "join_date": "2024-10-01",
 }
 
-# Skin Analysis
+# Skin Analysis (dated when served, see mock_analysis)
 MOCK_ANALYSIS = {
     "id": "analysis-001",
     "user_id": "demo-user-001",
-    "date": datetime.now().strftime("%Y-%m-%d"),
+    "date": None,
     "overall_score": 78,
     "metrics": {
         "hydration": {"score": 65, "status": "moderate", "trend": "+5"},
@@ -60,6 +78,12 @@ MOCK_ANALYSIS = {
     ],
 }
 
+
+def mock_analysis() -> Dict[str, Any]:
+    """The demo analysis, dated today"""
+    return {**MOCK_ANALYSIS, "date": date.today().isoformat()}
+
+
 # Analysis History
 MOCK_ANALYSIS_HISTORY = [
     {"date": "2024-11-15", "score": 72, "hydration": 58, "oil": 48},
@@ -82,6 +106,7 @@ MOCK_STYLES = [
         "thumbnail": "/images/styles/natural-office.jpg",
         "match_score": 95,
         "match_reason": "与您的肤色和职业风格完美匹配",
+        "undertones": ["warm", "neutral"],
         "trend_source": None,
         "products": ["product-001", "product-002", "product-003"],
         "steps": 5,
@@ -97,8 +122,10 @@ MOCK_STYLES = [
         "thumbnail": "/images/styles/soft-glam.jpg",
         "match_score": 88,
         "match_reason": "暖色调与您的肤色相得益彰",
+        "undertones": ["warm"],
         "trend_source": "xiaohongshu",
         "trend_engagement": 15200,
+        "hashtag": "#氛围感",
         "products": ["product-002", "product-004", "product-005"],
         "steps": 7,
     },
@@ -113,8 +140,10 @@ MOCK_STYLES = [
         "thumbnail": "/images/styles/clean-girl.jpg",
         "match_score": 82,
         "match_reason": "简约风格突出您的自然美",
+        "undertones": ["cool", "neutral"],
         "trend_source": "tiktok",
         "trend_engagement": 89000,
+        "hashtag": "#CleanGirl",
         "products": ["product-001", "product-006"],
         "steps": 4,
     },
@@ -129,8 +158,10 @@ MOCK_STYLES = [
         "thumbnail": "/images/styles/retro-hk.jpg",
         "match_score": 75,
         "match_reason": "红唇与您的五官相配",
+        "undertones": ["warm", "cool"],
         "trend_source": "xiaohongshu",
         "trend_engagement": 25600,
+        "hashtag": "#港风妆",
         "products": ["product-003", "product-007", "product-008"],
         "steps": 8,
     },
@@ -424,6 +455,38 @@ MOCK_INVENTORY = [
     },
 ]
 
+# Subscriptions
+MOCK_SUBSCRIPTIONS = [
+    {
+        "id": "sub-001",
+        "product_id": "product-001",
+        "frequency_months": 2,
+        "price_at_subscription": 950,
+        "discount_percent": 10,
+        "status": "active",
+        "next_delivery": "2025-02-15",
+    },
+    {
+        "id": "sub-002",
+        "product_id": "product-004",
+        "frequency_months": 3,
+        "price_at_subscription": 480,
+        "discount_percent": 5,
+        "status": "active",
+        "next_delivery": "2025-03-01",
+    },
+]
+
+# Tutorial Progress
+MOCK_TUTORIAL_PROGRESS = [
+    {
+        "tutorial_id": "tutorial-001",
+        "current_step": 3,
+        "completed": False,
+        "last_accessed": "2024-12-15T09:30:00",
+    },
+]
+
 # Price History
 MOCK_PRICE_HISTORY = {
     "product-001": [
@@ -444,6 +507,11 @@ MOCK_PRICE_HISTORY = {
     ],
 }
 
+# Price alert thresholds set by users
+MOCK_PRICE_ALERT_RULES = [
+    {"user_id": DEMO_USER["id"], "product_id": "product-001", "threshold": 1000},
+]
+
 # Shopping Alerts
 MOCK_SHOPPING_ALERTS = [
     {
@@ -534,22 +602,46 @@ MOCK_CALENDAR_EVENTS = [
 ]
 
 
+# Indexed stores used by the routers
+PRODUCT_STORE = CatalogStore(
+    MOCK_PRODUCTS,
+    index_fields=("category", "subcategory", "brand", "skin_concerns", "suitable_skin_types"),
+)
+PRODUCT_STORE.add_sorted_index("price", ("price",))
+PRODUCT_STORE.add_sorted_index("rating", ("rating",))
+PRODUCT_STORE.add_sorted_index("popular", ("review_count",))
+PRODUCT_SEARCH = SearchIndex.for_store(PRODUCT_STORE)
+PRODUCT_EMBEDDINGS = ProductEmbeddings.for_store(PRODUCT_STORE)
+STYLE_STORE = CatalogStore(MOCK_STYLES, index_fields=("occasion", "trend_source"))
+STYLE_STORE.add_sorted_index("match_score", ("match_score",))
+STYLE_STORE.add_sorted_index(
+    "trend_engagement", ("trend_engagement",), where=lambda s: s.get("trend_source")
+)
+STYLE_MATCHES = StyleMatchCache(STYLE_STORE, PRODUCT_STORE)
+TUTORIAL_STORE = CatalogStore(MOCK_TUTORIALS, index_fields=("difficulty", "style_id"))
+TUTORIAL_STORE.add_sorted_index("id", ())
+AR_PREVIEWS = ARPreviewRenderer(
+    STYLE_STORE, TUTORIAL_STORE, settings.AR_PREVIEW_CACHE_BYTES, settings.AR_PREVIEW_MAX_RESOLUTION
+)
+TREND_STORE = CatalogStore(MOCK_TRENDS, index_fields=("source",))
+TREND_STORE.add_sorted_index("trend_score", ("trend_score",))
+TREND_PIPELINE = TrendPipeline(TREND_STORE)
+TUTORIAL_VIEWS = MaterializedView(TUTORIAL_STORE, PRODUCT_STORE, enrich_tutorial, tutorial_product_ids)
+STYLE_VIEWS = MaterializedView(STYLE_STORE, PRODUCT_STORE, enrich_style, style_product_ids)
+ACTIVITY_STORE = CatalogStore(MOCK_ACTIVITY_FEED, index_fields=("type",))
+ACTIVITY_STORE.add_sorted_index("timestamp", ("timestamp",))
+PRICE_HISTORY = PriceHistory(MOCK_PRICE_HISTORY)
+PRICE_ALERTS = PriceAlertEngine(PRICE_HISTORY, PRODUCT_STORE, MOCK_PRICE_ALERT_RULES)
+PRICE_FEED = PriceFeed(PRICE_HISTORY)
+
+
 def get_product_by_id(product_id: str) -> Optional[Dict]:
-    for product in MOCK_PRODUCTS:
-        if product["id"] == product_id:
-            return product
-    return None
+    return PRODUCT_STORE.get(product_id)
 
 
 def get_style_by_id(style_id: str) -> Optional[Dict]:
-    for style in MOCK_STYLES:
-        if style["id"] == style_id:
-            return style
-    return None
+    return STYLE_STORE.get(style_id)
 
 
 def get_tutorial_by_id(tutorial_id: str) -> Optional[Dict]:
-    for tutorial in MOCK_TUTORIALS:
-        if tutorial["id"] == tutorial_id:
-            return tutorial
-    return None
+    return TUTORIAL_STORE.get(tutorial_id)
@@ -0,0 +1,350 @@
+"""Seeded synthetic dataset generator for load testing"""
+
+import random
+from dataclasses import dataclass
+from itertools import accumulate
+from datetime import date, timedelta
+from typing import Any, Dict, Iterator, List
+
+from app.mock.data import (
+    MOCK_PRICE_HISTORY,
+    PRICE_HISTORY,
+    MOCK_PRODUCTS,
+    MOCK_STYLES,
+    MOCK_TRENDS,
+    MOCK_TUTORIALS,
+    PRODUCT_STORE,
+    STYLE_STORE,
+    TREND_PIPELINE,
+    TREND_STORE,
+    TUTORIAL_STORE,
+)
+
+BRANDS = [
+    ("Lancome", "兰蔻"), ("MAC", "魅可"), ("NARS", "纳斯"), ("YSL", "圣罗兰"),
+    ("Anastasia", "安娜塔西亚"), ("Estee Lauder", "雅诗兰黛"), ("Shiseido", "资生堂"),
+    ("Dior", "迪奥"), ("Chanel", "香奈儿"), ("Clinique", "倩碧"), ("SK-II", "神仙水"),
+    ("Armani", "阿玛尼"), ("Florasis", "花西子"), ("Perfect Diary", "完美日记"),
+]
+
+SUBCATEGORIES = {
+    "skincare": [
+        ("serum", "精华液", "Serum"), ("toner", "爽肤水", "Toner"),
+        ("moisturizer", "面霜", "Moisturizer"), ("sunscreen", "防晒霜", "Sunscreen"),
+        ("cleanser", "洁面乳", "Cleanser"), ("mask", "面膜", "Sheet Mask"),
+    ],
+    "makeup": [
+        ("lipstick", "口红", "Lipstick"), ("foundation", "粉底液", "Foundation"),
+        ("eyeshadow", "眼影盘", "Eyeshadow Palette"), ("highlighter", "高光", "Highlighter"),
+        ("blush", "腮红", "Blush"), ("mascara", "睫毛膏", "Mascara"),
+        ("eyebrow", "眉笔", "Brow Pencil"), ("concealer", "遮瑕膏", "Concealer"),
+    ],
+}
+
+ADJECTIVES = [
+    ("丝绒", "Velvet"), ("水润", "Hydrating"), ("持妆", "Long Wear"), ("哑光", "Matte"),
+    ("柔焦", "Soft Focus"), ("光感", "Radiant"), ("清透", "Sheer"), ("修护", "Repair"),
+    ("焕亮", "Brightening"), ("轻薄", "Lightweight"),
+]
+
+SKIN_CONCERNS = [
+    "anti-aging", "hydration", "brightness", "coverage", "longevity",
+    "pores", "acne", "oil-control", "sensitivity", "dark-circles",
+]
+SKIN_TYPES = ["dry", "oily", "combination", "normal", "sensitive"]
+UNDERTONES = ["warm", "cool", "neutral"]
+OCCASIONS = ["work", "date", "casual", "party"]
+SOURCES = ["xiaohongshu", "tiktok", "instagram", "weibo"]
+OVERLAY_TYPES = ["full_face", "eyebrow", "eyeshadow", "lips", "blush", "contour"]
+TREND_WORDS = [
+    ("水光", "Glass"), ("拿铁", "Latte"), ("氛围感", "Soft Focus"), ("果汁", "Juicy"),
+    ("纯欲", "Clean Girl"), ("复古", "Retro"), ("元气", "Energetic"), ("奶油", "Creamy"),
+]
+VOLUMES = ["3g", "6ml", "14g", "30ml", "50ml", "100ml", "1pc"]
+
+DEMO_START = date(2024, 1, 1)
+
+# Hand-written demo price history, kept across reloads
+DEMO_PRICE_HISTORY = dict(MOCK_PRICE_HISTORY)
+
+
+@dataclass
+class DatasetSizes:
+    products: int = 10_000
+    users: int = 1_000
+    styles: int = 200
+    tutorials: int = 200
+    trends: int = 100
+    inventory_per_user: int = 8
+    price_history_products: int = 10_000
+    price_points: int = 12
+
+
+class DatasetGenerator:
+    """Builds deterministic catalogs, users, inventories, price histories and trends.
+
+    Every collection is derived from ``seed`` and the collection name, so the
+    same sizes always produce the same records regardless of generation order.
+    Large collections are yielded lazily so they can be streamed into bulk
+    inserts without materializing everything at once.
+    """
+
+    def __init__(self, sizes: DatasetSizes, seed: int = 42):
+        self.sizes = sizes
+        self.seed = seed
+
+    def _rng(self, name: str) -> random.Random:
+        return random.Random(f"{self.seed}:{name}")
+
+    @staticmethod
+    def product_id(i: int) -> str:
+        return f"product-{i:07d}"
+
+    @staticmethod
+    def user_id(i: int) -> str:
+        return f"user-{i:07d}"
+
+    def iter_products(self) -> Iterator[Dict[str, Any]]:
+        rng = self._rng("products")
+        categories = list(SUBCATEGORIES)
+        for i in range(self.sizes.products):
+            brand_en, brand_zh = rng.choice(BRANDS)
+            category = rng.choice(categories)
+            subcategory, sub_zh, sub_en = rng.choice(SUBCATEGORIES[category])
+            adj_zh, adj_en = rng.choice(ADJECTIVES)
+            price = rng.choice([59, 99, 129, 170, 199, 260, 320, 420, 480, 520, 760, 950, 1350])
+            discount = rng.choice([0, 0, 0, 5, 10, 15, 20])
+            yield {
+                "id": self.product_id(i),
+                "name": f"{brand_zh}{adj_zh}{sub_zh} {i % 97 + 1}号",
+                "name_en": f"{brand_en} {adj_en} {sub_en} No.{i % 97 + 1}",
+                "brand": brand_en,
+                "category": category,
+                "subcategory": subcategory,
+                "price": round(price * (100 - discount) / 100),
+                "original_price": price,
+                "currency": "CNY",
+                "volume": rng.choice(VOLUMES),
+                "rating": round(rng.uniform(3.5, 5.0), 1),
+                "review_count": rng.randint(0, 50_000),
+                "image": f"/images/products/generated-{i % 500}.jpg",
+                "suitable_skin_types": (
+                    ["all"] if rng.random() < 0.5 else rng.sample(SKIN_TYPES, rng.randint(1, 3))
+                ),
+                "skin_concerns": rng.sample(SKIN_CONCERNS, rng.randint(0, 3)),
+                "description": f"{adj_zh}质地的{sub_zh}，适合日常使用",
+            }
+
+    def products(self) -> List[Dict[str, Any]]:
+        return list(self.iter_products())
+
+    def styles(self) -> List[Dict[str, Any]]:
+        rng = self._rng("styles")
+        # Trending styles carry a hashtag from their source's trends, so feed events reach them
+        tags: Dict[str, List[str]] = {}
+        for trend in MOCK_TRENDS + self.trends():
+            tags.setdefault(trend["source"], []).append(trend["hashtag"])
+        styles = []
+        for i in range(self.sizes.styles):
+            word_zh, word_en = rng.choice(TREND_WORDS)
+            occasion = rng.choice(OCCASIONS)
+            trending = rng.random() < 0.6
+            style = {
+                "id": f"style-{i:05d}",
+                "name": f"{word_zh}{occasion}妆 {i}",
+                "name_en": f"{word_en} {occasion.title()} Look {i}",
+                "description": f"{word_zh}风格，适合{occasion}场合",
+                "difficulty": rng.randint(1, 5),
+                "duration": rng.randint(5, 30),
+                "occasion": occasion,
+                "thumbnail": f"/images/styles/generated-{i % 50}.jpg",
+                "match_score": rng.randint(60, 99),
+                "match_reason": "与您的肤色相配",
+                "undertones": rng.sample(UNDERTONES, rng.randint(1, 2)),
+                "trend_source": rng.choice(SOURCES) if trending else None,
+                "products": [
+                    self.product_id(rng.randrange(self.sizes.products))
+                    for _ in range(rng.randint(2, 5))
+                ] if self.sizes.products else [],
+                "steps": rng.randint(3, 8),
+            }
+            if trending:
+                style["trend_engagement"] = rng.randint(1_000, 200_000)
+                source_tags = tags.get(style["trend_source"])
+                style["hashtag"] = (
+                    source_tags[i % len(source_tags)] if source_tags else f"#{word_en.replace(' ', '')}"
+                )
+            styles.append(style)
+        return styles
+
+    def tutorials(self) -> List[Dict[str, Any]]:
+        rng = self._rng("tutorials")
+        tutorials = []
+        for i in range(self.sizes.tutorials):
+            steps = []
+            for n in range(1, rng.randint(3, 8) + 1):
+                steps.append({
+                    "step_number": n,
+                    "title": f"步骤 {n}",
+                    "description": "按照镜中提示完成该步骤",
+                    "ar_overlay_type": rng.choice(OVERLAY_TYPES),
+                    "products": [
+                        self.product_id(rng.randrange(self.sizes.products))
+                        for _ in range(rng.randint(0, 2))
+                    ] if self.sizes.products else [],
+                    "tips": ["少量多次"],
+                    "duration": rng.randint(30, 120),
+                })
+            related = sorted({pid for step in steps for pid in step["products"]})
+            tutorials.append({
+                "id": f"tutorial-{i:05d}",
+                "style_id": f"style-{rng.randrange(max(self.sizes.styles, 1)):05d}",
+                "title": f"妆容教程 {i}",
+                "title_en": f"Makeup Tutorial {i}",
+                "description": "跟着魔镜一步步完成妆容",
+                "difficulty": rng.randint(1, 5),
+                "duration": sum(s["duration"] for s in steps) // 60 + 1,
+                "thumbnail": f"/images/tutorials/generated-{i % 50}.jpg",
+                "steps": steps,
+                "related_products": related,
+            })
+        return tutorials
+
+    def trends(self) -> List[Dict[str, Any]]:
+        rng = self._rng("trends")
+        trends = []
+        for i in range(self.sizes.trends):
+            word_zh, word_en = rng.choice(TREND_WORDS)
+            trends.append({
+                "id": f"trend-{i:05d}",
+                "name": f"{word_zh}妆 {i}",
+                "name_en": f"{word_en} Makeup {i}",
+                "source": rng.choice(SOURCES),
+                "engagement": rng.randint(1_000, 500_000),
+                "trend_score": rng.randint(40, 99),
+                "description": f"{word_zh}风格正在流行",
+                "hashtag": f"#{word_en.replace(' ', '')}{i}",
+            })
+        return trends
+
+    def price_history(self) -> Dict[str, List[Dict[str, Any]]]:
+        rng = self._rng("price_history")
+        history = {}
+        count = min(self.sizes.price_history_products, self.sizes.products)
+        step = timedelta(days=max(365 // max(self.sizes.price_points, 1), 1))
+        for i in range(count):
+            base = rng.choice([59, 99, 170, 320, 480, 950])
+            history[self.product_id(i)] = [
+                {
+                    "date": (DEMO_START + step * n).isoformat(),
+                    "price": round(base * rng.choice([1.0, 1.0, 0.95, 0.9, 0.8])),
+                }
+                for n in range(self.sizes.price_points)
+            ]
+        return history
+
+    def iter_users(self) -> Iterator[Dict[str, Any]]:
+        rng = self._rng("users")
+        for i in range(self.sizes.users):
+            yield {
+                "id": self.user_id(i),
+                "name": f"User {i}",
+                "email": f"user{i}@demo.com",
+                "avatar": None,
+                "skin_profile": {
+                    "skin_type": rng.choice(SKIN_TYPES),
+                    "skin_tone_monk": rng.randint(1, 10),
+                    "undertone": rng.choice(UNDERTONES),
+                    "concerns": rng.sample(SKIN_CONCERNS, rng.randint(0, 3)),
+                    "allergies": [],
+                },
+                "preferences": {
+                    "style": rng.choice(["natural", "glam", "bold"]),
+                    "brands": [b for b, _ in rng.sample(BRANDS, 3)],
+                    "budget_range": [100, rng.choice([300, 500, 1000])],
+                },
+                "streak": rng.randint(0, 60),
+                "join_date": (DEMO_START + timedelta(days=rng.randint(0, 300))).isoformat(),
+            }
+
+    def iter_inventory(self) -> Iterator[Dict[str, Any]]:
+        rng = self._rng("inventory")
+        if not self.sizes.products:
+            return
+        for u in range(self.sizes.users):
+            for n in range(self.sizes.inventory_per_user):
+                remaining = rng.randint(0, 100)
+                opened = DEMO_START + timedelta(days=rng.randint(0, 300))
+                yield {
+                    "id": f"inv-{u:07d}-{n:02d}",
+                    "user_id": self.user_id(u),
+                    "product_id": self.product_id(rng.randrange(self.sizes.products)),
+                    "purchase_date": opened.isoformat(),
+                    "open_date": opened.isoformat(),
+                    "total_amount": rng.choice([3, 6, 30, 50, 100]),
+                    "remaining_percent": remaining,
+                    "estimated_days_left": remaining,
+                    "status": (
+                        "critical" if remaining <= 15
+                        else "running_low" if remaining <= 40
+                        else "good"
+                    ),
+                }
+
+    def iter_trend_events(
+        self,
+        count: int,
+        start: float,
+        seconds: float = 7 * 86400,
+    ) -> Iterator[Dict[str, Any]]:
+        """Social post events spread evenly over ``seconds`` from epoch ``start``.
+
+        Hashtags and products are drawn with Zipf-like weights, so a few are
+        heavy hitters and the rest form a long tail.
+        """
+        rng = self._rng("trend_events")
+        tags = [(t["source"], t["hashtag"]) for t in MOCK_TRENDS + self.trends()]
+        tag_weights = list(accumulate(1 / (rank + 1) for rank in range(len(tags))))
+        products = [p["id"] for p in MOCK_PRODUCTS]
+        products += [self.product_id(i) for i in range(min(self.sizes.products, 5_000))]
+        product_weights = list(accumulate(1 / (rank + 1) for rank in range(len(products))))
+        step = seconds / max(count, 1)
+        for i in range(count):
+            source, hashtag = rng.choices(tags, cum_weights=tag_weights)[0]
+            event = {
+                "ts": round(start + i * step, 3),
+                "source": source,
+                "type": "post" if rng.random() < 0.3 else "mention",
+                "hashtags": [hashtag],
+                "engagement": int(rng.expovariate(1 / 50)),
+            }
+            if rng.random() < 0.6:
+                event["products"] = rng.choices(products, cum_weights=product_weights, k=rng.randint(1, 2))
+            yield event
+
+
+def load_catalog(generator: DatasetGenerator, keep_demo: bool = True) -> None:
+    """Replace the in-memory catalog stores with generated data.
+
+    With ``keep_demo`` the hand-written demo records stay in the stores so the
+    demo ids referenced by the routers keep resolving.
+    """
+    stores = [
+        (PRODUCT_STORE, MOCK_PRODUCTS, generator.iter_products()),
+        (STYLE_STORE, MOCK_STYLES, generator.styles()),
+        (TUTORIAL_STORE, MOCK_TUTORIALS, generator.tutorials()),
+        (TREND_STORE, MOCK_TRENDS, generator.trends()),
+    ]
+    for store, demo, items in stores:
+        store.clear()
+        if keep_demo:
+            store.add_many(demo)
+        store.add_many(items)
+
+    TREND_PIPELINE.clear()
+    MOCK_PRICE_HISTORY.clear()
+    if keep_demo:
+        MOCK_PRICE_HISTORY.update(DEMO_PRICE_HISTORY)
+    MOCK_PRICE_HISTORY.update(generator.price_history())
+    PRICE_HISTORY.clear()
+    PRICE_HISTORY.load(MOCK_PRICE_HISTORY)
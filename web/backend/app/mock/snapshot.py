@@ -0,0 +1,314 @@
+"""Precompiled catalog snapshots shared by every worker.
+
+Building the catalog means indexing every item: secondary and sorted
+indexes, the product search index and embeddings. A snapshot stores the
+items together with all of that as offset-addressed arrays, so a worker
+maps one file and serves the stores straight from it: nothing is copied
+or re-indexed, items are decoded when read, and the pages are shared by
+every process mapping the file, however many workers run.
+
+Publishing a new catalog is writing a new snapshot over the old path
+(written aside and renamed, so readers never see a partial file); each
+worker's ``SnapshotWatcher`` notices the new generation and swaps to it.
+
+Usage (from web/backend)::
+
+    python -m app.mock.snapshot build catalog.snap --products 10000
+    python -m app.mock.snapshot info catalog.snap
+
+Point ``CATALOG_SNAPSHOT_PATH`` at the file to load it at start-up.
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.mock.data import (
+    PRICE_ALERTS,
+    PRICE_HISTORY,
+    PRODUCT_EMBEDDINGS,
+    PRODUCT_SEARCH,
+    PRODUCT_STORE,
+    STYLE_STORE,
+    TREND_PIPELINE,
+    TREND_STORE,
+    TUTORIAL_STORE,
+)
+from app.mock.generator import DatasetGenerator, DatasetSizes, load_catalog
+from app.services.catalog import CatalogSegment
+from app.services.prices import PriceSegment
+from app.services.search import SearchSegment
+from app.services.snapshot import Snapshot, SnapshotWriter
+
+STORES = {
+    "products": PRODUCT_STORE,
+    "styles": STYLE_STORE,
+    "tutorials": TUTORIAL_STORE,
+    "trends": TREND_STORE,
+}
+
+
+def build_snapshot(path: str) -> Dict[str, Any]:
+    """Write the current catalog stores, their indexes and price history to ``path``.
+
+    The generation is one more than that of the snapshot being replaced.
+    """
+    started = time.perf_counter()
+    writer = SnapshotWriter()
+    counts = {}
+    for name, store in STORES.items():
+        items, runs, buckets, orders = store.export_segment()
+        counts[name] = writer.add_records(name, items, key=store.key)
+        writer.add_array(f"{name}.buckets", buckets)
+        sorts = {}
+        for i, (sort, (positions, columns)) in enumerate(orders.items()):
+            writer.add_array(f"{name}.sort{i}", positions)
+            for j, column in enumerate(columns):
+                writer.add_array(f"{name}.sort{i}.{j}", column)
+            sorts[sort] = (i, [column.dtype.str for column in columns])
+        writer.add_object(f"{name}.index", (runs, sorts))
+
+    ids = [item[PRODUCT_STORE.key] for item in PRODUCT_STORE]
+    terms, starts, docs, tfs, doc_len, doc_count, total_len = PRODUCT_SEARCH.export_segment(ids)
+    writer.add_object("search.meta", (PRODUCT_SEARCH.fields, doc_count, total_len))
+    writer.add_strings("search.terms", terms)
+    writer.add_array("search.starts", starts)
+    writer.add_array("search.docs", docs)
+    writer.add_array("search.tfs", tfs)
+    writer.add_array("search.doc_len", doc_len)
+
+    features, ids, vectors, popularity = PRODUCT_EMBEDDINGS.export_segment()
+    writer.add_object("embeddings.features", features)
+    writer.add_strings("embeddings.ids", ids)
+    writer.add_array("embeddings.vectors", vectors.astype(np.float32))
+    writer.add_array("embeddings.popularity", popularity.astype(np.float32))
+
+    product_ids, starts, days, prices = PRICE_HISTORY.export_segment()
+    writer.add_strings("prices.ids", product_ids, keyed=True)
+    writer.add_array("prices.starts", starts)
+    writer.add_array("prices.days", days.astype(np.int32))
+    writer.add_array("prices.values", prices.astype(np.float64))
+    counts["price_history"] = len(product_ids)
+
+    try:
+        generation = Snapshot(path).generation + 1
+    except (OSError, ValueError):
+        generation = 1
+    size = writer.write(path, generation)
+    return {
+        "path": path,
+        "bytes": size,
+        "generation": generation,
+        "items": counts,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def _catalog_segment(snapshot: Snapshot, name: str, cache_size: int) -> CatalogSegment:
+    records = snapshot.records(name, cache_size)
+    runs, sorts = snapshot.object(f"{name}.index")
+    orders = {
+        sort: (
+            snapshot.array(f"{name}.sort{i}", np.int32),
+            [snapshot.array(f"{name}.sort{i}.{j}", dtype) for j, dtype in enumerate(dtypes)],
+        )
+        for sort, (i, dtypes) in sorts.items()
+    }
+    return CatalogSegment(records, runs, snapshot.array(f"{name}.buckets", np.int32), orders)
+
+
+def load_snapshot(path: str, cache_size: int = settings.CATALOG_CACHE_ITEMS) -> Dict[str, Any]:
+    """Serve the catalog stores from a snapshot's mapping.
+
+    Raises ``ValueError`` when the file isn't a snapshot or was built for
+    different indexes than this code defines; rebuild it then. Everything
+    is checked before any store changes, so a failed load leaves the
+    current catalog in place.
+    """
+    started = time.perf_counter()
+    snapshot = Snapshot(path)
+    fields, doc_count, total_len = snapshot.object("search.meta")
+    if fields != PRODUCT_SEARCH.fields:
+        raise ValueError(f"{path} was built with different search fields; rebuild it")
+    segments = {name: _catalog_segment(snapshot, name, cache_size) for name in STORES}
+    for name, store in STORES.items():
+        if not store.matches(segments[name]):
+            raise ValueError(f"{path} was built with different {name} indexes; rebuild it")
+
+    counts = {}
+    for name, store in STORES.items():
+        store.restore(segments[name])
+        counts[name] = len(store)
+    records = segments["products"].items.records
+    PRODUCT_SEARCH.restore(
+        SearchSegment(
+            records,
+            snapshot.strings("search.terms"),
+            snapshot.array("search.starts", np.uint64),
+            snapshot.array("search.docs", np.int32),
+            snapshot.array("search.tfs", np.float64),
+            snapshot.array("search.doc_len", np.float64),
+            doc_count,
+            total_len,
+        )
+    )
+    features = snapshot.object("embeddings.features")
+    ids = snapshot.strings("embeddings.ids")
+    PRODUCT_EMBEDDINGS.restore(
+        features,
+        ids,
+        snapshot.array("embeddings.vectors", np.float32).reshape(len(ids), len(features)),
+        snapshot.array("embeddings.popularity", np.float32),
+    )
+    # The trend store now holds the snapshot's trends; put the live counts back
+    TREND_PIPELINE.resync()
+
+    prices = PriceSegment(
+        snapshot.strings("prices.ids"),
+        snapshot.array("prices.starts", np.uint64),
+        snapshot.array("prices.days", np.int32),
+        snapshot.array("prices.values", np.float64),
+    )
+    # Restoring is silent, so alerts are re-checked against the new prices
+    watched = PRICE_ALERTS.watched_prices()
+    PRICE_HISTORY.restore(prices)
+    PRICE_ALERTS.recheck(watched)
+    counts["price_history"] = len(prices)
+    return {
+        "path": path,
+        "bytes": snapshot.size,
+        "built_at": snapshot.built_at,
+        "generation": snapshot.generation,
+        "identity": snapshot.identity,
+        "items": counts,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+class SnapshotWatcher:
+    """Keeps a worker on the newest snapshot generation at ``path``.
+
+    Snapshots are replaced by renaming a new file over the path, so a
+    changed inode or mtime means a complete new generation is there. The
+    swap runs on the event loop between requests; a request sees either
+    the old catalog or the new one, and the old mapping goes away once
+    nothing refers to it.
+    """
+
+    def __init__(self, path: Optional[str], interval: float, cache_size: int):
+        self.path = path
+        self.interval = interval
+        self.cache_size = cache_size
+        self.identity: Optional[Tuple[int, int, int]] = None
+        self.generation: Optional[int] = None
+        self._rejected: Optional[Tuple[int, int, int]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def load(self) -> Dict[str, Any]:
+        result = load_snapshot(self.path, self.cache_size)
+        self.identity = result["identity"]
+        self.generation = result["generation"]
+        return result
+
+    def check(self) -> Optional[Dict[str, Any]]:
+        """Load the snapshot if the file changed since the last load.
+
+        A file that fails to load is not retried until it changes again.
+        """
+        stat = os.stat(self.path)
+        identity = (stat.st_dev, stat.st_ino, stat.st_mtime_ns)
+        if identity in (self.identity, self._rejected):
+            return None
+        try:
+            return self.load()
+        except Exception:
+            self._rejected = identity
+            raise
+
+    async def run_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                result = self.check()
+            except Exception as exc:  # keep serving the current generation
+                print(f"Catalog snapshot reload failed: {exc!r}")
+                continue
+            if result is not None:
+                print(
+                    f"Reloaded catalog snapshot {result['path']} generation {result['generation']} "
+                    f"in {result['seconds'] * 1000:.0f} ms"
+                )
+
+    def start(self) -> None:
+        if self._task is None and self.path and self.interval > 0:
+            self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+snapshot_watcher = SnapshotWatcher(
+    settings.CATALOG_SNAPSHOT_PATH,
+    settings.CATALOG_SNAPSHOT_POLL_SECONDS,
+    settings.CATALOG_CACHE_ITEMS,
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build or inspect catalog snapshots")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="generate a catalog and compile it into a snapshot")
+    build.add_argument("path")
+    build.add_argument("--products", type=int, default=10_000)
+    build.add_argument("--styles", type=int, default=200)
+    build.add_argument("--tutorials", type=int, default=200)
+    build.add_argument("--trends", type=int, default=100)
+    build.add_argument("--price-points", type=int, default=12)
+    build.add_argument("--seed", type=int, default=42)
+    build.add_argument("--no-demo", action="store_true", help="leave out the hand-written demo records")
+    info = commands.add_parser("info", help="load a snapshot and report its contents")
+    info.add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        sizes = DatasetSizes(
+            products=args.products,
+            styles=args.styles,
+            tutorials=args.tutorials,
+            trends=args.trends,
+            price_history_products=args.products,
+            price_points=args.price_points,
+        )
+        t0 = time.perf_counter()
+        load_catalog(DatasetGenerator(sizes, seed=args.seed), keep_demo=not args.no_demo)
+        print(f"generated and indexed the catalog in {time.perf_counter() - t0:.2f}s")
+        result = build_snapshot(args.path)
+        print(
+            f"wrote {result['bytes']:,} bytes to {args.path} (generation {result['generation']}) "
+            f"in {result['seconds']:.2f}s"
+        )
+    else:
+        result = load_snapshot(args.path)
+        built = datetime.fromtimestamp(result["built_at"]).isoformat(timespec="seconds")
+        print(
+            f"{args.path}: {result['bytes']:,} bytes, generation {result['generation']}, built {built}, "
+            f"loaded in {result['seconds'] * 1000:.1f} ms"
+        )
+    for name, count in result["items"].items():
+        print(f"  {name:>13}: {count:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""Price-drop alerts for per-user price thresholds"""
+
+from bisect import bisect_left, insort
+from itertools import count
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.services.catalog import CatalogStore
+from app.services.prices import PriceHistory, format_price
+
+URGENCY_ORDER = {"high": 0, "medium": 1, "low": 2}
+
+
+class PriceAlertEngine:
+    """Matches price changes against user thresholds.
+
+    Thresholds are kept per product as a sorted list of ``(threshold,
+    user_id)``, so a price move from ``old`` to ``new`` touches only the
+    thresholds between the two prices: a drop raises alerts for thresholds
+    in ``[new, old)``, a rise withdraws them for thresholds in ``[old, new)``.
+
+    Raised alerts are queued as compact tuples and delivered to per-user
+    inboxes in batches, on ``flush`` or on the next read; the alert payload is
+    only rendered when a user reads it.
+    """
+
+    def __init__(
+        self,
+        prices: PriceHistory,
+        products: CatalogStore,
+        rules: Iterable[Dict[str, Any]] = (),
+    ):
+        self.prices = prices
+        self.products = products
+        self._thresholds: Dict[str, List[Tuple[float, str]]] = {}
+        self._rules: Dict[str, Dict[str, float]] = {}
+        # (user_id, product_id, price, threshold); price None withdraws an alert
+        self._batch: List[Tuple[str, str, Optional[float], float]] = []
+        self._inboxes: Dict[str, Dict[str, Tuple[int, float, float]]] = {}
+        self._sequence = count(1)
+        prices.subscribe(self.on_price)
+        for rule in rules:
+            self.set_threshold(rule["user_id"], rule["product_id"], rule["threshold"])
+
+    def set_threshold(self, user_id: str, product_id: str, threshold: float) -> None:
+        self.remove_threshold(user_id, product_id)
+        insort(self._thresholds.setdefault(product_id, []), (threshold, user_id))
+        self._rules.setdefault(user_id, {})[product_id] = threshold
+        current = self.prices.latest(product_id)
+        if current is not None and current <= threshold:
+            self._batch.append((user_id, product_id, current, threshold))
+
+    def remove_threshold(self, user_id: str, product_id: str) -> bool:
+        rules = self._rules.get(user_id, {})
+        threshold = rules.pop(product_id, None)
+        if threshold is None:
+            return False
+        if not rules:
+            del self._rules[user_id]
+        entries = self._thresholds[product_id]
+        del entries[bisect_left(entries, (threshold, user_id))]
+        if not entries:
+            del self._thresholds[product_id]
+        self._batch.append((user_id, product_id, None, threshold))
+        return True
+
+    def sync_user(self, user_id: str, rules: Dict[str, float]) -> None:
+        """Make a user's thresholds match ``rules``, e.g. as stored in the database"""
+        current = self._rules.get(user_id, {})
+        for product_id in [p for p in current if p not in rules]:
+            self.remove_threshold(user_id, product_id)
+        for product_id, threshold in rules.items():
+            if current.get(product_id) != threshold:
+                self.set_threshold(user_id, product_id, threshold)
+
+    def load_rules(self, rules: Iterable[Dict[str, Any]]) -> None:
+        """Replace every user's thresholds with ``rules``"""
+        by_user: Dict[str, Dict[str, float]] = {}
+        for rule in rules:
+            by_user.setdefault(rule["user_id"], {})[rule["product_id"]] = rule["threshold"]
+        for user_id in set(self._rules) | set(by_user):
+            self.sync_user(user_id, by_user.get(user_id, {}))
+
+    def thresholds_for(self, user_id: str) -> Dict[str, float]:
+        return dict(self._rules.get(user_id, {}))
+
+    def watched_prices(self) -> Dict[str, Optional[float]]:
+        """Latest price of every product with thresholds, for ``recheck``"""
+        return {product_id: self.prices.latest(product_id) for product_id in self._thresholds}
+
+    def recheck(self, before: Dict[str, Optional[float]]) -> None:
+        """Raise or withdraw alerts after a silent bulk reload of the price history.
+
+        ``before`` is ``watched_prices()`` from just before the reload; each
+        product whose latest price moved is handled like a price update.
+        """
+        for product_id, old in before.items():
+            new = self.prices.latest(product_id)
+            if new == old or product_id not in self._thresholds:
+                continue
+            if new is not None:
+                self.on_price(product_id, old, new)
+            else:
+                # No price any more: nothing is below a threshold
+                self._batch.extend(
+                    (user_id, product_id, None, threshold) for threshold, user_id in self._thresholds[product_id]
+                )
+
+    def on_price(self, product_id: str, old: Optional[float], new: float) -> None:
+        entries = self._thresholds.get(product_id)
+        if not entries:
+            return
+        if old is None or new < old:
+            # Thresholds at or above the new price that the old price was above
+            lo = bisect_left(entries, (new,))
+            hi = len(entries) if old is None else bisect_left(entries, (old,))
+            self._batch.extend(
+                (user_id, product_id, new, threshold) for threshold, user_id in entries[lo:hi]
+            )
+        else:
+            # The price rose back above these thresholds
+            lo, hi = bisect_left(entries, (old,)), bisect_left(entries, (new,))
+            self._batch.extend(
+                (user_id, product_id, None, threshold) for threshold, user_id in entries[lo:hi]
+            )
+
+    def flush(self) -> int:
+        """Deliver queued alerts; the latest alert per (user, product) wins"""
+        batch, self._batch = self._batch, []
+        inboxes = self._inboxes
+        for user_id, product_id, price, threshold in batch:
+            if price is None:
+                inbox = inboxes.get(user_id)
+                if inbox is not None:
+                    inbox.pop(product_id, None)
+            else:
+                inboxes.setdefault(user_id, {})[product_id] = (next(self._sequence), price, threshold)
+        return len(batch)
+
+    def alerts_for(self, user_id: str) -> List[Dict[str, Any]]:
+        if self._batch:
+            self.flush()
+        return [
+            self._alert(product_id, *entry)
+            for product_id, entry in self._inboxes.get(user_id, {}).items()
+        ]
+
+    def clear(self) -> None:
+        self._thresholds.clear()
+        self._rules.clear()
+        self._batch.clear()
+        self._inboxes.clear()
+
+    def _alert(self, product_id: str, sequence: int, price: float, threshold: float) -> Dict[str, Any]:
+        product = self.products.get(product_id) or {}
+        latest = self.prices.latest(product_id)
+        if latest is not None and latest <= threshold:
+            price = latest
+        return {
+            "id": f"alert-price-{sequence}",
+            "type": "price_drop",
+            "product_id": product_id,
+            "message": f"{product.get('name', product_id)}降价提醒",
+            "detail": f"当前价格 ¥{format_price(price)}，低于您设定的 ¥{format_price(threshold)} 提醒价",
+            "urgency": "medium",
+            "suggested_action": "查看详情",
+        }
@@ -0,0 +1,259 @@
+"""AR makeup previews rendered onto an uploaded face image"""
+
+import asyncio
+import base64
+import binascii
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi import HTTPException
+
+from app.services.catalog import CatalogStore
+from app.services.imaging import (
+    analysis_frame,
+    decode_image,
+    decode_raw,
+    encode_image,
+    require_pillow,
+)
+from app.services.skin_engine import scan_engine
+
+# Where the face sits in a mirror selfie, as (centre x, centre y, radius x,
+# radius y) in frame fractions; overlay regions are placed relative to it
+FACE = (0.5, 0.5, 0.3, 0.4)
+
+# Share of each region's radius over which its edge fades out
+FEATHER = 0.6
+
+
+def _pair(cx: float, cy: float, rx: float, ry: float) -> Tuple[Tuple[float, ...], ...]:
+    return ((-cx, cy, rx, ry), (cx, cy, rx, ry))
+
+
+# overlay type -> (RGB, opacity, blend mode, regions as ellipses in face units
+# where the face ellipse spans -1..1 on both axes)
+OVERLAYS: Dict[str, Tuple[Tuple[int, int, int], float, str, Tuple[Tuple[float, ...], ...]]] = {
+    "full_face": ((226, 190, 160), 0.18, "normal", ((0.0, 0.0, 0.95, 0.95),)),
+    "contour": ((150, 105, 80), 0.3, "multiply", _pair(0.8, 0.2, 0.16, 0.4)),
+    "blush": ((232, 120, 125), 0.32, "normal", _pair(0.5, 0.22, 0.22, 0.14)),
+    "eyebrow": ((90, 62, 45), 0.45, "multiply", _pair(0.38, -0.4, 0.24, 0.05)),
+    "eyeshadow": ((150, 96, 80), 0.45, "multiply", _pair(0.38, -0.22, 0.22, 0.08)),
+    "lips": ((178, 46, 60), 0.6, "multiply", ((0.0, 0.55, 0.3, 0.1),)),
+}
+# Styles without tutorial steps get a base, cheeks and lips
+DEFAULT_OVERLAYS = ("full_face", "blush", "lips")
+
+# (overlay type, intensity) in painting order
+Layers = Tuple[Tuple[str, float], ...]
+
+
+def style_layers(style: Dict[str, Any], tutorials: List[Dict[str, Any]]) -> Layers:
+    """Overlays a style's tutorials apply, with intensity rising with difficulty"""
+    types = {
+        step.get("ar_overlay_type"): None
+        for tutorial in tutorials
+        for step in tutorial.get("steps", ())
+        if step.get("ar_overlay_type") in OVERLAYS
+    }
+    intensity = 0.7 + 0.1 * min(max(style.get("difficulty") or 3, 1), 5)
+    # Paint in table order so bases go under colour whatever the step order
+    return tuple((name, intensity) for name in OVERLAYS if name in (types or DEFAULT_OVERLAYS))
+
+
+def render_overlays(frame: np.ndarray, layers: Layers) -> np.ndarray:
+    """Blend overlay regions onto an RGB frame.
+
+    Each region is a feathered ellipse; only its bounding box is touched, with
+    the alpha mask computed for the whole box at once.
+    """
+    out = frame.astype(np.float32)
+    height, width = out.shape[:2]
+    face_x, face_y, face_rx, face_ry = FACE
+    for name, intensity in layers:
+        color, opacity, mode, regions = OVERLAYS[name]
+        tint = np.array(color, dtype=np.float32)
+        for cx, cy, rx, ry in regions:
+            px, py = (face_x + cx * face_rx) * width, (face_y + cy * face_ry) * height
+            prx, pry = rx * face_rx * width, ry * face_ry * height
+            x0, x1 = max(int(px - prx), 0), min(int(px + prx) + 1, width)
+            y0, y1 = max(int(py - pry), 0), min(int(py + pry) + 1, height)
+            if x0 >= x1 or y0 >= y1:
+                continue
+            ys, xs = np.ogrid[y0:y1, x0:x1]
+            distance = ((xs + 0.5 - px) / prx) ** 2 + ((ys + 0.5 - py) / pry) ** 2
+            alpha = np.clip((1 - distance) / FEATHER, 0, 1).astype(np.float32)
+            alpha *= min(opacity * intensity, 1.0)
+            patch = out[y0:y1, x0:x1]
+            target = patch * (tint / 255) if mode == "multiply" else tint
+            patch += (target - patch) * alpha[..., None]
+    return np.rint(out, out=out).clip(0, 255).astype(np.uint8)
+
+
+def render_preview(
+    data: bytes,
+    size: Optional[Tuple[int, int]],
+    pixel_format: str,
+    resolution: int,
+    layers: Layers,
+) -> Tuple[bytes, str, int, int]:
+    """Worker entry point: decode, render and compress one preview.
+
+    Returns the image bytes, media type, width and height.
+    """
+    if size is None:
+        frame = decode_image(data, resolution)
+    else:
+        frame = analysis_frame(decode_raw(memoryview(data), size[0], size[1], pixel_format), resolution)
+    image = render_overlays(frame, layers)
+    encoded, media_type = encode_image(image)
+    return encoded, media_type, image.shape[1], image.shape[0]
+
+
+class PreviewCache:
+    """LRU of rendered previews bounded by total bytes"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple, Tuple[Dict[str, Any], int]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: Tuple, entry: Dict[str, Any], size: int) -> None:
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.nbytes -= old[1]
+        self._entries[key] = (entry, size)
+        self.nbytes += size
+        while self.nbytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.nbytes -= evicted
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.nbytes = 0
+
+
+class ARPreviewRenderer:
+    """Renders style previews in the scan worker pool, cached by content.
+
+    The cache key is the style, a hash of the uploaded image as sent (so a
+    hit skips base64 decoding too), the resolution and the style's overlay
+    layers, which keeps entries correct when a style's tutorials change.
+    Concurrent requests for the same key share one render.
+    """
+
+    def __init__(self, styles: CatalogStore, tutorials: CatalogStore, max_bytes: int, max_resolution: int):
+        self.styles = styles
+        self.tutorials = tutorials
+        self.max_resolution = max_resolution
+        self.cache = PreviewCache(max_bytes)
+        self.shared = 0
+        self._rendering: Dict[Tuple, asyncio.Future] = {}
+
+    def layers(self, style_id: str) -> Layers:
+        style = self.styles.get(style_id)
+        if style is None:
+            raise HTTPException(status_code=404, detail="Style not found")
+        return style_layers(style, self.tutorials.filter(style_id=style_id))
+
+    async def preview(
+        self,
+        style_id: str,
+        image: str,
+        resolution: int,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        pixel_format: str = "rgb",
+    ) -> Dict[str, Any]:
+        """Rendered preview of ``style_id`` on a base64 image, plus whether it was cached"""
+        layers = self.layers(style_id)
+        resolution = min(max(resolution, 64), self.max_resolution)
+        encoded = image.split(",", 1)[-1].encode("ascii", "replace")  # tolerate data: URLs
+        size = None
+        if width is not None or height is not None:
+            if width is None or height is None:
+                raise HTTPException(status_code=400, detail="Raw frames need both width and height")
+            size = (width, height)
+        digest = hashlib.blake2b(encoded, digest_size=16)
+        digest.update(f"{size}:{pixel_format}".encode())
+        key = (style_id, digest.hexdigest(), resolution, layers)
+
+        entry = self.cache.get(key)
+        if entry is not None:
+            return {**entry, "cached": True}
+        pending = self._rendering.get(key)
+        if pending is not None:
+            self.shared += 1
+            return {**await asyncio.shield(pending), "cached": True}
+
+        future = self._rendering[key] = asyncio.get_running_loop().create_future()
+        try:
+            entry = await self._render(encoded, size, pixel_format, resolution, layers)
+        except Exception as exc:
+            future.set_exception(exc)
+            # Waiters re-raise it; don't warn when nobody was waiting
+            future.exception()
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            del self._rendering[key]
+        future.set_result(entry)
+        self.cache.put(key, entry, len(entry["preview_image"]))
+        return {**entry, "cached": False}
+
+    async def _render(
+        self,
+        encoded: bytes,
+        size: Optional[Tuple[int, int]],
+        pixel_format: str,
+        resolution: int,
+        layers: Layers,
+    ) -> Dict[str, Any]:
+        try:
+            data = base64.b64decode(encoded)
+        except binascii.Error:
+            raise HTTPException(status_code=400, detail="Invalid base64 image")
+        if size is None:
+            require_pillow()
+        if size is not None:
+            decode_raw(memoryview(data), size[0], size[1], pixel_format)  # validate before shipping
+        try:
+            image, media_type, width, height = await scan_engine.run(
+                render_preview, data, size, pixel_format, resolution, layers
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        return {
+            "preview_image": f"data:{media_type};base64,{base64.b64encode(image).decode('ascii')}",
+            "resolution": [width, height],
+            "overlays": [name for name, _ in layers],
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self.cache),
+            "bytes": self.cache.nbytes,
+            "max_bytes": self.cache.max_bytes,
+            "hits": self.cache.hits,
+            "misses": self.cache.misses,
+            "shared_renders": self.shared,
+        }
@@ -0,0 +1,548 @@
+"""Indexed in-memory catalog store"""
+
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+# listener(item_id, old_item, new_item); old is None on insert, new is None on
+# removal, and all three are None when the store is cleared
+ChangeListener = Callable[[Any, Optional[Dict[str, Any]], Optional[Dict[str, Any]]], None]
+
+
+class SortedIndex:
+    """Ids kept ordered by ``(*fields, id)`` for keyset pagination.
+
+    Keys are stored ascending in a plain list maintained with bisect;
+    descending reads walk it from the end, so one list serves both orders.
+    An optional ``where`` predicate makes it a partial index that only holds
+    matching items.
+    """
+
+    def __init__(
+        self,
+        fields: Sequence[str],
+        where: Optional[Callable[[Dict[str, Any]], Any]] = None,
+    ):
+        self.fields = tuple(fields)
+        self.where = where
+        self._keys: List[Tuple[Any, ...]] = []
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def key_for(self, item_id: Any, item: Dict[str, Any]) -> Tuple[Any, ...]:
+        return tuple(item.get(field, 0) for field in self.fields) + (item_id,)
+
+    def insert(self, item_id: Any, item: Dict[str, Any]) -> None:
+        if self.where is None or self.where(item):
+            insort(self._keys, self.key_for(item_id, item))
+
+    def discard(self, item_id: Any, item: Dict[str, Any]) -> None:
+        if self.where is not None and not self.where(item):
+            return
+        key = self.key_for(item_id, item)
+        pos = bisect_left(self._keys, key)
+        if pos < len(self._keys) and self._keys[pos] == key:
+            del self._keys[pos]
+
+    def clear(self) -> None:
+        self._keys = []
+
+    def restricted(self, bucket: Any) -> "SortedIndex":
+        """This order limited to the ids in a secondary-index bucket"""
+        view = SortedIndex(self.fields, self.where)
+        if isinstance(self._keys, SegmentKeys) and isinstance(bucket, SegmentBucket):
+            view._keys = self._keys.restricted(bucket)
+        else:
+            # The keys hold the sort fields, so no item needs reading
+            view._keys = [key for key in self._keys if key[-1] in bucket]
+        return view
+
+    def iter_keys(
+        self,
+        after: Optional[Sequence[Any]] = None,
+        reverse: bool = False,
+    ) -> Iterator[Tuple[Any, ...]]:
+        """Keys in sort order, starting strictly after the ``after`` key"""
+        keys = self._keys
+        if not reverse:
+            start = bisect_right(keys, tuple(after)) if after is not None else 0
+            for i in range(start, len(keys)):
+                yield keys[i]
+        else:
+            start = bisect_left(keys, tuple(after)) if after is not None else len(keys)
+            for i in range(start - 1, -1, -1):
+                yield keys[i]
+
+
+class SegmentItems(Mapping):
+    """Read-only ``{id: item}`` over positional records"""
+
+    def __init__(self, records: Any):
+        self.records = records
+        self.table = records.keys
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.table)
+
+    def __contains__(self, item_id: Any) -> bool:
+        return self.table.position(item_id) is not None
+
+    def __getitem__(self, item_id: Any) -> Dict[str, Any]:
+        position = self.table.position(item_id)
+        if position is None:
+            raise KeyError(item_id)
+        return self.records[position]
+
+    def get(self, item_id: Any, default: Any = None) -> Any:
+        position = self.table.position(item_id)
+        return default if position is None else self.records[position]
+
+    def values(self) -> Iterator[Dict[str, Any]]:
+        records = self.records
+        return (records[position] for position in range(len(records)))
+
+
+class SegmentBucket:
+    """A secondary-index bucket held as ascending item positions"""
+
+    __slots__ = ("positions", "table")
+
+    def __init__(self, positions: np.ndarray, table: Any):
+        self.positions = positions
+        self.table = table
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __iter__(self) -> Iterator[Any]:
+        table = self.table
+        return (table[position] for position in self.positions.tolist())
+
+    def __contains__(self, item_id: Any) -> bool:
+        position = self.table.position(item_id)
+        if position is None:
+            return False
+        i = int(np.searchsorted(self.positions, position))
+        return i < len(self.positions) and self.positions[i] == position
+
+
+class SegmentKeys(Sequence):
+    """Sorted-index keys held as item positions in key order plus key columns.
+
+    A key tuple is only built when it is read, so ``bisect`` and paging
+    touch O(log n + page) keys and never decode items. ``selection``
+    restricts the order to some of its entries, for per-bucket views.
+    """
+
+    def __init__(
+        self,
+        positions: np.ndarray,
+        columns: List[np.ndarray],
+        table: Any,
+        selection: Optional[np.ndarray] = None,
+    ):
+        self.positions = positions
+        self.columns = columns
+        self.table = table
+        self.selection = selection
+
+    def __len__(self) -> int:
+        return len(self.positions if self.selection is None else self.selection)
+
+    def __getitem__(self, i: int) -> Tuple[Any, ...]:
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        if self.selection is not None:
+            i = int(self.selection[i])
+        key = tuple(column[i].item() for column in self.columns)
+        return key + (self.table[int(self.positions[i])],)
+
+    def restricted(self, bucket: SegmentBucket) -> "SegmentKeys":
+        selection = np.flatnonzero(np.isin(self.positions, bucket.positions, assume_unique=True))
+        return SegmentKeys(self.positions, self.columns, self.table, selection.astype(np.int32))
+
+
+class CatalogSegment:
+    """Read-only store contents addressed by position, e.g. mapped from a snapshot.
+
+    ``records[pos]`` decodes an item and ``records.keys`` is the id table,
+    with ``position(id)`` lookups. Each secondary-index bucket is a run of
+    ascending positions in ``buckets`` located by ``runs[field][value] =
+    (start, end)``; each sorted index is the item positions in key order
+    plus one column per sort field. ``CatalogStore.export_segment`` produces
+    these arrays and ``CatalogStore.restore`` serves a store from them.
+    """
+
+    def __init__(
+        self,
+        records: Any,
+        runs: Dict[str, Dict[Any, Tuple[int, int]]],
+        buckets: np.ndarray,
+        orders: Dict[str, Tuple[np.ndarray, List[np.ndarray]]],
+    ):
+        table = records.keys
+        self.items = SegmentItems(records)
+        self.indexes = {
+            field: {value: SegmentBucket(buckets[start:end], table) for value, (start, end) in values.items()}
+            for field, values in runs.items()
+        }
+        self.orders = {name: SegmentKeys(positions, columns, table) for name, (positions, columns) in orders.items()}
+
+
+def _column(values: List[Any], field: str) -> np.ndarray:
+    if all(type(value) is int for value in values):
+        return np.array(values, dtype=np.int64)
+    if all(type(value) in (int, float) for value in values):
+        return np.array(values, dtype=np.float64)
+    raise ValueError(f"Sort field '{field}' must be numeric to be stored in a segment")
+
+
+class CatalogStore:
+    """Keeps items in a primary id index plus secondary value indexes.
+
+    Secondary indexes map ``field -> value -> {item_id: None}``; list-valued
+    fields (e.g. ``skin_concerns``) are indexed once per element. Buckets are
+    dicts so they keep insertion order and support O(1) removal, which lets
+    ``add``/``remove`` maintain every index incrementally.
+
+    Sorted indexes keep the whole store in a sort order; per-bucket views
+    (one sort order restricted to one secondary-index value, such as
+    ``category="makeup"`` by price) are created on first use and then
+    maintained incrementally, so paged reads cost O(page) instead of a sort.
+
+    Derived structures (search index, caches, ...) register with ``subscribe``
+    and are notified after every change.
+    """
+
+    def __init__(
+        self,
+        items: Iterable[Dict[str, Any]] = (),
+        index_fields: Sequence[str] = (),
+        key: str = "id",
+    ):
+        self.key = key
+        self.index_fields = tuple(index_fields)
+        self.version = 0
+        self._items: Dict[Any, Dict[str, Any]] = {}
+        self._indexes: Dict[str, Dict[Any, Dict[Any, None]]] = {
+            field: {} for field in self.index_fields
+        }
+        self._sorted: Dict[str, SortedIndex] = {}
+        # (field, value) -> {sort name: view over that bucket}
+        self._bucket_views: Dict[Tuple[str, Any], Dict[str, SortedIndex]] = {}
+        self._revisions: Dict[Any, int] = {}
+        self._base_revision = 0
+        # Served from a read-only CatalogSegment until the first write
+        self._frozen = False
+        self._listeners: List[ChangeListener] = []
+        for item in items:
+            self.add(item)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self._items.values())
+
+    def __contains__(self, item_id: Any) -> bool:
+        return item_id in self._items
+
+    def subscribe(self, listener: ChangeListener) -> None:
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: ChangeListener) -> None:
+        self._listeners.remove(listener)
+
+    def _notify(self, item_id: Any, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> None:
+        for listener in self._listeners:
+            listener(item_id, old, new)
+
+    @staticmethod
+    def _values(item: Dict[str, Any], field: str) -> List[Any]:
+        value = item.get(field)
+        if value is None:
+            return []
+        if isinstance(value, (list, tuple, set)):
+            return list(value)
+        return [value]
+
+    def _index(self, item_id: Any, item: Dict[str, Any]) -> None:
+        for field in self.index_fields:
+            index = self._indexes[field]
+            for value in self._values(item, field):
+                index.setdefault(value, {})[item_id] = None
+
+    def _unindex(self, item_id: Any, item: Dict[str, Any]) -> None:
+        for field in self.index_fields:
+            index = self._indexes[field]
+            for value in self._values(item, field):
+                bucket = index.get(value)
+                if bucket is None:
+                    continue
+                bucket.pop(item_id, None)
+                if not bucket:
+                    del index[value]
+
+    def _insert_sorted(self, item_id: Any, item: Dict[str, Any]) -> None:
+        for index in self._sorted.values():
+            index.insert(item_id, item)
+        if self._bucket_views:
+            for field in self.index_fields:
+                for value in self._values(item, field):
+                    for view in self._bucket_views.get((field, value), {}).values():
+                        view.insert(item_id, item)
+
+    def _discard_sorted(self, item_id: Any, item: Dict[str, Any]) -> None:
+        for index in self._sorted.values():
+            index.discard(item_id, item)
+        if self._bucket_views:
+            for field in self.index_fields:
+                for value in self._values(item, field):
+                    for view in self._bucket_views.get((field, value), {}).values():
+                        view.discard(item_id, item)
+
+    def add(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert or replace an item, updating only the indexes it touches"""
+        if self._frozen:
+            self._thaw()
+        item_id = item[self.key]
+        previous = self._items.get(item_id)
+        if previous is not None:
+            self._unindex(item_id, previous)
+            self._discard_sorted(item_id, previous)
+        self._items[item_id] = item
+        self._index(item_id, item)
+        self._insert_sorted(item_id, item)
+        self.version += 1
+        self._revisions[item_id] = self.version
+        self._notify(item_id, previous, item)
+        return item
+
+    def add_many(self, items: Iterable[Dict[str, Any]]) -> None:
+        for item in items:
+            self.add(item)
+
+    def update(self, item_id: Any, **changes: Any) -> Optional[Dict[str, Any]]:
+        """Apply field changes to an existing item"""
+        current = self._items.get(item_id)
+        if current is None:
+            return None
+        return self.add({**current, **changes})
+
+    def remove(self, item_id: Any) -> Optional[Dict[str, Any]]:
+        if self._frozen:
+            self._thaw()
+        item = self._items.pop(item_id, None)
+        if item is not None:
+            self._unindex(item_id, item)
+            self._discard_sorted(item_id, item)
+            self.version += 1
+            self._revisions[item_id] = self.version
+            self._notify(item_id, item, None)
+        return item
+
+    def _reset(self) -> None:
+        self._items = {}
+        self._indexes = {field: {} for field in self.index_fields}
+        self._sorted = {name: SortedIndex(index.fields, index.where) for name, index in self._sorted.items()}
+        self._bucket_views = {}
+        self._frozen = False
+
+    def clear(self) -> None:
+        self._reset()
+        self._revisions.clear()
+        self._base_revision = 0
+        self.version += 1
+        self._notify(None, None, None)
+
+    def export_segment(
+        self,
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[Any, Tuple[int, int]]], np.ndarray, Dict[str, Tuple[np.ndarray, List[np.ndarray]]]]:
+        """Items in store order plus the positional index arrays of a ``CatalogSegment``"""
+        ids = list(self._items)
+        items = [self._items[item_id] for item_id in ids]
+        position = {item_id: i for i, item_id in enumerate(ids)}
+        runs: Dict[str, Dict[Any, Tuple[int, int]]] = {}
+        chunks = []
+        start = 0
+        for field in self.index_fields:
+            runs[field] = {}
+            for value, bucket in self._indexes[field].items():
+                chunks.append(np.sort(np.fromiter((position[i] for i in bucket), dtype=np.int32, count=len(bucket))))
+                runs[field][value] = (start, start + len(bucket))
+                start += len(bucket)
+        buckets = np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int32)
+        orders = {}
+        for name, index in self._sorted.items():
+            keys = list(index._keys)
+            positions = np.fromiter((position[key[-1]] for key in keys), dtype=np.int32, count=len(keys))
+            orders[name] = (positions, [_column([key[i] for key in keys], field) for i, field in enumerate(index.fields)])
+        return items, runs, buckets, orders
+
+    def matches(self, segment: CatalogSegment) -> bool:
+        """Whether a segment has exactly this store's secondary and sorted indexes"""
+        return set(segment.indexes) == set(self.index_fields) and set(segment.orders) == set(self._sorted)
+
+    def restore(self, segment: CatalogSegment) -> None:
+        """Serve the store from a read-only segment, e.g. mapped from a snapshot.
+
+        Nothing is indexed or decoded up front: lookups, filters and pages
+        read the segment's arrays and items are decoded as they are returned.
+        The first write copies everything into regular indexes. Listeners
+        get the ``clear`` notification and are expected to restore themselves.
+        """
+        if not self.matches(segment):
+            raise ValueError("Segment does not match this store's indexes")
+        self.clear()
+        self._items = segment.items
+        self._indexes = {field: segment.indexes[field] for field in self.index_fields}
+        for name, index in self._sorted.items():
+            index._keys = segment.orders[name]
+        self._frozen = True
+        self._base_revision = self.version
+
+    def _thaw(self) -> None:
+        """Copy segment contents into regular indexes so they can change"""
+        items = list(self._items.items())
+        self._reset()
+        for item_id, item in items:
+            self._items[item_id] = item
+            self._index(item_id, item)
+        for index in self._sorted.values():
+            index._keys = sorted(
+                index.key_for(item_id, item)
+                for item_id, item in items
+                if index.where is None or index.where(item)
+            )
+
+    def revision(self, item_id: Any) -> int:
+        """Store version at which an item last changed (0 if never seen).
+
+        Items untouched since a ``restore`` report the version of the restore.
+        """
+        return self._revisions.get(item_id, self._base_revision)
+
+    def get(self, item_id: Any) -> Optional[Dict[str, Any]]:
+        return self._items.get(item_id)
+
+    def get_many(self, item_ids: Iterable[Any]) -> List[Dict[str, Any]]:
+        """Look up several ids at once, skipping unknown ones"""
+        items = self._items
+        return [items[i] for i in item_ids if i in items]
+
+    def get_map(self, item_ids: Iterable[Any]) -> Dict[Any, Dict[str, Any]]:
+        """Bulk lookup returning ``{id: item}`` for the known ids"""
+        items = self._items
+        return {i: items[i] for i in item_ids if i in items}
+
+    def all(self) -> List[Dict[str, Any]]:
+        return list(self._items.values())
+
+    def values(self, field: str) -> List[Any]:
+        """Distinct values present in a secondary index"""
+        return list(self._indexes[field].keys())
+
+    def ids(self, **filters: Any) -> List[Any]:
+        """Ids matching every ``field=value`` filter (``None`` means no filter)"""
+        active = [(f, v) for f, v in filters.items() if v is not None]
+        if not active:
+            return list(self._items.keys())
+
+        buckets = []
+        for field, value in active:
+            if field not in self._indexes:
+                raise KeyError(f"Field '{field}' is not indexed")
+            bucket = self._indexes[field].get(value)
+            if not bucket:
+                return []
+            buckets.append(bucket)
+
+        # Walk the smallest bucket and probe the others
+        buckets.sort(key=len)
+        smallest, rest = buckets[0], buckets[1:]
+        return [i for i in smallest if all(i in b for b in rest)]
+
+    def filter(self, **filters: Any) -> List[Dict[str, Any]]:
+        """Items matching every ``field=value`` filter"""
+        items = self._items
+        return [items[i] for i in self.ids(**filters)]
+
+    def count(self, **filters: Any) -> int:
+        active = [(f, v) for f, v in filters.items() if v is not None]
+        if not active:
+            return len(self._items)
+        if len(active) == 1:
+            field, value = active[0]
+            return len(self._indexes[field].get(value, ()))
+        return len(self.ids(**filters))
+
+    def add_sorted_index(
+        self,
+        name: str,
+        fields: Sequence[str],
+        where: Optional[Callable[[Dict[str, Any]], Any]] = None,
+    ) -> SortedIndex:
+        """Maintain items ordered by ``fields`` (ties broken by id)"""
+        if self._frozen:
+            self._thaw()
+        index = SortedIndex(fields, where)
+        for item_id, item in self._items.items():
+            index.insert(item_id, item)
+        self._sorted[name] = index
+        return index
+
+    def sorted_view(self, sort: str, field: str, value: Any) -> SortedIndex:
+        """The ``sort`` order restricted to one secondary-index bucket"""
+        views = self._bucket_views.setdefault((field, value), {})
+        view = views.get(sort)
+        if view is None:
+            view = views[sort] = self._sorted[sort].restricted(self._indexes[field].get(value, {}))
+        return view
+
+    def page(
+        self,
+        sort: str,
+        limit: int,
+        after: Optional[Sequence[Any]] = None,
+        reverse: bool = False,
+        **filters: Any,
+    ) -> Tuple[List[Dict[str, Any]], Optional[Tuple[Any, ...]]]:
+        """One page of filtered items in ``sort`` order (descending if ``reverse``).
+
+        Returns the items and the sort key of the last one when more items
+        follow (``None`` on the final page).
+        """
+        active = [(f, v) for f, v in filters.items() if v is not None]
+        buckets = []
+        for field, value in active:
+            bucket = self._indexes[field].get(value)
+            if not bucket:
+                return [], None
+            buckets.append((len(bucket), field, value, bucket))
+
+        if buckets:
+            # Walk the view of the most selective filter and probe the others
+            buckets.sort(key=lambda b: b[0])
+            _, field, value, _ = buckets[0]
+            index = self.sorted_view(sort, field, value)
+            buckets = [b[3] for b in buckets[1:]]
+        else:
+            index = self._sorted[sort]
+
+        items = self._items
+        page: List[Dict[str, Any]] = []
+        last_key = None
+        for key in index.iter_keys(after, reverse):
+            item_id = key[-1]
+            if buckets and not all(item_id in b for b in buckets):
+                continue
+            if len(page) == limit:
+                return page, last_key
+            page.append(items[item_id])
+            last_key = key
+        return page, None
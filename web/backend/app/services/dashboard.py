@@ -0,0 +1,170 @@
+"""Dashboard summary assembled from concurrently loaded sections"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.config import settings
+from app.db import database
+from app.db.repositories import (
+    AnalysisRepository,
+    InventoryRepository,
+    TutorialProgressRepository,
+    UserRepository,
+)
+from app.mock.data import ACTIVITY_STORE, MOCK_CALENDAR_EVENTS
+
+# Section states reported with each response
+FRESH = "fresh"  # loaded for this request
+CACHED = "cached"  # within its TTL
+STALE = "stale"  # load failed or timed out; last good value served
+UNAVAILABLE = "unavailable"  # load failed or timed out with nothing cached
+
+SectionLoader = Callable[[str], Awaitable[Any]]
+
+
+class Section:
+    """One dashboard section: a loader plus a per-user TTL cache of its results.
+
+    Entries outlive their TTL as the section's last good value. Loads run
+    as tasks shielded from the request's timeout, so a slow load that
+    finishes late still refreshes the cache for the next request; a user
+    has at most one load in flight per section.
+    """
+
+    def __init__(self, name: str, loader: SectionLoader, ttl: float, max_users: int = 10000):
+        self.name = name
+        self.loader = loader
+        self.ttl = ttl
+        self.max_users = max_users
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._loading: Dict[str, Tuple[asyncio.Task, object]] = {}
+
+    async def get(self, user_id: str, timeout: float) -> Tuple[Any, str]:
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            self._entries.move_to_end(user_id)
+            if time.monotonic() < entry[1]:
+                return entry[0], CACHED
+
+        loading = self._loading.get(user_id)
+        # A load invalidated mid-flight may predate the write; start another
+        task = loading[0] if loading is not None and loading[1] is not None else self._start(user_id)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout), FRESH
+        except Exception as exc:
+            if not isinstance(exc, asyncio.TimeoutError):
+                print(f"Dashboard section {self.name} failed: {exc!r}")
+            if entry is not None:
+                return entry[0], STALE
+            return None, UNAVAILABLE
+
+    def _start(self, user_id: str) -> asyncio.Task:
+        token = object()
+        task = asyncio.create_task(self.loader(user_id))
+        self._loading[user_id] = (task, token)
+        task.add_done_callback(lambda done: self._finish(user_id, token, done))
+        return task
+
+    def _finish(self, user_id: str, token: object, task: asyncio.Task) -> None:
+        loading = self._loading.get(user_id)
+        if loading is not None and loading[0] is task:
+            del self._loading[user_id]
+        # Retrieving the exception also keeps asyncio from warning about it
+        if loading is None or loading[1] is not token or task.cancelled() or task.exception() is not None:
+            return
+        self._entries[user_id] = (task.result(), time.monotonic() + self.ttl)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_users:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        """Expire a user's entry, keeping it as the fallback value"""
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            self._entries[user_id] = (entry[0], 0.0)
+        loading = self._loading.get(user_id)
+        if loading is not None:
+            self._loading[user_id] = (loading[0], None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class DashboardAggregator:
+    """Loads every section concurrently, each under the same timeout.
+
+    A response therefore waits at most ``timeout`` for the slowest cache
+    miss instead of the sum of all loads. The per-section states say which
+    values are fresh, cached, or a stale fallback.
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.sections: Dict[str, Section] = {}
+
+    def section(self, name: str, ttl: float) -> Callable[[SectionLoader], SectionLoader]:
+        """Decorator registering ``loader(user_id)`` as a section"""
+
+        def register(loader: SectionLoader) -> SectionLoader:
+            self.sections[name] = Section(name, loader, ttl)
+            return loader
+
+        return register
+
+    async def load(self, user_id: str) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """Section values and states for a user"""
+        results = await asyncio.gather(
+            *(section.get(user_id, self.timeout) for section in self.sections.values())
+        )
+        values = {name: value for name, (value, _) in zip(self.sections, results)}
+        states = {name: state for name, (_, state) in zip(self.sections, results)}
+        return values, states
+
+    def invalidate(self, user_id: str, *names: str) -> None:
+        for name in names:
+            self.sections[name].invalidate(user_id)
+
+    def clear(self) -> None:
+        for section in self.sections.values():
+            section.clear()
+
+
+dashboard = DashboardAggregator(settings.DASHBOARD_TIMEOUT_SECONDS)
+
+
+@dashboard.section("user", ttl=60)
+async def _load_user(user_id: str) -> Optional[Dict[str, Any]]:
+    async with database.SessionLocal() as session:
+        user = await UserRepository(session).get(user_id)
+        return user.to_dict() if user else None
+
+
+@dashboard.section("skin_score", ttl=300)
+async def _load_skin_score(user_id: str) -> Optional[int]:
+    async with database.SessionLocal() as session:
+        latest = await AnalysisRepository(session).latest(user_id)
+        return latest.overall_score if latest else None
+
+
+@dashboard.section("tutorials_completed", ttl=300)
+async def _load_tutorials_completed(user_id: str) -> int:
+    async with database.SessionLocal() as session:
+        return await TutorialProgressRepository(session).completed_count(user_id)
+
+
+@dashboard.section("products_tracked", ttl=300)
+async def _load_products_tracked(user_id: str) -> int:
+    async with database.SessionLocal() as session:
+        return await InventoryRepository(session).count_by_user(user_id)
+
+
+@dashboard.section("recent_activity", ttl=30)
+async def _load_recent_activity(user_id: str) -> list:
+    return ACTIVITY_STORE.page("timestamp", 5, reverse=True)[0]
+
+
+@dashboard.section("upcoming_events", ttl=300)
+async def _load_upcoming_events(user_id: str) -> list:
+    return MOCK_CALENDAR_EVENTS[:3]
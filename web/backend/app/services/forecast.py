@@ -0,0 +1,120 @@
+"""Vectorized inventory depletion forecasting"""
+
+from datetime import date
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+STATUSES = ("good", "running_low", "critical")
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+# Status thresholds: remaining percent, or days left, at or below which an item escalates
+RUNNING_LOW_PERCENT, CRITICAL_PERCENT = 40, 15
+RUNNING_LOW_DAYS, CRITICAL_DAYS = 14, 7
+
+# Percent per day assumed when nothing better is known (a ~90 day product)
+DEFAULT_USAGE_RATE = 100 / 90
+
+# Weight of the newest observation in the smoothed usage rate
+USAGE_SMOOTHING = 0.5
+
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def epoch_day(day: date) -> int:
+    """Day number on the same scale as ``day_numbers``"""
+    return day.toordinal() - EPOCH_ORDINAL
+
+
+def day_numbers(values: Sequence[Optional[str]]) -> np.ndarray:
+    """ISO dates as day numbers (float, NaN for missing)"""
+    days = np.array(values, dtype="datetime64[D]")
+    out = days.astype(np.int64).astype(np.float64)
+    out[np.isnat(days)] = np.nan
+    return out
+
+
+def forecast(
+    remaining: np.ndarray,
+    usage_rate: np.ndarray,
+    prior_days_left: np.ndarray,
+    open_day: np.ndarray,
+    measured_day: np.ndarray,
+    as_of: float,
+) -> Dict[str, np.ndarray]:
+    """Usage rate, projected remaining percent, days left and status codes.
+
+    All inputs are float arrays with NaN for unknown values. The rate falls
+    back, per item, from the smoothed ``usage_rate`` to the one implied by a
+    prior days-left estimate, then to the average since opening, then to
+    ``DEFAULT_USAGE_RATE``. Remaining is projected from the last measurement
+    to ``as_of``.
+    """
+    remaining = remaining.astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = np.where(usage_rate > 0, usage_rate, np.nan)
+        implied = np.where(prior_days_left > 0, remaining / prior_days_left, np.nan)
+        rate = np.where(np.isnan(rate), implied, rate)
+
+        measured_or_now = np.where(np.isnan(measured_day), as_of, measured_day)
+        elapsed = measured_or_now - open_day
+        since_open = np.where(elapsed > 0, (100 - remaining) / elapsed, np.nan)
+        rate = np.where(np.isnan(rate), since_open, rate)
+        rate = np.where(np.isnan(rate) | (rate <= 0), DEFAULT_USAGE_RATE, rate)
+
+        since_measured = np.where(np.isnan(measured_day), 0.0, np.maximum(as_of - measured_day, 0.0))
+        projected = np.clip(remaining - rate * since_measured, 0.0, 100.0)
+        days_left = np.ceil(projected / rate)
+
+    status = np.select(
+        [
+            (projected <= CRITICAL_PERCENT) | (days_left <= CRITICAL_DAYS),
+            (projected <= RUNNING_LOW_PERCENT) | (days_left <= RUNNING_LOW_DAYS),
+        ],
+        [STATUS_CODES["critical"], STATUS_CODES["running_low"]],
+        STATUS_CODES["good"],
+    )
+    return {
+        "usage_rate": rate,
+        "remaining": projected,
+        "days_left": days_left.astype(np.int64),
+        "status": status.astype(np.int8),
+    }
+
+
+def observe_usage(
+    old_remaining: float,
+    new_remaining: float,
+    old_day: Optional[float],
+    new_day: float,
+    rate: Optional[float],
+) -> Optional[float]:
+    """Smoothed usage rate after a new remaining-percent reading.
+
+    Readings on the same day, or that go up (a refill or correction), keep
+    the current rate.
+    """
+    if old_day is None or new_day <= old_day or new_remaining >= old_remaining:
+        return rate
+    observed = (old_remaining - new_remaining) / (new_day - old_day)
+    if rate is None:
+        return observed
+    return USAGE_SMOOTHING * observed + (1 - USAGE_SMOOTHING) * rate
+
+
+def forecast_one(item, as_of: Optional[date] = None) -> Dict[str, object]:
+    """``forecast`` for a single InventoryItem-like object"""
+    result = forecast(
+        np.array([item.remaining_percent], dtype=np.float64),
+        np.array([item.usage_rate], dtype=np.float64),
+        np.array([item.estimated_days_left], dtype=np.float64),
+        day_numbers([item.open_date]),
+        day_numbers([item.measured_at]),
+        float(epoch_day(as_of or date.today())),
+    )
+    return {
+        "usage_rate": float(result["usage_rate"][0]),
+        "estimated_days_left": int(result["days_left"][0]),
+        "status": STATUSES[int(result["status"][0])],
+    }
@@ -0,0 +1,242 @@
+"""Streaming image upload and frame decoding"""
+
+import io
+import mmap
+import struct
+import tempfile
+import zlib
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from fastapi import HTTPException, Request
+from multipart.multipart import MultipartParser, parse_options_header
+from starlette.concurrency import run_in_threadpool
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; raw frames decode without it
+    Image = None
+
+# Smallest frame side the skin metrics can be computed on
+MIN_FRAME_SIDE = 16
+
+# pixel format -> (channels, slice selecting RGB from the stored layout)
+RAW_PIXEL_FORMATS = {
+    "rgb": (3, slice(None, 3)),
+    "rgba": (4, slice(None, 3)),
+    "bgr": (3, slice(2, None, -1)),
+    "bgra": (4, slice(2, None, -1)),
+}
+
+
+class SpooledBuffer:
+    """Append-only byte buffer that spills to a temporary file.
+
+    Data stays in memory up to ``max_memory`` bytes and moves to disk past
+    that. ``view()`` exposes the contents as a memoryview without copying:
+    over the in-memory bytearray, or over an mmap of the spilled file.
+    """
+
+    def __init__(self, max_memory: int, max_size: int):
+        self.max_memory = max_memory
+        self.max_size = max_size
+        self.size = 0
+        self._memory = bytearray()
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+
+    @property
+    def rolled(self) -> bool:
+        return self._file is not None
+
+    def write(self, data: bytes) -> None:
+        if self.size + len(data) > self.max_size:
+            raise HTTPException(status_code=413, detail="Image too large")
+        if self._file is None and self.size + len(data) > self.max_memory:
+            self._file = tempfile.TemporaryFile()
+            self._file.write(self._memory)
+            self._memory = bytearray()
+        if self._file is None:
+            self._memory += data
+        else:
+            self._file.write(data)
+        self.size += len(data)
+
+    async def awrite(self, data: bytes) -> None:
+        """``write`` that moves disk I/O off the event loop"""
+        if self._file is None and self.size + len(data) <= self.max_memory:
+            self.write(data)
+        else:
+            await run_in_threadpool(self.write, data)
+
+    def view(self) -> memoryview:
+        if self._file is None:
+            return memoryview(self._memory)
+        if self._map is None:
+            self._file.flush()
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(self._map)
+
+    def open(self) -> io.BufferedIOBase:
+        """Readable file object over the contents"""
+        if self._file is None:
+            return io.BytesIO(self._memory)
+        self._file.seek(0)
+        return self._file
+
+    def close(self) -> None:
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                pass  # a frame view is still alive; the map closes when it is collected
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._memory = bytearray()
+
+    def __enter__(self) -> "SpooledBuffer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+async def spool_request(request: Request, buffer: SpooledBuffer, field: str = "image") -> Dict[str, str]:
+    """Stream the request body into ``buffer`` without holding it in memory.
+
+    A multipart body has its ``field`` part written to the buffer and its
+    other (small, non-file) parts returned as text; any other body is
+    spooled whole.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data":
+        async for chunk in request.stream():
+            await buffer.awrite(chunk)
+        return {}
+
+    boundary = params.get(b"boundary")
+    if not boundary:
+        raise HTTPException(status_code=400, detail="Missing multipart boundary")
+
+    fields: Dict[str, str] = {}
+    state = {"header": b"", "value": b"", "disposition": b"", "name": None}
+    pending = []
+
+    def on_header_field(data, start, end):
+        state["header"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        state["value"] += data[start:end]
+
+    def on_header_end():
+        if state["header"].lower() == b"content-disposition":
+            state["disposition"] = state["value"]
+        state["header"] = state["value"] = b""
+
+    def on_headers_finished():
+        _, options = parse_options_header(state["disposition"])
+        state["name"] = options.get(b"name", b"").decode("utf-8", "replace")
+        state["disposition"] = b""
+
+    def on_part_data(data, start, end):
+        if state["name"] == field:
+            pending.append(data[start:end])
+        else:
+            value = fields.get(state["name"], "") + data[start:end].decode("utf-8", "replace")
+            if len(value) > 1024:
+                raise HTTPException(status_code=400, detail="Form field too large")
+            fields[state["name"]] = value
+
+    parser = MultipartParser(boundary, {
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+    })
+    async for chunk in request.stream():
+        parser.write(chunk)
+        for data in pending:
+            await buffer.awrite(data)
+        pending.clear()
+    parser.finalize()
+    return fields
+
+
+def decode_raw(view: memoryview, width: int, height: int, pixel_format: str = "rgb") -> np.ndarray:
+    """Interpret raw frame bytes as an (H, W, 3) RGB array view, without copying"""
+    layout = RAW_PIXEL_FORMATS.get(pixel_format)
+    if layout is None:
+        raise HTTPException(status_code=400, detail=f"Unsupported pixel format: {pixel_format}")
+    channels, rgb = layout
+    if width <= 0 or height <= 0 or len(view) != width * height * channels:
+        raise HTTPException(status_code=400, detail="Frame size does not match width/height")
+    frame = np.frombuffer(view, dtype=np.uint8).reshape(height, width, channels)
+    return frame[..., rgb]
+
+
+def _decode_scaled(fp, max_side: int) -> np.ndarray:
+    with Image.open(fp) as image:
+        # JPEG can decode straight to a smaller scale
+        image.draft("RGB", (max_side, max_side))
+        image = image.convert("RGB")
+        image.thumbnail((max_side, max_side))
+        return np.asarray(image)
+
+
+def require_pillow() -> None:
+    """415 when encoded images can't be decoded here"""
+    if Image is None:
+        raise HTTPException(
+            status_code=415,
+            detail="Encoded images need Pillow; send a raw frame with width and height instead",
+        )
+
+
+def decode_image(data: bytes, max_side: int) -> np.ndarray:
+    """Decode a compressed image (JPEG, PNG, ...) with Pillow at reduced scale.
+
+    Meant for worker processes: failures raise ValueError, which pickles.
+    """
+    try:
+        return _decode_scaled(io.BytesIO(data), max_side)
+    except (OSError, ValueError) as exc:
+        raise ValueError("Could not decode image") from exc
+
+
+def encode_image(frame: np.ndarray, quality: int = 85) -> Tuple[bytes, str]:
+    """Compress an RGB frame: JPEG with Pillow, else a stdlib-only PNG.
+
+    Returns the bytes and their media type.
+    """
+    if Image is not None:
+        out = io.BytesIO()
+        Image.fromarray(frame).save(out, format="JPEG", quality=quality)
+        return out.getvalue(), "image/jpeg"
+    height, width = frame.shape[:2]
+    # Each PNG scanline starts with its filter type (0 = none)
+    rows = np.zeros((height, 1 + width * 3), dtype=np.uint8)
+    rows[:, 1:] = frame.reshape(height, -1)
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+    png = b"".join((
+        b"\x89PNG\r\n\x1a\n",
+        chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)),
+        chunk(b"IDAT", zlib.compress(rows.tobytes(), 6)),
+        chunk(b"IEND", b""),
+    ))
+    return png, "image/png"
+
+
+def analysis_frame(frame: np.ndarray, max_side: int) -> np.ndarray:
+    """Downsample by striding so the longest side is at most ``max_side``.
+
+    The result is the only copy made of the frame; it is small enough to
+    ship to a worker process.
+    """
+    step = max(1, -(-max(frame.shape[:2]) // max_side))
+    return np.ascontiguousarray(frame[::step, ::step])
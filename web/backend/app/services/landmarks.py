@@ -0,0 +1,212 @@
+"""Binary face mesh landmark frames.
+
+A frame is a 16-byte header followed by the quantized coordinates, point
+major (x, y[, z] per point), little-endian:
+
+    magic "AMLM" | version u8 | flags u8 | points u16 | seq u32 | scale f32
+
+Coordinates are normalized image positions (z is MediaPipe's relative
+depth) stored as ``round(value * scale)`` in int16. A keyframe carries the
+values themselves; a delta frame carries the difference from the previous
+frame's quantized values, as int8 when every difference fits and int16
+otherwise. Differences wrap modulo 2**16, so decoding is exact.
+"""
+
+import math
+import struct
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+from fastapi import HTTPException
+
+LANDMARK_HEADER = struct.Struct("<4sBBHIf")
+LANDMARK_MAGIC = b"AMLM"
+LANDMARK_VERSION = 1
+
+FLAG_DELTA = 0x01  # values are differences from the previous frame
+FLAG_NARROW = 0x02  # values are int8 rather than int16
+FLAG_DEPTH = 0x04  # three coordinates per point rather than two
+
+# 1/16384 of the frame is ~0.07 px at 1080p; values in [-2, 2) fit in int16
+DEFAULT_SCALE = 16384.0
+FACE_MESH_POINTS = 468
+
+# Face mesh indices used for head pose and face box measurements
+FOREHEAD, CHIN, NOSE_TIP = 10, 152, 1
+RIGHT_EYE_OUTER, LEFT_EYE_OUTER = 33, 263
+RIGHT_CHEEK, LEFT_CHEEK = 234, 454
+
+_INT8_MIN, _INT8_MAX = np.iinfo(np.int8).min, np.iinfo(np.int8).max
+_INT16_MIN, _INT16_MAX = np.iinfo(np.int16).min, np.iinfo(np.int16).max
+
+
+def _frame_layout(flags: int, points: int) -> Tuple[np.dtype, int]:
+    dims = 3 if flags & FLAG_DEPTH else 2
+    dtype = np.dtype("<i1" if flags & FLAG_NARROW else "<i2")
+    return dtype, points * dims * dtype.itemsize
+
+
+class LandmarkEncoder:
+    """Encode one device's landmark stream.
+
+    Every ``keyframe_interval``-th frame, and any frame that doesn't follow
+    the previous sequence number, is a keyframe; the rest are deltas. The
+    returned memoryview is over an internal buffer that the next ``encode``
+    call overwrites.
+    """
+
+    def __init__(
+        self,
+        points: int = FACE_MESH_POINTS,
+        depth: bool = True,
+        scale: float = DEFAULT_SCALE,
+        keyframe_interval: int = 30,
+    ):
+        self.points = points
+        self.dims = 3 if depth else 2
+        self.scale = scale
+        self.keyframe_interval = keyframe_interval
+        self._buffer = bytearray(LANDMARK_HEADER.size + points * self.dims * 2)
+        self._scaled = np.empty((points, self.dims), dtype=np.float32)
+        self._current = np.empty((points, self.dims), dtype=np.int16)
+        self._previous = np.empty((points, self.dims), dtype=np.int16)
+        self._delta = np.empty((points, self.dims), dtype=np.int16)
+        self._seq: Optional[int] = None
+        self._since_keyframe = 0
+
+    def reset(self) -> None:
+        """Make the next frame a keyframe"""
+        self._seq = None
+
+    def encode(self, coords: np.ndarray, seq: int) -> memoryview:
+        """Encode an (points, 2 or 3) array of normalized coordinates"""
+        coords = np.asarray(coords)
+        if coords.shape != (self.points, self.dims):
+            raise ValueError(f"Expected landmarks of shape {(self.points, self.dims)}, got {coords.shape}")
+        np.multiply(coords, self.scale, out=self._scaled)
+        np.rint(self._scaled, out=self._scaled)
+        np.clip(self._scaled, _INT16_MIN, _INT16_MAX, out=self._scaled)
+        self._current[...] = self._scaled
+
+        flags = FLAG_DEPTH if self.dims == 3 else 0
+        values = self._current
+        if self._seq is not None and seq == (self._seq + 1) & 0xFFFFFFFF and self._since_keyframe < self.keyframe_interval:
+            np.subtract(self._current, self._previous, out=self._delta)
+            values = self._delta
+            flags |= FLAG_DELTA
+            if _INT8_MIN <= values.min() and values.max() <= _INT8_MAX:
+                flags |= FLAG_NARROW
+            self._since_keyframe += 1
+        else:
+            self._since_keyframe = 1
+        self._current, self._previous = self._previous, self._current
+        self._seq = seq
+
+        dtype, body = _frame_layout(flags, self.points)
+        LANDMARK_HEADER.pack_into(self._buffer, 0, LANDMARK_MAGIC, LANDMARK_VERSION, flags, self.points, seq, self.scale)
+        out = np.frombuffer(self._buffer, dtype=dtype, count=values.size, offset=LANDMARK_HEADER.size)
+        out[...] = values.reshape(-1)
+        return memoryview(self._buffer)[:LANDMARK_HEADER.size + body]
+
+
+class LandmarkDecoder:
+    """Decode one device's landmark stream, tracking the previous frame for deltas"""
+
+    def __init__(self):
+        self.seq: Optional[int] = None
+        self._quantized: Optional[np.ndarray] = None
+        self._layout: Optional[Tuple[int, int, float]] = None
+
+    def reset(self) -> None:
+        self.seq = None
+        self._quantized = None
+        self._layout = None
+
+    def decode(self, data) -> Tuple[int, np.ndarray]:
+        """Sequence number and (points, 2 or 3) float32 coordinates of one frame.
+
+        ``data`` is any buffer; keyframe values are read in place from it.
+        """
+        view = memoryview(data)
+        if len(view) < LANDMARK_HEADER.size:
+            raise HTTPException(status_code=400, detail="Landmark frame too short")
+        magic, version, flags, points, seq, scale = LANDMARK_HEADER.unpack_from(view)
+        if magic != LANDMARK_MAGIC:
+            raise HTTPException(status_code=400, detail="Unknown frame type")
+        if version != LANDMARK_VERSION:
+            raise HTTPException(status_code=400, detail=f"Unsupported landmark frame version: {version}")
+        if not math.isfinite(scale) or scale <= 0:
+            raise HTTPException(status_code=400, detail="Invalid landmark scale")
+        if not points:
+            raise HTTPException(status_code=400, detail="Landmark frame has no points")
+        dtype, body = _frame_layout(flags, points)
+        if len(view) != LANDMARK_HEADER.size + body:
+            raise HTTPException(status_code=400, detail="Landmark frame size does not match its header")
+        dims = 3 if flags & FLAG_DEPTH else 2
+        values = np.frombuffer(view, dtype=dtype, offset=LANDMARK_HEADER.size).reshape(points, dims)
+
+        layout = (points, dims, scale)
+        if flags & FLAG_DELTA:
+            if self._quantized is None or layout != self._layout or seq != (self.seq + 1) & 0xFFFFFFFF:
+                raise HTTPException(status_code=409, detail="Delta landmark frame without its previous frame")
+            # int16 addition wraps, undoing the encoder's wrapping subtraction
+            quantized = np.add(self._quantized, values, dtype=np.int16)
+        elif flags & FLAG_NARROW:
+            raise HTTPException(status_code=400, detail="Keyframes carry int16 values")
+        else:
+            quantized = values
+        self._quantized = quantized
+        self._layout = layout
+        self.seq = seq
+        return seq, np.multiply(quantized, np.float32(1 / scale), dtype=np.float32)
+
+
+def iter_landmark_frames(view: memoryview) -> Iterator[memoryview]:
+    """Split a buffer of back-to-back landmark frames, without copying"""
+    offset = 0
+    while offset < len(view):
+        if len(view) - offset < LANDMARK_HEADER.size:
+            raise HTTPException(status_code=400, detail="Truncated landmark frame")
+        _, _, flags, points, _, _ = LANDMARK_HEADER.unpack_from(view, offset)
+        end = offset + LANDMARK_HEADER.size + _frame_layout(flags, points)[1]
+        if end > len(view):
+            raise HTTPException(status_code=400, detail="Truncated landmark frame")
+        yield view[offset:end]
+        offset = end
+
+
+def face_geometry(coords: np.ndarray) -> Dict[str, Any]:
+    """Face box and head pose from normalized landmark coordinates.
+
+    Roll is the eye line's angle in degrees; yaw is the nose tip's offset
+    from the cheek midpoint as a fraction of half the face width (-1 to 1).
+    Pose needs the full face mesh.
+    """
+    x0, y0 = coords[:, :2].min(axis=0)
+    x1, y1 = coords[:, :2].max(axis=0)
+    geometry: Dict[str, Any] = {"box": [round(float(v), 4) for v in (x0, y0, x1, y1)]}
+    if len(coords) != FACE_MESH_POINTS:
+        return geometry
+    eye_dx, eye_dy = coords[LEFT_EYE_OUTER, :2] - coords[RIGHT_EYE_OUTER, :2]
+    width = float(np.hypot(*(coords[LEFT_CHEEK, :2] - coords[RIGHT_CHEEK, :2])))
+    height = float(np.hypot(*(coords[CHIN, :2] - coords[FOREHEAD, :2])))
+    half_width = width / 2 or 1.0
+    centre = (coords[LEFT_CHEEK, 0] + coords[RIGHT_CHEEK, 0]) / 2
+    geometry.update(
+        roll=round(math.degrees(math.atan2(float(eye_dy), float(eye_dx))), 1),
+        yaw=round(min(max(float(coords[NOSE_TIP, 0] - centre) / half_width, -1.0), 1.0), 3),
+        aspect_ratio=round(height / width, 3) if width else None,
+    )
+    return geometry
+
+
+def crop_to_box(frame: np.ndarray, box, margin: float = 0.1) -> np.ndarray:
+    """View of ``frame`` inside a normalized face box grown by ``margin``"""
+    height, width = frame.shape[:2]
+    x0, y0, x1, y1 = box
+    pad_x, pad_y = (x1 - x0) * margin, (y1 - y0) * margin
+    left, right = max(int((x0 - pad_x) * width), 0), min(int(math.ceil((x1 + pad_x) * width)), width)
+    top, bottom = max(int((y0 - pad_y) * height), 0), min(int(math.ceil((y1 + pad_y) * height)), height)
+    if right - left < 8 or bottom - top < 8:
+        return frame
+    return frame[top:bottom, left:right]
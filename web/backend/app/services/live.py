@@ -0,0 +1,333 @@
+"""Live mirror sessions streamed over WebSocket"""
+
+import asyncio
+import itertools
+import json
+import struct
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+from fastapi import HTTPException, WebSocket
+
+from app.config import settings
+from app.services.imaging import analysis_frame, decode_raw
+from app.services.landmarks import LANDMARK_MAGIC, LandmarkDecoder, crop_to_box, face_geometry
+from app.services.skin_engine import lighting_state, overall_score, scan_engine
+
+# Binary video frame: magic, sequence number, width, height, pixel format code
+VIDEO_FRAME = struct.Struct("<4sIHHB3x")
+VIDEO_MAGIC = b"AMVF"
+PIXEL_FORMAT_CODES = ("rgb", "rgba", "bgr", "bgra")
+
+# Latency samples kept per session for averages and percentiles
+LATENCY_SAMPLES = 256
+
+
+class Outbox:
+    """Bounded outgoing message buffer that coalesces superseded updates.
+
+    Messages put with a ``key`` replace any pending message with the same
+    key (a newer lighting reading makes the older one worthless), so a slow
+    client gets the latest state instead of a backlog. Past ``max_size``
+    pending messages the oldest is dropped.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.dropped = 0
+        self._pending: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        self._ready = asyncio.Event()
+        self._ids = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def put(self, message: Dict[str, Any], key: Optional[Hashable] = None) -> None:
+        if key is None:
+            key = ("unique", next(self._ids))
+        elif key in self._pending:
+            del self._pending[key]
+            self.dropped += 1
+        self._pending[key] = message
+        while len(self._pending) > self.max_size:
+            self._pending.popitem(last=False)
+            self.dropped += 1
+        self._ready.set()
+
+    async def get(self) -> Dict[str, Any]:
+        while not self._pending:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._pending.popitem(last=False)[1]
+
+
+class LatencyTracker:
+    """Recent latency samples in milliseconds"""
+
+    def __init__(self, size: int = LATENCY_SAMPLES):
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def add(self, ms: float) -> None:
+        self._samples.append(ms)
+
+    def summary(self) -> Optional[Dict[str, float]]:
+        if not self._samples:
+            return None
+        samples = np.fromiter(self._samples, dtype=np.float64, count=len(self._samples))
+        p50, p95 = np.percentile(samples, (50, 95))
+        return {"avg": round(float(samples.mean()), 2), "p50": round(float(p50), 2), "p95": round(float(p95), 2)}
+
+
+def parse_video_frame(data: bytes) -> Tuple[int, np.ndarray]:
+    """Sequence number and an RGB view over a binary video frame message"""
+    if len(data) < VIDEO_FRAME.size:
+        raise HTTPException(status_code=400, detail="Frame message too short")
+    magic, seq, width, height, code = VIDEO_FRAME.unpack_from(data)
+    if magic != VIDEO_MAGIC:
+        raise HTTPException(status_code=400, detail="Unknown frame type")
+    if code >= len(PIXEL_FORMAT_CODES):
+        raise HTTPException(status_code=400, detail=f"Unsupported pixel format code: {code}")
+    view = memoryview(data)[VIDEO_FRAME.size:]
+    return seq, decode_raw(view, width, height, PIXEL_FORMAT_CODES[code])
+
+
+class LiveSession:
+    """One device connection.
+
+    Binary messages are video frames or landmark frames, told apart by their
+    magic. Landmarks are decoded as they arrive and answered with the face
+    box and head pose; the latest box also crops frames for skin metrics.
+
+    Three tasks share the socket: the receive loop parks each incoming frame
+    in a single-frame slot (a newer frame replaces one not yet processed, so
+    stale frames are dropped rather than queued), the processor analyzes the
+    latest frame, and the sender drains the ``Outbox``. Lighting is measured
+    on every processed frame; full skin metrics run in the scan worker pool
+    at most every ``metrics_interval`` seconds, and only when a pool slot is
+    free.
+    """
+
+    def __init__(self, session_id: str, websocket: WebSocket, registry: "LiveSessionRegistry"):
+        self.id = session_id
+        self.websocket = websocket
+        self.registry = registry
+        self.outbox = Outbox(settings.LIVE_OUTBOX_SIZE)
+        self.started = time.time()
+        self.frames_received = 0
+        self.frames_processed = 0
+        self.frames_dropped = 0
+        self.landmark_frames = 0
+        self.bytes_in = 0
+        self.rtt = LatencyTracker()
+        self.processing = LatencyTracker()
+        self._frame: Optional[Tuple[int, np.ndarray, float]] = None
+        self._frame_ready = asyncio.Event()
+        self._landmarks = LandmarkDecoder()
+        self._face_box: Optional[List[float]] = None
+        self._last_metrics = 0.0
+        self._metrics_task: Optional[asyncio.Task] = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.id,
+            "connected_seconds": round(time.time() - self.started, 1),
+            "frames_received": self.frames_received,
+            "frames_processed": self.frames_processed,
+            "frames_dropped": self.frames_dropped,
+            "landmark_frames": self.landmark_frames,
+            "messages_dropped": self.outbox.dropped,
+            "bytes_in": self.bytes_in,
+            "rtt_ms": self.rtt.summary(),
+            "processing_ms": self.processing.summary(),
+        }
+
+    def error(self, detail: str) -> None:
+        self.outbox.put({"type": "error", "detail": detail})
+
+    def on_frame(self, data: bytes) -> None:
+        self.bytes_in += len(data)
+        if len(data) > settings.LIVE_MAX_FRAME_BYTES:
+            self.error("Frame too large")
+            return
+        if data[:4] == LANDMARK_MAGIC:
+            self.on_landmarks(data)
+            return
+        self.frames_received += 1
+        try:
+            seq, frame = parse_video_frame(data)
+        except HTTPException as exc:
+            self.error(exc.detail)
+            return
+        if self._frame is not None:
+            self.frames_dropped += 1
+        self._frame = (seq, frame, time.perf_counter())
+        self._frame_ready.set()
+
+    def on_landmarks(self, data: bytes) -> None:
+        try:
+            seq, coords = self._landmarks.decode(data)
+        except HTTPException as exc:
+            if exc.status_code == 409:
+                # Lost our place in the delta chain; ask the device to resync
+                self.outbox.put({"type": "keyframe", "after": self._landmarks.seq}, key="keyframe")
+            else:
+                self.error(exc.detail)
+            return
+        self.landmark_frames += 1
+        face = face_geometry(coords)
+        self._face_box = face["box"]
+        self.outbox.put({"type": "face", "seq": seq, **face}, key="face")
+
+    def on_text(self, message: Dict[str, Any]) -> None:
+        kind = message.get("type")
+        if kind == "pong":
+            sent = message.get("t")
+            if isinstance(sent, (int, float)):
+                self.rtt.add(time.perf_counter() * 1000 - sent)
+        elif kind == "ping":
+            self.outbox.put({"type": "pong", "t": message.get("t")})
+        elif kind == "stats":
+            self.outbox.put({"type": "stats", **self.stats()}, key="stats")
+        else:
+            self.error(f"Unknown message type: {kind}")
+
+    async def process(self) -> None:
+        while True:
+            await self._frame_ready.wait()
+            self._frame_ready.clear()
+            if self._frame is None:
+                continue
+            seq, frame, received = self._frame
+            self._frame = None
+
+            try:
+                small = analysis_frame(frame, settings.LIVE_ANALYSIS_SIZE)
+                lighting = lighting_state(small)
+            except Exception as exc:  # one bad frame must not end the session
+                self.error(f"Frame {seq} could not be analyzed: {exc}")
+                continue
+            self.outbox.put({"type": "lighting", "seq": seq, **lighting}, key="lighting")
+            self.frames_processed += 1
+            self.processing.add((time.perf_counter() - received) * 1000)
+
+            now = time.monotonic()
+            if (
+                now - self._last_metrics >= settings.LIVE_METRICS_INTERVAL
+                and (self._metrics_task is None or self._metrics_task.done())
+                and self.registry.acquire_worker()
+            ):
+                self._last_metrics = now
+                face = crop_to_box(small, self._face_box) if self._face_box else small
+                self._metrics_task = asyncio.create_task(self._metrics(seq, face))
+            # Let the receive loop park newer frames between analyses
+            await asyncio.sleep(0)
+
+    async def _metrics(self, seq: int, frame: np.ndarray) -> None:
+        try:
+            result = await scan_engine.analyze(frame)
+        except Exception as exc:
+            self.error(f"Skin metrics failed for frame {seq}: {exc}")
+            return
+        finally:
+            self.registry.release_worker()
+        scores = result["scores"]
+        self.outbox.put(
+            {
+                "type": "metrics",
+                "seq": seq,
+                "overall_score": overall_score(scores),
+                "scores": scores,
+                "skin_tone": result["skin_tone"],
+            },
+            key="metrics",
+        )
+
+    async def send(self) -> None:
+        while True:
+            message = await self.outbox.get()
+            await self.websocket.send_json(message)
+
+    async def ping(self) -> None:
+        while True:
+            await asyncio.sleep(settings.LIVE_PING_SECONDS)
+            self.outbox.put({"type": "ping", "t": time.perf_counter() * 1000}, key="ping")
+            self.outbox.put({"type": "stats", **self.stats()}, key="stats")
+
+    async def run(self) -> None:
+        """Serve the connection until the client disconnects"""
+        self.outbox.put({
+            "type": "session",
+            "session_id": self.id,
+            "max_frame_bytes": settings.LIVE_MAX_FRAME_BYTES,
+            "metrics_interval": settings.LIVE_METRICS_INTERVAL,
+        })
+        tasks = [asyncio.create_task(coro) for coro in (self.process(), self.send(), self.ping())]
+        try:
+            while True:
+                message = await self.websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("bytes") is not None:
+                    self.on_frame(message["bytes"])
+                elif message.get("text") is not None:
+                    try:
+                        payload = json.loads(message["text"])
+                    except ValueError:
+                        payload = None
+                    if isinstance(payload, dict):
+                        self.on_text(payload)
+                    else:
+                        self.error("Text messages must be JSON objects")
+                # A failed processor or sender can't answer; stop reading too
+                if tasks[0].done() or tasks[1].done():
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            if self._metrics_task is not None:
+                self._metrics_task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class LiveSessionRegistry:
+    """Active live sessions, the session cap and the shared metrics worker budget"""
+
+    def __init__(self, max_sessions: int, max_inflight_metrics: int):
+        self.max_sessions = max_sessions
+        self.max_inflight_metrics = max_inflight_metrics
+        self._sessions: Dict[str, LiveSession] = {}
+        self._ids = itertools.count(1)
+        self._inflight = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def open(self, websocket: WebSocket) -> Optional[LiveSession]:
+        if len(self._sessions) >= self.max_sessions:
+            return None
+        session = LiveSession(f"live-{next(self._ids)}", websocket, self)
+        self._sessions[session.id] = session
+        return session
+
+    def close(self, session: LiveSession) -> None:
+        self._sessions.pop(session.id, None)
+
+    def acquire_worker(self) -> bool:
+        if self._inflight >= self.max_inflight_metrics:
+            return False
+        self._inflight += 1
+        return True
+
+    def release_worker(self) -> None:
+        self._inflight -= 1
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [session.stats() for session in self._sessions.values()]
+
+
+live_sessions = LiveSessionRegistry(
+    settings.LIVE_MAX_SESSIONS,
+    settings.LIVE_MAX_INFLIGHT_METRICS or 2 * scan_engine.workers,
+)
@@ -0,0 +1,125 @@
+"""Request-scoped batching entity loaders (DataLoader pattern)"""
+
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Set
+
+from app.mock.data import PRODUCT_STORE, STYLE_STORE, TUTORIAL_STORE
+from app.services.catalog import CatalogStore
+
+BatchFn = Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]]
+
+
+class BatchLoader:
+    """Collects ``load`` calls made in the same event-loop tick into one batch.
+
+    Every id requested while a response is being built is queued; the batch
+    function runs once on the next loop iteration with the de-duplicated ids.
+    Results are memoized for the loader's lifetime, so a loader should live
+    for a single request.
+    """
+
+    def __init__(self, batch_fn: BatchFn, max_batch_size: Optional[int] = None):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self._futures: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self._queue: List[Hashable] = []
+        self._dispatching: Set["asyncio.Task[None]"] = set()
+        self.batches = 0
+
+    def load(self, key: Hashable) -> "asyncio.Future[Any]":
+        future = self._futures.get(key)
+        if future is not None:
+            return future
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._futures[key] = future
+        if not self._queue:
+            loop.call_soon(self._dispatch)
+        self._queue.append(key)
+        return future
+
+    async def load_many(self, keys: Iterable[Hashable]) -> List[Any]:
+        return list(await asyncio.gather(*(self.load(k) for k in keys)))
+
+    def prime(self, key: Hashable, value: Any) -> None:
+        if key not in self._futures:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(value)
+            self._futures[key] = future
+
+    def _dispatch(self) -> None:
+        keys, self._queue = self._queue, []
+        size = self.max_batch_size or len(keys)
+        for start in range(0, len(keys), size):
+            # The loop only keeps a weak reference to a task
+            task = asyncio.ensure_future(self._run_batch(keys[start:start + size]))
+            self._dispatching.add(task)
+            task.add_done_callback(self._dispatching.discard)
+
+    async def close(self) -> None:
+        """Cancel batches still running, e.g. when the request ends"""
+        tasks = list(self._dispatching)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run_batch(self, keys: List[Hashable]) -> None:
+        self.batches += 1
+        try:
+            results = await self.batch_fn(keys)
+        except Exception as exc:
+            for key in keys:
+                future = self._futures.pop(key)
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for key in keys:
+            future = self._futures[key]
+            if not future.done():
+                future.set_result(results.get(key))
+
+
+def store_batch_fn(store: CatalogStore) -> BatchFn:
+    """Batch function doing one bulk lookup against a catalog store"""
+    async def batch(keys: List[Hashable]) -> Dict[Hashable, Any]:
+        return store.get_map(keys)
+    return batch
+
+
+class Loaders:
+    """Loaders for one request, one per catalog store"""
+
+    def __init__(self):
+        self._by_store: Dict[int, BatchLoader] = {}
+
+    def for_store(self, store: CatalogStore) -> BatchLoader:
+        loader = self._by_store.get(id(store))
+        if loader is None:
+            loader = self._by_store[id(store)] = BatchLoader(store_batch_fn(store))
+        return loader
+
+    async def close(self) -> None:
+        for loader in self._by_store.values():
+            await loader.close()
+
+    @property
+    def products(self) -> BatchLoader:
+        return self.for_store(PRODUCT_STORE)
+
+    @property
+    def styles(self) -> BatchLoader:
+        return self.for_store(STYLE_STORE)
+
+    @property
+    def tutorials(self) -> BatchLoader:
+        return self.for_store(TUTORIAL_STORE)
+
+
+async def get_loaders() -> AsyncIterator[Loaders]:
+    """FastAPI dependency providing fresh request-scoped loaders"""
+    loaders = Loaders()
+    try:
+        yield loaders
+    finally:
+        await loaders.close()
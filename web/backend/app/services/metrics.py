@@ -0,0 +1,212 @@
+"""Per-route request metrics in Prometheus text format"""
+
+import os
+import time
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Histogram upper bounds; each histogram has one more bucket for +Inf
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+# Requests that matched no route share one label, so stray paths can't add series
+UNMATCHED = "<unmatched>"
+METHODS = frozenset(("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"))
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+class RouteStats:
+    """Counters for one (method, route template)"""
+
+    __slots__ = ("in_flight", "statuses", "latency", "latency_sum", "size", "size_sum")
+
+    def __init__(self):
+        self.in_flight = 0
+        self.statuses: Dict[int, int] = {}
+        self.latency = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.size = [0] * (len(SIZE_BUCKETS) + 1)
+        self.size_sum = 0
+
+    def record(self, status: int, size: int, seconds: float) -> None:
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.latency[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.latency_sum += seconds
+        self.size[bisect_left(SIZE_BUCKETS, size)] += 1
+        self.size_sum += size
+
+
+class MetricsRegistry:
+    """Request metrics for this worker process.
+
+    Everything is updated from the event loop thread, so plain ints need no
+    locks; with several workers each process keeps and reports its own
+    counters under a ``worker`` label and Prometheus sums across them.
+    """
+
+    def __init__(self):
+        self.routes: Dict[Tuple[str, str], RouteStats] = {}
+        self.in_flight = 0
+        self.started = time.time()
+        self.startup: Dict[str, float] = {}  # start-up phase -> seconds
+
+    def stats(self, method: str, template: str) -> RouteStats:
+        key = (method, template)
+        stats = self.routes.get(key)
+        if stats is None:
+            stats = self.routes[key] = RouteStats()
+        return stats
+
+    def clear(self) -> None:
+        self.routes.clear()
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        worker = f'worker="{os.getpid()}"'
+        routes = sorted(self.routes.items())
+        lines = [
+            "# HELP http_requests_total Requests by route template and status code.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, template), stats in routes:
+            labels = _labels(worker, method, template)
+            for status, count in sorted(stats.statuses.items()):
+                lines.append(f'http_requests_total{{{labels},status="{status}"}} {count}')
+        lines += [
+            "# HELP http_requests_in_flight Requests being handled.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight{{{worker}}} {self.in_flight}",
+        ]
+        for (method, template), stats in routes:
+            if template != UNMATCHED:
+                lines.append(f"http_requests_in_flight{{{_labels(worker, method, template)}}} {stats.in_flight}")
+        _histogram(lines, "http_request_duration_seconds", "Request latency.", worker, routes,
+                   LATENCY_BUCKETS, lambda s: (s.latency, s.latency_sum))
+        _histogram(lines, "http_response_size_bytes", "Response body size.", worker, routes,
+                   SIZE_BUCKETS, lambda s: (s.size, s.size_sum))
+        lines += [
+            "# HELP process_start_time_seconds Worker start time.",
+            "# TYPE process_start_time_seconds gauge",
+            f"process_start_time_seconds{{{worker}}} {self.started:.3f}",
+        ]
+        if self.startup:
+            lines += [
+                "# HELP app_startup_seconds Worker start-up time by phase.",
+                "# TYPE app_startup_seconds gauge",
+            ]
+            for phase, seconds in self.startup.items():
+                lines.append(f'app_startup_seconds{{{worker},phase="{phase}"}} {seconds:.6f}')
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(worker: str, method: str, template: str) -> str:
+    return f'{worker},method="{method}",route="{_escape(template)}"'
+
+
+def _histogram(
+    lines: List[str],
+    name: str,
+    help_text: str,
+    worker: str,
+    routes: Iterable[Tuple[Tuple[str, str], RouteStats]],
+    bounds: Tuple[float, ...],
+    values,
+) -> None:
+    lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for (method, template), stats in routes:
+        counts, total = values(stats)
+        count = sum(counts)
+        if not count:
+            continue
+        labels = _labels(worker, method, template)
+        cumulative = 0
+        for bound, bucket in zip(bounds, counts):
+            cumulative += bucket
+            lines.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {count}')
+        lines.append(f"{name}_sum{{{labels}}} {total:g}")
+        lines.append(f"{name}_count{{{labels}}} {count}")
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording every HTTP request.
+
+    The route template comes from ``scope["route"]``, which the router fills
+    in while dispatching, so labels are ``/api/products/{product_id}`` rather
+    than raw paths. Per-route in-flight counts need the route before the
+    endpoint runs, so on the first request each route's ASGI app is wrapped
+    to count itself.
+    """
+
+    def __init__(self, app, registry: Optional[MetricsRegistry] = None):
+        self.app = app
+        self.registry = registry or metrics
+        self._instrumented = False
+
+    def _instrument(self, routes: Iterable[Any]) -> None:
+        registry = self.registry
+        for route in routes:
+            path, inner = getattr(route, "path", None), getattr(route, "app", None)
+            if path is None or inner is None or not getattr(route, "methods", None):
+                continue
+
+            def counted(scope, receive, send, inner=inner, path=path):
+                return _count_in_flight(registry, path, inner, scope, receive, send)
+
+            route.app = counted
+        self._instrumented = True
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if not self._instrumented and "app" in scope:
+            self._instrument(scope["app"].router.routes)
+
+        registry = self.registry
+        started = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            elif message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        registry.in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            registry.in_flight -= 1
+            elapsed = time.perf_counter() - started
+            # Routed requests went through a counting wrapper that left its stats
+            stats = scope.get("metrics.route")
+            if stats is None:
+                route = scope.get("route")
+                stats = registry.stats(_method(scope), route.path if route is not None else UNMATCHED)
+            stats.record(status, size, elapsed)
+
+
+def _method(scope) -> str:
+    method = scope["method"]
+    return method if method in METHODS else "OTHER"
+
+
+async def _count_in_flight(registry: MetricsRegistry, path: str, inner, scope, receive, send) -> None:
+    stats = scope["metrics.route"] = registry.stats(_method(scope), path)
+    stats.in_flight += 1
+    try:
+        await inner(scope, receive, send)
+    finally:
+        stats.in_flight -= 1
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,80 @@
+"""Opaque keyset cursors and cached counts for list endpoints"""
+
+import base64
+import json
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, List, Optional, Sequence, Tuple, Union
+
+from fastapi import HTTPException
+
+from app.services.catalog import CatalogStore
+
+# Largest page a list endpoint serves
+MAX_PAGE_SIZE = 100
+
+# Cursor key element types
+NUMBER = (int, float)
+TEXT = str
+
+
+def encode_cursor(sort: str, key: Optional[Sequence[Any]]) -> Optional[str]:
+    """Encode a sort key as an opaque, URL-safe cursor"""
+    if key is None:
+        return None
+    raw = json.dumps([sort, list(key)], separators=(",", ":"), ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(
+    cursor: Optional[str],
+    sort: str,
+    types: Sequence[Union[type, Tuple[type, ...]]],
+) -> Optional[List[Any]]:
+    """Decode a cursor produced for ``sort``; raises 400 on anything else.
+
+    ``types`` gives the type of each element of the sort key, so a key of
+    the wrong length or with the wrong element types is rejected before it
+    reaches an index or a query.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, key = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor_sort != sort or not isinstance(key, list):
+        raise HTTPException(status_code=400, detail="Cursor does not match this query")
+    if len(key) != len(types) or not all(
+        isinstance(value, expected) and not isinstance(value, bool)
+        for value, expected in zip(key, types)
+    ):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return key
+
+
+class CountCache:
+    """Bounded cache of ``total`` counts keyed by query and data version"""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[Hashable, int]]" = OrderedDict()
+
+    def get(self, key: Hashable, version: Hashable, count: Callable[[], int]) -> int:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            self._entries.move_to_end(key)
+            return entry[1]
+        total = count()
+        self._entries[key] = (version, total)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return total
+
+    def store_count(self, name: str, store: CatalogStore, **filters: Any) -> int:
+        key = (name, tuple(sorted(filters.items())))
+        return self.get(key, store.version, lambda: store.count(**filters))
+
+
+count_cache = CountCache()
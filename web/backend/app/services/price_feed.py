@@ -0,0 +1,88 @@
+"""Price-update ingestion from a JSONL feed"""
+
+import asyncio
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.services.prices import PriceHistory
+
+# Bytes read from the feed per ingest batch
+READ_CHUNK_BYTES = 1 << 20
+
+# Seconds between reads once a followed feed is exhausted
+FOLLOW_POLL_SECONDS = 1.0
+
+
+class PriceFeed:
+    """Applies price updates to a ``PriceHistory`` one point at a time.
+
+    Each update is ``{"product_id", "date", "price"}``. Updates go through
+    ``PriceHistory.add``, so listeners such as the price-alert engine hear
+    about every change of a product's latest price. Every worker reads the
+    same feed file, so their histories stay the same.
+    """
+
+    def __init__(self, prices: PriceHistory):
+        self.prices = prices
+        self.updates = 0
+        self.errors = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def ingest(self, updates: Iterable[Dict[str, Any]]) -> int:
+        """Apply a batch of updates; returns how many were applied"""
+        applied = 0
+        for update in updates:
+            try:
+                self.prices.add(update["product_id"], update["date"], float(update["price"]))
+            except (KeyError, TypeError, ValueError):
+                self.errors += 1
+                continue
+            applied += 1
+        self.updates += applied
+        return applied
+
+    def _parse(self, lines: Iterable[bytes]) -> List[Dict[str, Any]]:
+        updates = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                updates.append(json.loads(line))
+            except ValueError:
+                self.errors += 1
+        return updates
+
+    async def replay(self, path: str, follow: bool = False) -> None:
+        """Ingest a JSONL feed file; with ``follow``, keep reading appended updates"""
+        pending = b""
+        with open(path, "rb") as feed:
+            while True:
+                lines = await asyncio.to_thread(feed.readlines, READ_CHUNK_BYTES)
+                if lines:
+                    lines[0] = pending + lines[0]
+                    pending = b""
+                    if not lines[-1].endswith(b"\n"):
+                        pending = lines.pop()
+                    self.ingest(self._parse(lines))
+                    await asyncio.sleep(0)
+                    continue
+                if not follow:
+                    # A final line without a newline
+                    self.ingest(self._parse([pending]))
+                    return
+                await asyncio.sleep(FOLLOW_POLL_SECONDS)
+
+    def start(self, path: str, follow: bool = False) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.replay(path, follow))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            except Exception as exc:
+                print(f"Price feed stopped with an error: {exc!r}")
+            self._task = None
@@ -0,0 +1,277 @@
+"""Columnar product price history with windowed statistics"""
+
+from array import array
+from bisect import bisect_right
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# period -> days covered (None = full history)
+PRICE_PERIODS = {
+    "7d": 7,
+    "30d": 30,
+    "90d": 90,
+    "180d": 180,
+    "1y": 365,
+    "all": None,
+}
+
+PERCENTILES = (10, 50, 90)
+
+# Called with (product_id, old latest price or None, new latest price)
+PriceListener = Callable[[str, Optional[float], float], None]
+
+
+def _ordinal(day: Any) -> int:
+    if isinstance(day, str):
+        day = date.fromisoformat(day)
+    return day.toordinal()
+
+
+def format_price(value: float) -> Any:
+    return int(value) if float(value).is_integer() else round(float(value), 2)
+
+
+class ProductPrices:
+    """Price points for one product as typed arrays sorted by day"""
+
+    __slots__ = ("days", "prices")
+
+    def __init__(self):
+        self.days = array("i")
+        self.prices = array("d")
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def add(self, day: int, price: float) -> None:
+        days = self.days
+        if not days or day > days[-1]:
+            days.append(day)
+            self.prices.append(price)
+            return
+        i = bisect_right(days, day)
+        if i and days[i - 1] == day:
+            self.prices[i - 1] = price
+        else:
+            days.insert(i, day)
+            self.prices.insert(i, price)
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Zero-copy numpy views; don't hold them across ``add``"""
+        if not self.days:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float64)
+        return np.frombuffer(self.days, dtype=np.int32), np.frombuffer(self.prices, dtype=np.float64)
+
+    def window_start(self, days: np.ndarray, period_days: Optional[int]) -> int:
+        """First index of the window ending at the latest point.
+
+        The point in effect when the window opens is included, so a window
+        without changes still reports the current price.
+        """
+        if period_days is None or not len(days):
+            return 0
+        start_day = int(days[-1]) - period_days + 1
+        return max(0, int(np.searchsorted(days, start_day, side="right")) - 1)
+
+
+class MappedPrices(ProductPrices):
+    """Read-only price points viewed from shared arrays"""
+
+    __slots__ = ()
+
+    def __init__(self, days: np.ndarray, prices: np.ndarray):
+        self.days = days
+        self.prices = prices
+
+    def add(self, day: int, price: float) -> None:
+        raise TypeError("Mapped price history is read-only")
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        return self.days, self.prices
+
+
+class PriceSegment:
+    """Read-only history of many products, e.g. mapped from a snapshot.
+
+    Product ``ids[i]`` has the points ``starts[i]:starts[i + 1]`` of the
+    concatenated ``days`` and ``prices``; ``ids.position`` finds ``i``.
+    """
+
+    def __init__(self, ids: Any, starts: np.ndarray, days: np.ndarray, prices: np.ndarray):
+        self.ids = ids
+        self.starts = starts
+        self.days = days
+        self.prices = prices
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def get(self, product_id: str) -> Optional[MappedPrices]:
+        i = self.ids.position(product_id)
+        if i is None:
+            return None
+        start, end = self.starts[i:i + 2].tolist()
+        return MappedPrices(self.days[start:end], self.prices[start:end])
+
+
+class PriceHistory:
+    """Per-product columnar price history.
+
+    Listeners hear about single ``add`` calls that change a product's latest
+    price; bulk ``load`` and ``clear`` are silent. After ``restore`` the
+    history is read from a shared ``PriceSegment``; products that change
+    are copied out of it first.
+    """
+
+    def __init__(self, rows: Optional[Dict[str, Iterable[Dict[str, Any]]]] = None):
+        self._products: Dict[str, ProductPrices] = {}
+        self._base: Optional[PriceSegment] = None
+        self._listeners: List[PriceListener] = []
+        self.version = 0
+        if rows:
+            self.load(rows)
+
+    def subscribe(self, listener: PriceListener) -> None:
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: PriceListener) -> None:
+        self._listeners.remove(listener)
+
+    def __contains__(self, product_id: str) -> bool:
+        return self._series(product_id) is not None
+
+    def _series(self, product_id: str) -> Optional[ProductPrices]:
+        series = self._products.get(product_id)
+        if series is None and self._base is not None:
+            series = self._base.get(product_id)
+        return series
+
+    def _writable(self, product_id: str) -> ProductPrices:
+        series = self._products.get(product_id)
+        if series is None:
+            series = self._products[product_id] = ProductPrices()
+            base = self._base.get(product_id) if self._base is not None else None
+            if base is not None:
+                series.days.frombytes(base.days.tobytes())
+                series.prices.frombytes(base.prices.tobytes())
+        return series
+
+    def load(self, rows: Dict[str, Iterable[Dict[str, Any]]]) -> None:
+        """Add ``{product_id: [{"date", "price"}, ...]}`` rows"""
+        for product_id, points in rows.items():
+            series = self._writable(product_id)
+            for point in points:
+                series.add(_ordinal(point["date"]), float(point["price"]))
+        self.version += 1
+
+    def add(self, product_id: str, day: Any, price: float) -> None:
+        old = self.latest(product_id)
+        self._writable(product_id).add(_ordinal(day), float(price))
+        self.version += 1
+        new = self.latest(product_id)
+        if new != old:
+            for listener in list(self._listeners):
+                listener(product_id, old, new)
+
+    def clear(self) -> None:
+        self._products.clear()
+        self._base = None
+        self.version += 1
+
+    def export_segment(self) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+        """Product ids, series starts and every product's days and prices concatenated"""
+        product_ids = list(self._products)
+        if self._base is not None:
+            product_ids = [i for i in self._base.ids if i not in self._products] + product_ids
+        series = [self._series(product_id) for product_id in product_ids]
+        starts = np.zeros(len(series) + 1, dtype=np.uint64)
+        starts[1:] = np.cumsum([len(s) for s in series])
+        days = np.concatenate([s.arrays()[0] for s in series]) if series else np.empty(0, dtype=np.int32)
+        prices = np.concatenate([s.arrays()[1] for s in series]) if series else np.empty(0, dtype=np.float64)
+        return product_ids, starts, days, prices
+
+    def restore(self, segment: PriceSegment) -> None:
+        """Replace all history with a segment, read in place"""
+        self._products.clear()
+        self._base = segment
+        self.version += 1
+
+    def latest(self, product_id: str) -> Optional[float]:
+        series = self._series(product_id)
+        return float(series.prices[-1]) if series else None
+
+    def points(self, product_id: str, period: str) -> List[Dict[str, Any]]:
+        series = self._series(product_id)
+        if not series:
+            return []
+        days, prices = series.arrays()
+        start = series.window_start(days, PRICE_PERIODS[period])
+        return [
+            {"date": date.fromordinal(d).isoformat(), "price": format_price(p)}
+            for d, p in zip(days[start:].tolist(), prices[start:].tolist())
+        ]
+
+    def statistics(self, product_ids: Sequence[str], period: str) -> Dict[str, Dict[str, Any]]:
+        """Window statistics for many products in one vectorized pass.
+
+        Each product's window is a segment of one concatenated array; sums,
+        extremes and percentiles are computed per segment with reduceat and
+        a single segment-major sort. Products without history are omitted.
+        """
+        period_days = PRICE_PERIODS[period]
+        found: List[str] = []
+        seen = set()
+        windows: List[np.ndarray] = []
+        for product_id in product_ids:
+            series = self._series(product_id)
+            if not series or product_id in seen:
+                continue
+            days, prices = series.arrays()
+            seen.add(product_id)
+            found.append(product_id)
+            windows.append(prices[series.window_start(days, period_days):])
+        if not found:
+            return {}
+
+        lengths = np.fromiter((len(w) for w in windows), dtype=np.int64, count=len(windows))
+        values = np.concatenate(windows)
+        offsets = np.zeros(len(lengths), dtype=np.int64)
+        np.cumsum(lengths[:-1], out=offsets[1:])
+
+        current = values[offsets + lengths - 1]
+        average = np.add.reduceat(values, offsets) / lengths
+        lowest = np.minimum.reduceat(values, offsets)
+        highest = np.maximum.reduceat(values, offsets)
+
+        segments = np.repeat(np.arange(len(lengths)), lengths)
+        ordered = values[np.lexsort((values, segments))]
+        percentiles = {}
+        for q in PERCENTILES:
+            position = offsets + (lengths - 1) * (q / 100)
+            below = np.floor(position).astype(np.int64)
+            above = np.minimum(below + 1, offsets + lengths - 1)
+            fraction = position - below
+            percentiles[f"p{q}"] = ordered[below] + (ordered[above] - ordered[below]) * fraction
+
+        columns = {
+            "current": current,
+            "average": np.round(average),
+            "lowest": lowest,
+            "highest": highest,
+            **{name: np.round(v) for name, v in percentiles.items()},
+        }
+        rows = {name: column.tolist() for name, column in columns.items()}
+        counts = lengths.tolist()
+        return {
+            product_id: {
+                "current": format_price(rows["current"][i]),
+                "average": int(rows["average"][i]),
+                "lowest": format_price(rows["lowest"][i]),
+                "highest": format_price(rows["highest"][i]),
+                "percentiles": {f"p{q}": int(rows[f"p{q}"][i]) for q in PERCENTILES},
+                "points": counts[i],
+            }
+            for i, product_id in enumerate(found)
+        }
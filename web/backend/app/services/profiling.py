@@ -0,0 +1,215 @@
+"""On-demand request profiling and a sampling profiler.
+
+Both are off by default and cost nothing then: the request profiler is a
+middleware installed only when ``PROFILING_TOKEN`` is set, and the sampler
+is a thread that exists only while a sampling run is active.
+"""
+
+import cProfile
+import hmac
+import io
+import itertools
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional
+
+from fastapi import HTTPException
+
+from app.config import settings
+
+PROFILE_HEADER = "x-profile-token"
+PROFILE_ID_HEADER = b"x-profile-id"
+# Admin endpoints are never profiled (they are what reads the profiles)
+ADMIN_PREFIX = "/api/admin"
+SORT_KEYS = ("cumulative", "tottime", "ncalls", "filename")
+
+
+def token_matches(token: Optional[str], supplied: Optional[str]) -> bool:
+    return bool(token) and supplied is not None and hmac.compare_digest(token.encode(), supplied.encode())
+
+
+class ProfileStore:
+    """Most recent request profiles, oldest dropped first"""
+
+    def __init__(self, keep: int, directory: Optional[str] = None):
+        self.directory = directory
+        self._profiles: Deque[Dict[str, Any]] = deque(maxlen=keep)
+        self._ids = itertools.count(1)
+
+    def next_id(self) -> str:
+        return f"prof-{os.getpid()}-{next(self._ids)}"
+
+    def add(self, entry: Dict[str, Any], profile: cProfile.Profile) -> None:
+        profile.create_stats()
+        entry["stats"] = profile.stats
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            entry["file"] = os.path.join(self.directory, f"{entry['id']}.prof")
+            profile.dump_stats(entry["file"])
+        self._profiles.append(entry)
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [{k: v for k, v in p.items() if k != "stats"} for p in reversed(self._profiles)]
+
+    def report(self, profile_id: str, sort: str = "cumulative", limit: int = 40) -> str:
+        """pstats text report of one profile"""
+        if sort not in SORT_KEYS:
+            raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(SORT_KEYS)}")
+        for entry in self._profiles:
+            if entry["id"] == profile_id:
+                break
+        else:
+            raise HTTPException(status_code=404, detail="Profile not found")
+        out = io.StringIO()
+        stats = pstats.Stats(stream=out)
+        stats.stats = entry["stats"]
+        stats.get_top_level_stats()
+        out.write(f"{entry['method']} {entry['path']} -> {entry['status']} in {entry['duration_ms']} ms\n")
+        stats.sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+
+class ProfilingMiddleware:
+    """Profiles requests that carry the admin token header with cProfile.
+
+    The profiler sees the whole event loop thread while it runs, so other
+    requests handled in the meantime show up too; only one request is
+    profiled at a time. The response gets an ``X-Profile-Id`` header naming
+    the stored profile.
+    """
+
+    def __init__(self, app, token: str, store: ProfileStore):
+        self.app = app
+        self.token = token
+        self.store = store
+        self._active = False
+
+    def _requested(self, scope) -> bool:
+        if scope["type"] != "http" or self._active or scope["path"].startswith(ADMIN_PREFIX):
+            return False
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER.encode():
+                return token_matches(self.token, value.decode("latin-1"))
+        return False
+
+    async def __call__(self, scope, receive, send) -> None:
+        if not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = self.store.next_id()
+        status = 500
+
+        async def send_wrapper(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message = {**message, "headers": [*message.get("headers", ()), (PROFILE_ID_HEADER, profile_id.encode())]}
+            await send(message)
+
+        self._active = True
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        profile.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile.disable()
+            self._active = False
+            self.store.add(
+                {
+                    "id": profile_id,
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                    "profiled_at": time.time(),
+                },
+                profile,
+            )
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Samples one thread's Python stack on a timer and writes collapsed stacks.
+
+    The output has one ``frame;frame;frame count`` line per distinct stack,
+    root first, ready for flamegraph.pl or speedscope. Sampling runs in a
+    daemon thread for a fixed duration; between runs nothing is active.
+    """
+
+    def __init__(self, directory: Optional[str], max_seconds: float):
+        self.directory = directory or os.path.join(tempfile.gettempdir(), "agenticmirror-profiles")
+        self.max_seconds = max_seconds
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.last: Optional[Dict[str, Any]] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds: float, interval: float, thread_id: Optional[int] = None) -> Dict[str, Any]:
+        """Sample ``thread_id`` (default: the calling thread, i.e. the event loop)"""
+        if self.running:
+            raise HTTPException(status_code=409, detail="Sampling profiler is already running")
+        if not 0 < seconds <= self.max_seconds:
+            raise HTTPException(status_code=400, detail=f"seconds must be in (0, {self.max_seconds:g}]")
+        if not 0.0005 <= interval <= 1:
+            raise HTTPException(status_code=400, detail="interval must be between 0.5 ms and 1 s")
+        os.makedirs(self.directory, exist_ok=True)
+        self.last = {
+            "status": "running",
+            "seconds": seconds,
+            "interval_ms": round(interval * 1000, 3),
+            "samples": 0,
+            "started_at": time.time(),
+            "path": os.path.join(self.directory, f"sample-{os.getpid()}-{int(time.time())}.collapsed"),
+        }
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(thread_id or threading.get_ident(), seconds, interval, self.last),
+            name="sampling-profiler",
+            daemon=True,
+        )
+        self._thread.start()
+        return dict(self.last)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self, thread_id: int, seconds: float, interval: float, state: Dict[str, Any]) -> None:
+        stacks: Counter = Counter()
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline and not self._stop.is_set():
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                state["status"] = "thread exited"
+                break
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            stacks[";".join(reversed(labels))] += 1
+            state["samples"] += 1
+            self._stop.wait(interval)
+        with open(state["path"], "w", encoding="utf-8") as out:
+            for stack, count in stacks.most_common():
+                out.write(f"{stack} {count}\n")
+        state["stacks"] = len(stacks)
+        if state["status"] == "running":
+            state["status"] = "stopped" if self._stop.is_set() else "done"
+
+
+profiles = ProfileStore(settings.PROFILING_KEEP, settings.PROFILING_DIR)
+sampler = SamplingProfiler(settings.PROFILING_DIR, settings.PROFILING_MAX_SECONDS)
@@ -0,0 +1,323 @@
+"""Feature-vector product embeddings with top-k scoring"""
+
+import math
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.catalog import CatalogStore
+from app.services.skin_engine import metric_health
+
+# Weight of each feature group in a product vector
+FEATURE_WEIGHTS = {
+    "concern": 1.0,
+    "skin": 0.6,
+    "brand": 0.4,
+    "price": 0.4,
+    "category": 0.3,
+}
+
+# Upper bounds of the price bands; prices above the last fall in an open band
+PRICE_BANDS = (100, 200, 400, 800)
+
+# Weight of the user's own signals in the query vector
+EXPLICIT_CONCERN_WEIGHT = 1.0
+PROFILE_CONCERN_WEIGHT = 0.7
+SKIN_TYPE_WEIGHT = 1.0
+ALL_SKIN_TYPES_WEIGHT = 0.8
+BRAND_WEIGHT = 0.5
+BUDGET_WEIGHT = 0.5
+
+# Popularity nudge added to every score, so ties go to well-reviewed products
+POPULARITY_WEIGHT = 0.05
+POPULARITY_SCALE = math.log1p(100_000)
+
+# Profile and analysis concern names -> product ``skin_concerns`` values
+CONCERN_ALIASES = {
+    "mild_acne": "acne",
+    "spots": "acne",
+    "uneven_tone": "brightness",
+    "dullness": "brightness",
+    "dark_circles": "dark-circles",
+    "oil": "oil-control",
+    "wrinkles": "anti-aging",
+    "fine_lines": "anti-aging",
+    "dryness": "hydration",
+    "redness": "sensitivity",
+}
+
+CONCERN_LABELS = {
+    "anti-aging": "抗老",
+    "hydration": "补水",
+    "brightness": "提亮",
+    "coverage": "遮瑕",
+    "longevity": "持妆",
+    "pores": "毛孔",
+    "acne": "祛痘",
+    "oil-control": "控油",
+    "sensitivity": "舒缓敏感",
+    "dark-circles": "黑眼圈",
+}
+
+
+def price_band(price: float) -> int:
+    return bisect_right(PRICE_BANDS, price)
+
+
+def product_concern(name: str) -> str:
+    return CONCERN_ALIASES.get(name, name)
+
+
+def product_features(product: Dict[str, Any]) -> Dict[str, float]:
+    """Weighted features of a product, before normalization"""
+    features: Dict[str, float] = {}
+    for concern in product.get("skin_concerns") or ():
+        features[f"concern:{concern}"] = FEATURE_WEIGHTS["concern"]
+    for skin_type in product.get("suitable_skin_types") or ("all",):
+        features[f"skin:{skin_type}"] = FEATURE_WEIGHTS["skin"]
+    if product.get("brand"):
+        features[f"brand:{product['brand']}"] = FEATURE_WEIGHTS["brand"]
+    if product.get("price") is not None:
+        features[f"price:{price_band(product['price'])}"] = FEATURE_WEIGHTS["price"]
+    if product.get("category"):
+        features[f"category:{product['category']}"] = FEATURE_WEIGHTS["category"]
+    return features
+
+
+def user_features(
+    skin_profile: Optional[Dict[str, Any]] = None,
+    preferences: Optional[Dict[str, Any]] = None,
+    metrics: Optional[Dict[str, Any]] = None,
+    concerns: Iterable[str] = (),
+) -> Dict[str, float]:
+    """Query features from a user's profile, latest analysis and explicit concerns.
+
+    Analysis metrics weigh in by how far they are from healthy, so the
+    weakest metrics pull hardest.
+    """
+    skin_profile = skin_profile or {}
+    preferences = preferences or {}
+    features: Dict[str, float] = {}
+
+    def add(feature: str, weight: float) -> None:
+        features[feature] = features.get(feature, 0.0) + weight
+
+    for concern in concerns:
+        add(f"concern:{product_concern(concern)}", EXPLICIT_CONCERN_WEIGHT)
+    for concern in skin_profile.get("concerns") or ():
+        add(f"concern:{product_concern(concern)}", PROFILE_CONCERN_WEIGHT)
+    for metric, value in (metrics or {}).items():
+        score = value.get("score") if isinstance(value, dict) else value
+        if score is not None:
+            add(f"concern:{product_concern(metric)}", (100 - metric_health(metric, score)) / 100)
+
+    if skin_profile.get("skin_type"):
+        add(f"skin:{skin_profile['skin_type']}", SKIN_TYPE_WEIGHT)
+    add("skin:all", ALL_SKIN_TYPES_WEIGHT)
+    for brand in preferences.get("brands") or ():
+        add(f"brand:{brand}", BRAND_WEIGHT)
+    budget = preferences.get("budget_range")
+    if budget:
+        for band in range(price_band(budget[0]), price_band(budget[-1]) + 1):
+            add(f"price:{band}", BUDGET_WEIGHT)
+    return features
+
+
+def match_reason(feature: Optional[str], product: Dict[str, Any]) -> str:
+    """Recommendation reason for the feature that contributed most"""
+    group, _, value = (feature or "").partition(":")
+    if group == "concern":
+        return f"针对您的{CONCERN_LABELS.get(value, value)}需求"
+    if group == "skin":
+        return "适合所有肤质" if value == "all" else f"适合您的{value}肤质"
+    if group == "brand":
+        return f"来自您喜爱的品牌 {value}"
+    if group == "price":
+        return "符合您的预算"
+    return f"适合您的{product.get('suitable_skin_types', ['all'])[0]}肤质"
+
+
+class ProductEmbeddings:
+    """Unit-length feature vectors for every product, one row each.
+
+    The vocabulary of features grows as products mention new values; rows
+    and columns are preallocated and doubled on demand. Scoring a query is a
+    single matrix-vector product over the live rows followed by an
+    ``argpartition`` top-k, so only the k winners are sorted.
+
+    ``restore`` serves the rows from arrays it doesn't own (e.g. mapped from
+    a snapshot); they are copied on the first change.
+    """
+
+    def __init__(self, capacity: int = 1024, features: int = 64):
+        self._columns: Dict[str, int] = {}
+        self._features: List[str] = []
+        # None while serving restored rows, until the first change
+        self._rows: Optional[Dict[Any, int]] = {}
+        self._ids: Sequence[Any] = []
+        self._free: List[int] = []
+        self._matrix = np.zeros((capacity, features), dtype=np.float32)
+        self._popularity = np.zeros(capacity, dtype=np.float32)
+        self._active = np.zeros(capacity, dtype=bool)
+
+    @classmethod
+    def for_store(cls, store: CatalogStore) -> "ProductEmbeddings":
+        """Encode a store's products and keep them in sync with its changes"""
+        embeddings = cls(capacity=max(1024, len(store)))
+        for item in store:
+            embeddings.set(item[store.key], item)
+
+        def on_change(item_id, old, new):
+            if item_id is None:
+                embeddings.clear()
+            elif new is None:
+                embeddings.remove(item_id)
+            else:
+                embeddings.set(item_id, new)
+
+        store.subscribe(on_change)
+        return embeddings
+
+    def __len__(self) -> int:
+        return len(self._ids) if self._rows is None else len(self._rows)
+
+    def _column(self, feature: str) -> int:
+        column = self._columns.get(feature)
+        if column is None:
+            column = self._columns[feature] = len(self._features)
+            self._features.append(feature)
+            if column == self._matrix.shape[1]:
+                grown = np.zeros((self._matrix.shape[0], column * 2), dtype=np.float32)
+                grown[:, :column] = self._matrix
+                self._matrix = grown
+        return column
+
+    def _allocate(self) -> int:
+        if self._free:
+            return self._free.pop()
+        row = len(self._ids)
+        if row == len(self._matrix):
+            self._matrix = np.concatenate([self._matrix, np.zeros_like(self._matrix)])
+            self._popularity = np.concatenate([self._popularity, np.zeros_like(self._popularity)])
+            self._active = np.concatenate([self._active, np.zeros_like(self._active)])
+        self._ids.append(None)
+        return row
+
+    def set(self, product_id: Any, product: Dict[str, Any]) -> None:
+        """Encode (or re-encode) one product in place"""
+        if self._rows is None:
+            self._thaw()
+        row = self._rows.get(product_id)
+        if row is None:
+            row = self._rows[product_id] = self._allocate()
+            self._ids[row] = product_id
+        features = product_features(product)
+        columns = [self._column(feature) for feature in features]
+        vector = self._matrix[row]
+        vector[:] = 0
+        vector[columns] = list(features.values())
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        reviews = product.get("review_count") or 0
+        self._popularity[row] = min(math.log1p(reviews) / POPULARITY_SCALE, 1.0)
+        self._active[row] = True
+
+    def remove(self, product_id: Any) -> bool:
+        if self._rows is None:
+            self._thaw()
+        row = self._rows.pop(product_id, None)
+        if row is None:
+            return False
+        self._matrix[row] = 0
+        self._popularity[row] = 0
+        self._active[row] = False
+        self._ids[row] = None
+        self._free.append(row)
+        return True
+
+    def clear(self) -> None:
+        # Fresh arrays rather than zeroing: restored ones may be shared
+        self._rows = {}
+        self._ids = []
+        self._free = []
+        self._matrix = np.zeros(self._matrix.shape, dtype=np.float32)
+        self._popularity = np.zeros(len(self._popularity), dtype=np.float32)
+        self._active = np.zeros(len(self._active), dtype=bool)
+
+    def export_segment(self) -> Tuple[List[str], List[Any], np.ndarray, np.ndarray]:
+        """Feature names, then ids, vectors and popularity of the live rows in row order"""
+        live = np.flatnonzero(self._active[:len(self._ids)])
+        ids = [self._ids[row] for row in live.tolist()]
+        return self._features, ids, self._matrix[live, :len(self._features)], self._popularity[live]
+
+    def restore(self, features: List[str], ids: Sequence[Any], matrix: np.ndarray, popularity: np.ndarray) -> None:
+        """Serve ``export_segment()`` output; the arrays are used as given, not copied"""
+        self.clear()
+        if not len(ids) or not features:
+            return
+        self._features = list(features)
+        self._columns = {feature: column for column, feature in enumerate(self._features)}
+        self._ids = ids
+        self._rows = None
+        self._matrix = matrix
+        self._popularity = popularity
+        self._active = np.ones(len(ids), dtype=bool)
+
+    def _thaw(self) -> None:
+        self._ids = list(self._ids)
+        self._rows = {product_id: row for row, product_id in enumerate(self._ids)}
+        self._matrix = self._matrix.copy()
+        self._popularity = self._popularity.copy()
+
+    def query_vector(self, features: Dict[str, float]) -> np.ndarray:
+        """Unit-length dense query; features no product has are dropped"""
+        query = np.zeros(self._matrix.shape[1], dtype=np.float32)
+        for feature, weight in features.items():
+            column = self._columns.get(feature)
+            if column is not None:
+                query[column] += weight
+        norm = np.linalg.norm(query)
+        return query / norm if norm else query
+
+    def top_k(
+        self,
+        features: Dict[str, float],
+        k: int,
+        category: Optional[str] = None,
+    ) -> List[Tuple[Any, float, Optional[str]]]:
+        """Best ``k`` products as ``(product_id, score, top feature)``.
+
+        Scores are the cosine similarity plus the popularity nudge.
+        """
+        n = len(self._ids)
+        if k <= 0 or not n:
+            return []
+        live = self._active[:n]
+        if category is not None:
+            column = self._columns.get(f"category:{category}")
+            if column is None:
+                return []
+            live = live & (self._matrix[:n, column] > 0)
+        candidates = int(np.count_nonzero(live))
+        if not candidates:
+            return []
+        k = min(k, candidates)
+
+        query = self.query_vector(features)
+        scores = self._matrix[:n] @ query + POPULARITY_WEIGHT * self._popularity[:n]
+        scores[~live] = -np.inf
+        top = np.argpartition(-scores, k - 1)[:k] if k < n else np.arange(n)
+        # Highest score first, ties by row (insertion order)
+        top = top[np.lexsort((top, -scores[top]))][:k]
+
+        contributions = self._matrix[top] * query
+        best = contributions.argmax(axis=1)
+        has_best = contributions[np.arange(len(top)), best] > 0
+        return [
+            (self._ids[row], score, self._features[column] if matched else None)
+            for row, score, column, matched in zip(
+                top.tolist(), scores[top].tolist(), best.tolist(), has_best.tolist()
+            )
+        ]
@@ -0,0 +1,222 @@
+"""Periodic batch re-forecast of every inventory item"""
+
+import asyncio
+import time
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional
+from uuid import uuid4
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db.models import InventoryItem
+from app.db.repositories import InventoryRepository, JobLeaseRepository, ReplenishEventRepository
+from app.services.forecast import STATUSES, STATUS_CODES, day_numbers, epoch_day, forecast
+
+# Lease row naming the worker that runs the job
+LEASE_NAME = "replenish"
+
+# Shortest lease, so a run-once job (interval 0) still keeps other workers out
+MIN_LEASE_SECONDS = 60
+
+FORECAST_COLUMNS = (
+    InventoryItem.id,
+    InventoryItem.user_id,
+    InventoryItem.product_id,
+    InventoryItem.remaining_percent,
+    InventoryItem.usage_rate,
+    InventoryItem.estimated_days_left,
+    InventoryItem.open_date,
+    InventoryItem.measured_at,
+    InventoryItem.status,
+)
+
+
+def _floats(values) -> np.ndarray:
+    # numpy converts None to NaN for float arrays
+    return np.array(values, dtype=np.float64)
+
+
+def _status_codes(values) -> np.ndarray:
+    statuses = np.array(values, dtype=object)
+    return np.select(
+        [statuses == "critical", statuses == "running_low"],
+        [STATUS_CODES["critical"], STATUS_CODES["running_low"]],
+        STATUS_CODES["good"],
+    ).astype(np.int8)
+
+
+class ReplenishJob:
+    """Re-forecasts inventory in chunks and records escalations.
+
+    Each run walks ``inventory_items`` by primary key in chunks of
+    ``chunk_size`` rows, forecasts every chunk in one vectorized call and
+    writes back only rows whose rate, days left or status changed. Items
+    whose status got worse become replenish events, stored in the database
+    so every worker serves the same feed.
+
+    Only one worker runs the schedule: each run first takes or renews a
+    lease row, and workers that don't hold it skip the run. A lease outlives
+    two intervals, so another worker takes over if the holder goes away.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        chunk_size: int = 50_000,
+        events_per_user: int = 20,
+        max_events: int = 1_000_000,
+    ):
+        self.interval = interval
+        self.chunk_size = chunk_size
+        self.events_per_user = events_per_user
+        self.max_events = max_events
+        self.lease_seconds = max(2 * interval, MIN_LEASE_SECONDS)
+        self.owner = uuid4().hex
+        self.last_run: Optional[Dict[str, Any]] = None
+        self._session_factory: Optional[Callable[[], AsyncSession]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self, session: AsyncSession, as_of: Optional[date] = None) -> Dict[str, Any]:
+        started = time.perf_counter()
+        today = float(epoch_day(as_of or date.today()))
+        repository = InventoryRepository(session)
+        events = ReplenishEventRepository(session)
+        scanned = updated = escalated = 0
+        last_id = None
+
+        while True:
+            query = select(*FORECAST_COLUMNS).order_by(InventoryItem.id).limit(self.chunk_size)
+            if last_id is not None:
+                query = query.where(InventoryItem.id > last_id)
+            rows = (await session.execute(query)).all()
+            if not rows:
+                break
+            ids, users, products, remaining, rates, days_left, opened, measured, statuses = zip(*rows)
+            last_id = ids[-1]
+            scanned += len(ids)
+
+            old_rate = _floats(rates)
+            old_days = _floats(days_left)
+            old_status = _status_codes(statuses)
+            result = forecast(
+                np.array(remaining, dtype=np.float64),
+                old_rate,
+                old_days,
+                day_numbers(opened),
+                day_numbers(measured),
+                today,
+            )
+
+            changed = np.flatnonzero(
+                ~np.isclose(result["usage_rate"], old_rate)
+                | (result["days_left"] != old_days)
+                | (result["status"] != old_status)
+            )
+            if len(changed):
+                await repository.bulk_update(
+                    {
+                        "id": ids[i],
+                        "usage_rate": rate,
+                        "estimated_days_left": days,
+                        "status": STATUSES[status],
+                    }
+                    for i, rate, days, status in zip(
+                        changed.tolist(),
+                        result["usage_rate"][changed].tolist(),
+                        result["days_left"][changed].tolist(),
+                        result["status"][changed].tolist(),
+                    )
+                )
+                updated += len(changed)
+
+            worse = np.flatnonzero(result["status"] > old_status)
+            if len(worse):
+                await events.bulk_insert(
+                    {
+                        "user_id": users[i],
+                        "inventory_id": ids[i],
+                        "product_id": products[i],
+                        "status": STATUSES[status],
+                        "days_left": days,
+                    }
+                    for i, days, status in zip(
+                        worse.tolist(),
+                        result["days_left"][worse].tolist(),
+                        result["status"][worse].tolist(),
+                    )
+                )
+            escalated += len(worse)
+
+        await events.trim(self.max_events)
+
+        self.last_run = {
+            "as_of": (as_of or date.today()).isoformat(),
+            "scanned": scanned,
+            "updated": updated,
+            "escalated": escalated,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+        return self.last_run
+
+    async def record(
+        self,
+        session: AsyncSession,
+        user_id: str,
+        inventory_id: str,
+        product_id: str,
+        status: str,
+        days_left: int,
+    ) -> None:
+        await ReplenishEventRepository(session).add(
+            user_id=user_id,
+            inventory_id=inventory_id,
+            product_id=product_id,
+            status=status,
+            days_left=days_left,
+        )
+
+    async def events_for(self, session: AsyncSession, user_id: str, after: int = 0) -> List[Dict[str, Any]]:
+        events = await ReplenishEventRepository(session).since(user_id, after, self.events_per_user)
+        return [event.to_dict() for event in events]
+
+    async def run_forever(self, session_factory: Callable[[], AsyncSession]) -> None:
+        while True:
+            try:
+                async with session_factory() as session:
+                    leases = JobLeaseRepository(session)
+                    if await leases.acquire(LEASE_NAME, self.owner, self.lease_seconds, time.time()):
+                        await self.run_once(session)
+            except Exception as exc:  # keep the schedule alive
+                print(f"Replenish job failed: {exc!r}")
+            if self.interval <= 0:
+                return
+            await asyncio.sleep(self.interval)
+
+    def start(self, session_factory: Callable[[], AsyncSession]) -> None:
+        if self._task is None:
+            self._session_factory = session_factory
+            self._task = asyncio.create_task(self.run_forever(session_factory))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            # Hand the schedule to another worker straight away
+            try:
+                async with self._session_factory() as session:
+                    await JobLeaseRepository(session).release(LEASE_NAME, self.owner)
+            except Exception as exc:
+                print(f"Replenish lease release failed: {exc!r}")
+
+
+replenish_job = ReplenishJob(
+    interval=settings.REPLENISH_INTERVAL_SECONDS,
+    chunk_size=settings.REPLENISH_CHUNK_SIZE,
+)
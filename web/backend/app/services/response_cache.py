@@ -0,0 +1,97 @@
+"""Pre-serialized response cache with ETag support"""
+
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, NamedTuple, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from app.config import settings
+
+
+class CachedResponse(NamedTuple):
+    version: Hashable
+    body: bytes
+    etag: str
+
+
+def encode_json(data: Any) -> bytes:
+    """Encode like FastAPI's JSONResponse"""
+    return json.dumps(
+        jsonable_encoder(data),
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: W/"x" matches "x"
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+
+class ResponseCache:
+    """LRU of encoded JSON bodies keyed by route path and normalized query.
+
+    Each entry records the data ``version`` it was built from (typically a
+    CatalogStore version or revision); a lookup with a different version
+    rebuilds the entry, so writes invalidate without explicit bookkeeping.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_age: int = 10):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries: "OrderedDict[Tuple[str, Tuple[Tuple[str, str], ...]], CachedResponse]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key_for(request: Request) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+        return request.url.path, tuple(sorted(request.query_params.multi_items()))
+
+    def _headers(self, etag: str) -> dict:
+        return {
+            "ETag": etag,
+            "Cache-Control": f"public, max-age={self.max_age}",
+        }
+
+    def get_entry(self, key, version: Hashable, build: Callable[[], Any]) -> CachedResponse:
+        entry = self._entries.get(key)
+        if entry is not None and entry.version == version:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        body = encode_json(build())
+        etag = f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+        entry = CachedResponse(version, body, etag)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def respond(self, request: Request, version: Hashable, build: Callable[[], Any]) -> Response:
+        """Serve ``build()`` from cache, answering If-None-Match with 304"""
+        entry = self.get_entry(self.key_for(request), version, build)
+        headers = self._headers(entry.etag)
+        if etag_matches(request.headers.get("if-none-match"), entry.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+response_cache = ResponseCache(
+    max_entries=settings.RESPONSE_CACHE_SIZE,
+    max_age=settings.RESPONSE_CACHE_MAX_AGE,
+)
@@ -0,0 +1,419 @@
+"""CJK-aware inverted index with BM25 ranking"""
+
+import heapq
+import math
+import re
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.catalog import CatalogStore
+
+# Latin words/digits, or runs of CJK ideographs
+TOKEN_RE = re.compile(r"[a-z0-9]+|[㐀-䶿一-鿿豈-﫿]+")
+
+# Field -> weight applied to its term frequencies (BM25F-style)
+DEFAULT_FIELDS = {
+    "name": 3.0,
+    "brand": 2.5,
+    "name_en": 2.0,
+    "subcategory": 1.5,
+    "description": 1.0,
+}
+
+# Max vocabulary terms a trailing Latin prefix expands to
+MAX_PREFIX_EXPANSIONS = 32
+
+
+def _is_cjk(token: str) -> bool:
+    return not token[0].isascii()
+
+
+def tokenize(text: str) -> List[str]:
+    """Index-side tokens: Latin words plus CJK unigrams and bigrams"""
+    tokens = []
+    for token in TOKEN_RE.findall(text.lower()):
+        if _is_cjk(token):
+            tokens.extend(token)
+            tokens.extend(token[i:i + 2] for i in range(len(token) - 1))
+        else:
+            tokens.append(token)
+    return tokens
+
+
+def tokenize_query(text: str) -> Tuple[List[str], Optional[str]]:
+    """Query-side tokens and the trailing Latin prefix (if the query ends in one).
+
+    CJK runs use bigrams only, which keeps multi-character queries close to
+    phrase matching; single characters fall back to unigrams.
+    """
+    tokens = []
+    raw = TOKEN_RE.findall(text.lower())
+    for token in raw:
+        if _is_cjk(token):
+            if len(token) == 1:
+                tokens.append(token)
+            else:
+                tokens.extend(token[i:i + 2] for i in range(len(token) - 1))
+        else:
+            tokens.append(token)
+
+    prefix = None
+    if raw and not _is_cjk(raw[-1]) and text[-1:].isalnum():
+        prefix = raw[-1]
+    return tokens, prefix
+
+
+class SearchSegment:
+    """Read-only postings over the documents of a record collection.
+
+    ``terms`` is the sorted vocabulary; the postings of ``terms[t]`` are
+    ``docs[starts[t]:starts[t + 1]]`` (document positions, ascending) with
+    their weighted term frequencies in ``tfs``. ``records[pos]`` is the
+    document at a position and ``records.keys[pos]`` its id.
+    """
+
+    def __init__(
+        self,
+        records: Any,
+        terms: Sequence[str],
+        starts: np.ndarray,
+        docs: np.ndarray,
+        tfs: np.ndarray,
+        doc_len: np.ndarray,
+        doc_count: int,
+        total_len: float,
+    ):
+        self.records = records
+        self.terms = terms
+        self.starts = starts
+        self.docs = docs
+        self.tfs = tfs
+        self.doc_len = doc_len
+        self.doc_count = doc_count
+        self.total_len = total_len
+
+    def term(self, term: str) -> Optional[int]:
+        i = bisect_left(self.terms, term)
+        return i if i < len(self.terms) and self.terms[i] == term else None
+
+    def postings(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        t = self.term(term)
+        if t is None:
+            return self.docs[:0], self.tfs[:0]
+        start, end = self.starts[t:t + 2].tolist()
+        return self.docs[start:end], self.tfs[start:end]
+
+    def df(self, term: str) -> int:
+        t = self.term(term)
+        return 0 if t is None else int(self.starts[t + 1] - self.starts[t])
+
+
+class SearchIndex:
+    """Inverted index over selected document fields.
+
+    Postings map ``term -> {doc_id: weighted_tf}``; each document remembers
+    its own term frequencies so updates and removals only touch the terms the
+    document contains. Queries are scored with BM25 using term-at-a-time
+    MaxScore pruning: once the k-th best partial score exceeds what the
+    remaining terms could add, no new candidates are admitted.
+
+    ``restore`` serves the index from a ``SearchSegment`` instead, scoring
+    with numpy over its arrays; the first change copies it back into
+    dictionaries.
+    """
+
+    def __init__(
+        self,
+        fields: Optional[Dict[str, float]] = None,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ):
+        self.fields = fields or DEFAULT_FIELDS
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[Any, float]] = {}
+        self._doc_terms: Dict[Any, Dict[str, float]] = {}
+        self._doc_len: Dict[Any, float] = {}
+        self._total_len = 0.0
+        self._vocabulary: List[str] = []  # sorted, for prefix expansion
+        self._docs: Dict[Any, Dict[str, Any]] = {}
+        self._segment: Optional[SearchSegment] = None
+
+    @classmethod
+    def for_store(cls, store: CatalogStore, fields: Optional[Dict[str, float]] = None) -> "SearchIndex":
+        """Build an index over a store and keep it in sync with its changes"""
+        index = cls(fields)
+        for item in store:
+            index.add(item[store.key], item)
+
+        def on_change(item_id, old, new):
+            if item_id is None:
+                index.clear()
+            elif new is None:
+                index.remove(item_id)
+            else:
+                index.add(item_id, new)
+
+        store.subscribe(on_change)
+        return index
+
+    def __len__(self) -> int:
+        if self._segment is not None:
+            return self._segment.doc_count
+        return len(self._doc_terms)
+
+    def _analyze(self, doc: Dict[str, Any]) -> Dict[str, float]:
+        terms: Dict[str, float] = {}
+        for field, weight in self.fields.items():
+            value = doc.get(field)
+            if not value:
+                continue
+            for token in tokenize(str(value)):
+                terms[token] = terms.get(token, 0.0) + weight
+        return terms
+
+    def add(self, doc_id: Any, doc: Dict[str, Any]) -> None:
+        if self._segment is not None:
+            self._thaw()
+        terms = self._analyze(doc)
+        if self._doc_terms.get(doc_id) == terms:
+            self._docs[doc_id] = doc
+            return
+        self.remove(doc_id)
+
+        for term, tf in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                insort(self._vocabulary, term)
+            postings[doc_id] = tf
+        length = sum(terms.values())
+        self._doc_terms[doc_id] = terms
+        self._doc_len[doc_id] = length
+        self._total_len += length
+        self._docs[doc_id] = doc
+
+    def remove(self, doc_id: Any) -> None:
+        if self._segment is not None:
+            self._thaw()
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+                del self._vocabulary[bisect_left(self._vocabulary, term)]
+        self._total_len -= self._doc_len.pop(doc_id)
+        del self._docs[doc_id]
+
+    def clear(self) -> None:
+        self._postings = {}
+        self._doc_terms = {}
+        self._doc_len = {}
+        self._vocabulary = []
+        self._docs = {}
+        self._total_len = 0.0
+        self._segment = None
+
+    def export_segment(
+        self, ids: Sequence[Any]
+    ) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray, np.ndarray, int, float]:
+        """Postings by document position in ``ids``, the arrays of a ``SearchSegment``"""
+        if self._segment is not None:
+            self._thaw()
+        position = {doc_id: i for i, doc_id in enumerate(ids)}
+        terms = list(self._vocabulary)
+        starts = np.zeros(len(terms) + 1, dtype=np.uint64)
+        docs: List[int] = []
+        tfs: List[float] = []
+        for t, term in enumerate(terms):
+            for doc, tf in sorted((position[doc_id], tf) for doc_id, tf in self._postings[term].items()):
+                docs.append(doc)
+                tfs.append(tf)
+            starts[t + 1] = len(docs)
+        doc_len = np.zeros(len(ids), dtype=np.float64)
+        for doc_id, length in self._doc_len.items():
+            doc_len[position[doc_id]] = length
+        return (
+            terms,
+            starts,
+            np.array(docs, dtype=np.int32),
+            np.array(tfs, dtype=np.float64),
+            doc_len,
+            len(self._doc_terms),
+            self._total_len,
+        )
+
+    def restore(self, segment: SearchSegment) -> None:
+        """Serve the index from a segment; nothing is copied until a change"""
+        self.clear()
+        self._segment = segment
+        self._vocabulary = segment.terms
+        self._total_len = segment.total_len
+
+    def _thaw(self) -> None:
+        segment = self._segment
+        self.clear()
+        ids = segment.records.keys
+        for position in range(len(ids)):
+            self.add(ids[position], segment.records[position])
+
+    def _expand_prefix(self, prefix: str) -> List[str]:
+        vocabulary = self._vocabulary
+        start = bisect_left(vocabulary, prefix)
+        expanded = []
+        for i in range(start, min(start + MAX_PREFIX_EXPANSIONS, len(vocabulary))):
+            term = vocabulary[i]
+            if not term.startswith(prefix):
+                break
+            expanded.append(term)
+        return expanded
+
+    def _df(self, term: str) -> int:
+        if self._segment is not None:
+            return self._segment.df(term)
+        return len(self._postings.get(term, ()))
+
+    def _query_terms(self, query: str) -> List[Tuple[str, float]]:
+        """Distinct query terms with their query weight"""
+        tokens, prefix = tokenize_query(query)
+        weights: Dict[str, float] = {}
+        for token in tokens:
+            if token != prefix:
+                weights[token] = weights.get(token, 0.0) + 1.0
+        if prefix:
+            # Exact match on the prefix scores fully; expansions score lower
+            weights[prefix] = weights.get(prefix, 0.0) + 1.0
+            for term in self._expand_prefix(prefix):
+                if term != prefix:
+                    weights.setdefault(term, 0.5)
+        return [(t, w) for t, w in weights.items() if self._df(t)]
+
+    def _idf(self, term: str) -> float:
+        n = len(self)
+        df = self._df(term)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        after: Optional[Sequence[Any]] = None,
+        count_total: bool = True,
+    ) -> Tuple[List[Dict[str, Any]], Optional[int], Optional[Tuple[float, Any]]]:
+        """Rank documents for ``query``.
+
+        Returns the top ``limit`` documents ordered by ``(-score, doc_id)``,
+        the total number of matches (when ``count_total``), and the sort key
+        of the last document when more results follow. ``after`` resumes
+        strictly after such a key.
+        """
+        terms = self._query_terms(query)
+        if not terms:
+            return [], 0 if count_total else None, None
+
+        k1, b = self.k1, self.b
+        avgdl = self._total_len / max(len(self), 1)
+        doc_len = self._doc_len
+        after_key = tuple(after) if after is not None else None
+
+        # Upper bound of a term's contribution is reached as tf -> infinity
+        scored = []
+        for term, weight in terms:
+            idf = self._idf(term) * weight
+            scored.append((idf * (k1 + 1), idf, term))
+        scored.sort(reverse=True)
+        if self._segment is not None:
+            return self._search_segment(scored, avgdl, limit, after_key, count_total)
+        remaining_bound = [0.0] * (len(scored) + 1)
+        for i in range(len(scored) - 1, -1, -1):
+            remaining_bound[i] = remaining_bound[i + 1] + scored[i][0]
+
+        scores: Dict[Any, float] = {}
+        threshold: Optional[float] = None
+        admitting = True
+        for i, (_, idf, term) in enumerate(scored):
+            if admitting and threshold is not None and threshold >= remaining_bound[i]:
+                # Unseen documents can no longer reach the top k. Only used
+                # on the first page: resuming excludes higher-scoring docs,
+                # which would make the partial-score threshold too high.
+                admitting = False
+            postings = self._postings[term]
+            if admitting:
+                candidates: Iterable[Any] = postings.keys()
+            elif len(scores) < len(postings):
+                candidates = [d for d in scores if d in postings]
+            else:
+                candidates = [d for d in postings if d in scores]
+
+            for doc_id in candidates:
+                tf = postings[doc_id]
+                norm = k1 * (1 - b + b * doc_len[doc_id] / avgdl)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+
+            # One extra slot so a pruned tail still yields a next-page key
+            if admitting and after_key is None and 0 < limit < len(scores):
+                threshold = heapq.nlargest(limit + 1, scores.values())[-1]
+
+        keys: Iterable[Tuple[float, Any]] = ((-score, doc_id) for doc_id, score in scores.items())
+        if after_key is not None:
+            keys = (key for key in keys if key > after_key)
+        ranked = heapq.nsmallest(max(limit, 0) + 1, keys)
+        next_key = ranked[limit - 1] if len(ranked) > limit > 0 else None
+
+        total = None
+        if count_total:
+            total = len(set().union(*(self._postings[t].keys() for _, _, t in scored)))
+        return [self._docs[doc_id] for _, doc_id in ranked[:limit]], total, next_key
+
+    def _search_segment(
+        self,
+        scored: List[Tuple[float, float, str]],
+        avgdl: float,
+        limit: int,
+        after_key: Optional[Tuple[float, Any]],
+        count_total: bool,
+    ) -> Tuple[List[Dict[str, Any]], Optional[int], Optional[Tuple[float, Any]]]:
+        """``search`` over the segment: every posting is scored, in bulk.
+
+        Terms are added in the same order and with the same arithmetic as
+        the dictionary path, so scores and rankings match it exactly.
+        """
+        segment = self._segment
+        k1, b = self.k1, self.b
+        scores = np.zeros(len(segment.doc_len), dtype=np.float64)
+        matched = np.zeros(len(scores), dtype=bool)
+        for _, idf, term in scored:
+            docs, tfs = segment.postings(term)
+            norm = k1 * (1 - b + b * segment.doc_len[docs] / avgdl)
+            scores[docs] += idf * tfs * (k1 + 1) / (tfs + norm)
+            matched[docs] = True
+
+        positions = np.flatnonzero(matched)
+        total = len(positions) if count_total else None
+        values = scores[positions]
+        ids = segment.records.keys
+        ranked: List[Tuple[float, Any, int]] = []
+        if after_key is not None:
+            # Equal scores resume by id; everything else is below the bound
+            bound = -after_key[0]
+            ranked = sorted(
+                (after_key[0], ids[p], p) for p in positions[values == bound].tolist() if ids[p] > after_key[1]
+            )
+            keep = values < bound
+            positions, values = positions[keep], values[keep]
+
+        wanted = max(limit, 0) + 1 - len(ranked)
+        if wanted > 0:
+            if len(values) > wanted:
+                # Everything scoring at least the wanted-th best, ties included
+                keep = values >= np.partition(values, len(values) - wanted)[len(values) - wanted]
+                positions, values = positions[keep], values[keep]
+            ranked += sorted((-score, ids[p], p) for p, score in zip(positions.tolist(), values.tolist()))
+        ranked = ranked[:max(limit, 0) + 1]
+        next_key = ranked[limit - 1][:2] if len(ranked) > limit > 0 else None
+        return [segment.records[p] for _, _, p in ranked[:limit]], total, next_key
@@ -0,0 +1,210 @@
+"""Skin metric computation, run in a process pool"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.config import settings
+
+# metric -> [(min health, status)], best first
+METRIC_STATUSES = {
+    "hydration": [(75, "good"), (55, "moderate"), (0, "dry")],
+    "oil": [(55, "good"), (35, "moderate"), (0, "oily")],
+    "pores": [(75, "fine"), (50, "visible"), (0, "enlarged")],
+    "wrinkles": [(80, "minimal"), (60, "fine_lines"), (0, "visible")],
+    "dark_circles": [(75, "none"), (55, "mild"), (0, "noticeable")],
+    "acne": [(85, "clear"), (65, "few"), (0, "active")],
+    "sensitivity": [(75, "low"), (55, "moderate"), (0, "high")],
+    "brightness": [(65, "good"), (45, "moderate"), (0, "dull")],
+}
+
+# metric -> (zone, issue, advice) used when a metric is not in its best state
+METRIC_CONCERNS = {
+    "oil": ("t-zone", "oil", "建议使用平衡型爽肤水调理T区油脂分泌"),
+    "hydration": ("cheeks", "dryness", "晚间护肤可加入补水精华，改善面颊干燥"),
+    "pores": ("nose", "pores", "定期清洁鼻翼，搭配收敛型化妆水"),
+    "acne": ("forehead", "spots", "减少刺激性产品，局部使用祛痘护理"),
+    "dark_circles": ("under-eye", "dark_circles", "保证睡眠，使用含咖啡因的眼霜"),
+    "wrinkles": ("eyes", "fine_lines", "加强眼周保湿，日间注意防晒"),
+    "sensitivity": ("cheeks", "redness", "选择温和无香精的舒缓产品"),
+    "brightness": ("face", "dullness", "可使用含维C的精华提亮肤色"),
+}
+
+
+def _scale(value: float, lo: float, hi: float) -> int:
+    """Map ``value`` in [lo, hi] onto a 100..0 score"""
+    return int(round(100 * float(np.clip((hi - value) / (hi - lo), 0.0, 1.0))))
+
+
+def _box_blur(y: np.ndarray, radius: int) -> np.ndarray:
+    size = 2 * radius + 1
+    padded = np.pad(y, radius + 1, mode="edge")
+    integral = padded.cumsum(0).cumsum(1)
+    total = (
+        integral[size:, size:] - integral[:-size, size:]
+        - integral[size:, :-size] + integral[:-size, :-size]
+    )
+    return total[: y.shape[0], : y.shape[1]] / (size * size)
+
+
+def compute_metrics(frame: np.ndarray) -> Dict[str, Any]:
+    """Heuristic skin metrics for an (H, W, 3) uint8 RGB face frame"""
+    h, w = frame.shape[:2]
+    # Central crop keeps mostly face and drops background
+    face = frame[h // 10: h - h // 10, w // 5: w - w // 5].astype(np.float32) / 255.0
+    r, g, b = face[..., 0], face[..., 1], face[..., 2]
+    y = 0.299 * r + 0.587 * g + 0.114 * b
+    high, low = face.max(-1), face.min(-1)
+    saturation = (high - low) / (high + 1e-6)
+    redness = np.clip(r - (g + b) / 2, 0.0, None)
+
+    gy, gx = np.gradient(y)
+    gradient = np.hypot(gx, gy)
+    detail = np.abs(y - _box_blur(y, 2))
+
+    fh = y.shape[0]
+    upper = slice(0, int(fh * 0.35))
+    under_eye = slice(int(fh * 0.40), int(fh * 0.50))
+    cheeks = slice(int(fh * 0.55), int(fh * 0.75))
+
+    specular = float(((y > 0.82) & (saturation < 0.25)).mean())
+    spots = redness > redness.mean() + 2.5 * redness.std()
+    eye_ratio = float(y[under_eye].mean() / (y[cheeks].mean() + 1e-6))
+
+    scores = {
+        "hydration": _scale(float(gradient.mean()), 0.01, 0.08),
+        "oil": 100 - _scale(specular, 0.0, 0.15),
+        "pores": _scale(float(detail.mean()), 0.005, 0.04),
+        "wrinkles": _scale(float((gradient[upper] > 0.06).mean()), 0.0, 0.2),
+        "dark_circles": _scale(1.0 - eye_ratio, 0.0, 0.25),
+        "acne": _scale(float(spots.mean()), 0.0, 0.03),
+        "sensitivity": _scale(float(redness.mean()), 0.03, 0.2),
+        "brightness": 100 - _scale(float(y.mean()), 0.2, 0.8),
+    }
+
+    tone = np.median(face.reshape(-1, 3), axis=0)
+    warmth = float(tone[0] - tone[2])
+    return {
+        "scores": scores,
+        "skin_tone": {
+            "monk_scale": int(np.clip(10 - int(float(y.mean()) * 10), 1, 10)),
+            "hex_color": "#" + "".join(f"{int(round(c * 255)):02x}" for c in tone),
+            "undertone": "warm" if warmth > 0.15 else "cool" if warmth < 0.08 else "neutral",
+        },
+    }
+
+
+# Mean luminance below/above which lighting is too dark/bright, and the
+# left-right luminance difference past which it is uneven
+LIGHTING_DARK, LIGHTING_BRIGHT, LIGHTING_UNEVEN = 0.25, 0.85, 0.15
+
+LUMA = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def lighting_state(frame: np.ndarray) -> Dict[str, Any]:
+    """Brightness, contrast and left-right balance of an (H, W, 3) uint8 RGB frame"""
+    y = frame.astype(np.float32) @ LUMA / 255.0
+    mean = float(y.mean())
+    half = y.shape[1] // 2
+    balance = float(y[:, :half].mean() - y[:, half:].mean()) if half else 0.0
+    if mean < LIGHTING_DARK:
+        state = "dark"
+    elif mean > LIGHTING_BRIGHT:
+        state = "bright"
+    elif abs(balance) > LIGHTING_UNEVEN:
+        state = "uneven"
+    else:
+        state = "good"
+    return {
+        "state": state,
+        "brightness": int(round(mean * 100)),
+        "contrast": int(round(float(y.std()) * 100)),
+        "balance": int(round(balance * 100)),
+    }
+
+
+def metric_health(metric: str, score: int) -> int:
+    """Score where higher is better; oil is reported as a level"""
+    return 100 - score if metric == "oil" else score
+
+
+def metric_status(metric: str, score: int) -> str:
+    health = metric_health(metric, score)
+    for threshold, status in METRIC_STATUSES[metric]:
+        if health >= threshold:
+            return status
+    return METRIC_STATUSES[metric][-1][1]
+
+
+def overall_score(scores: Dict[str, int]) -> int:
+    health = [metric_health(metric, s) for metric, s in scores.items()]
+    return int(round(sum(health) / len(health)))
+
+
+def build_report(result: Dict[str, Any], previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Analysis payload in the API shape, with trends against ``previous`` metrics"""
+    previous = previous or {}
+    metrics = {}
+    concerns: List[tuple] = []
+    for metric, score in result["scores"].items():
+        status = metric_status(metric, score)
+        before = previous.get(metric, {}).get("score")
+        delta = 0 if before is None else score - before
+        metrics[metric] = {
+            "score": score,
+            "status": status,
+            "trend": f"{delta:+d}" if delta else "0",
+        }
+        if status != METRIC_STATUSES[metric][0][1]:
+            concerns.append((metric_health(metric, score), metric, status))
+
+    concerns.sort()
+    return {
+        "overall_score": overall_score(result["scores"]),
+        "metrics": metrics,
+        "skin_tone": result["skin_tone"],
+        "problem_areas": [
+            {"zone": METRIC_CONCERNS[m][0], "issue": METRIC_CONCERNS[m][1], "severity": status}
+            for _, m, status in concerns[:4]
+        ],
+        "recommendations": [METRIC_CONCERNS[m][2] for _, m, _ in concerns[:3]],
+    }
+
+
+class ScanEngine:
+    """Runs ``compute_metrics`` and other CPU work in worker processes off the event loop"""
+
+    def __init__(self, workers: int = 0):
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: forking a process that runs event-loop and DB threads is unsafe
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run a picklable top-level function in the pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_pool(), fn, *args)
+
+    async def analyze(self, frame: np.ndarray) -> Dict[str, Any]:
+        return await self.run(compute_metrics, frame)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            # Queued work is cancelled; running jobs are short, and leaving them
+            # to the interpreter's exit hook races with closing the pool's pipes
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+
+scan_engine = ScanEngine(settings.SCAN_WORKERS)
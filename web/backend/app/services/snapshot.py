@@ -0,0 +1,281 @@
+"""Read-only binary snapshots mapped into memory.
+
+A snapshot is a header, a table of named sections and the section bytes,
+each section 8-byte aligned so numeric columns can be viewed in place::
+
+    header    "AMSN", version u16, section count u16, built_at f64, generation u64
+    table     per section: name (32 bytes, NUL padded), offset u64, length u64
+    sections  raw bytes
+
+Everything is addressed by offsets into the file, so a structure read from
+a section is a view of the mapping rather than a copy: every process that
+maps the same file shares its pages through the page cache.
+
+A string table ``<name>`` is ``<name>.strings`` (UTF-8, back to back) plus
+``<name>.offsets`` (u64, one more than there are strings); a keyed table
+adds ``<name>.slots``, an open-addressing hash table of positions. A record
+collection is a keyed table of ids, ``<name>.keys``, plus the items as
+compact JSON in ``<name>.records`` / ``<name>.offsets``.
+"""
+
+import json
+import marshal
+import mmap
+import os
+import struct
+import tempfile
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+SNAPSHOT_MAGIC = b"AMSN"
+SNAPSHOT_VERSION = 2
+SNAPSHOT_HEADER = struct.Struct("<4sHHdQ")
+SECTION_ENTRY = struct.Struct("<32sQQ")
+ALIGNMENT = 8
+
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _concat(chunks: List[bytes]) -> Tuple[bytes, np.ndarray]:
+    offsets = np.zeros(len(chunks) + 1, dtype=np.uint64)
+    offsets[1:] = np.cumsum([len(chunk) for chunk in chunks])
+    return b"".join(chunks), offsets
+
+
+class SnapshotWriter:
+    """Collects sections in memory and writes them out in one go"""
+
+    def __init__(self):
+        self._sections: Dict[str, bytes] = {}
+
+    def add(self, name: str, data: bytes) -> None:
+        if len(name.encode()) > 32:
+            raise ValueError(f"Section name too long: {name}")
+        self._sections[name] = bytes(data)
+
+    def add_object(self, name: str, value: Any) -> None:
+        """Plain data (dicts, lists, tuples, str, numbers, None) via marshal"""
+        self.add(name, marshal.dumps(value))
+
+    def add_array(self, name: str, array: np.ndarray) -> None:
+        self.add(name, np.ascontiguousarray(array).tobytes())
+
+    def add_strings(self, name: str, strings: Sequence[str], keyed: bool = False) -> None:
+        """A string table; ``keyed`` adds a hash table for ``KeyTable.position``"""
+        encoded = [s.encode() for s in strings]
+        data, offsets = _concat(encoded)
+        self.add(f"{name}.strings", data)
+        self.add_array(f"{name}.offsets", offsets)
+        if keyed:
+            if len(set(encoded)) != len(encoded):
+                raise ValueError(f"Duplicate keys in {name}")
+            slots = np.full(1 << max(len(encoded) * 2, 8).bit_length(), -1, dtype=np.int32)
+            mask = len(slots) - 1
+            for position, key in enumerate(encoded):
+                slot = zlib.crc32(key) & mask
+                while slots[slot] >= 0:
+                    slot = (slot + 1) & mask
+                slots[slot] = position
+            self.add_array(f"{name}.slots", slots)
+
+    def add_records(self, name: str, items: Iterable[Dict[str, Any]], key: str = "id") -> int:
+        """Store items as a record collection, returning how many were written"""
+        ids: List[str] = []
+        chunks: List[bytes] = []
+        for item in items:
+            if not isinstance(item[key], str):
+                raise ValueError(f"{name} ids must be strings")
+            ids.append(item[key])
+            chunks.append(_encoder.encode(item).encode())
+        data, offsets = _concat(chunks)
+        self.add(f"{name}.records", data)
+        self.add_array(f"{name}.offsets", offsets)
+        self.add_strings(f"{name}.keys", ids, keyed=True)
+        return len(ids)
+
+    def write(self, path: str, generation: int = 1) -> int:
+        """Write the snapshot to ``path``, returning its size.
+
+        The file is written next to ``path`` and renamed over it, so a reader
+        opening ``path`` sees either the old snapshot or the complete new one,
+        and processes still mapping the old file keep reading it unchanged.
+        """
+        names = list(self._sections)
+        offset = _align(SNAPSHOT_HEADER.size + SECTION_ENTRY.size * len(names))
+        table = []
+        for name in names:
+            length = len(self._sections[name])
+            table.append(SECTION_ENTRY.pack(name.encode(), offset, length))
+            offset = _align(offset + length)
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=".snapshot-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                out.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(names), time.time(), generation))
+                out.write(b"".join(table))
+                for name in names:
+                    out.write(b"\0" * (_align(out.tell()) - out.tell()))
+                    out.write(self._sections[name])
+                size = out.tell()
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return size
+
+
+class Snapshot:
+    """A snapshot file mapped copy-on-write.
+
+    Sections are views into the mapping: pages are read on first touch and
+    shared with every other process mapping the same file. Arrays handed
+    out are writable, but a write only copies the pages it touches into
+    this process. The mapping stays valid after the file is replaced.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self.identity = (stat.st_dev, stat.st_ino, stat.st_mtime_ns)
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        view = memoryview(self._map)
+        self.size = len(view)
+        if self.size < SNAPSHOT_HEADER.size:
+            raise ValueError(f"{path} is not a snapshot")
+        magic, version, count, self.built_at, self.generation = SNAPSHOT_HEADER.unpack_from(view)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a snapshot")
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(f"{path} is snapshot version {version}, expected {SNAPSHOT_VERSION}")
+        if SNAPSHOT_HEADER.size + SECTION_ENTRY.size * count > self.size:
+            raise ValueError(f"{path} is truncated")
+
+        self._sections: Dict[str, memoryview] = {}
+        for i in range(count):
+            name, offset, length = SECTION_ENTRY.unpack_from(view, SNAPSHOT_HEADER.size + SECTION_ENTRY.size * i)
+            if offset + length > self.size:
+                raise ValueError(f"{path} is truncated")
+            self._sections[name.rstrip(b"\0").decode()] = view[offset:offset + length]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._sections
+
+    def sections(self) -> Dict[str, int]:
+        """Section sizes by name"""
+        return {name: len(view) for name, view in self._sections.items()}
+
+    def section(self, name: str) -> memoryview:
+        try:
+            return self._sections[name]
+        except KeyError:
+            raise KeyError(f"Snapshot has no section '{name}'") from None
+
+    def object(self, name: str) -> Any:
+        return marshal.loads(self.section(name))
+
+    def array(self, name: str, dtype: Any) -> np.ndarray:
+        """Zero-copy view of a numeric section"""
+        return np.frombuffer(self.section(name), dtype=dtype)
+
+    def strings(self, name: str) -> "StringTable":
+        offsets = self.array(f"{name}.offsets", np.uint64)
+        if f"{name}.slots" in self:
+            return KeyTable(self.section(f"{name}.strings"), offsets, self.array(f"{name}.slots", np.int32))
+        return StringTable(self.section(f"{name}.strings"), offsets)
+
+    def records(self, name: str, cache_size: int) -> "SnapshotRecords":
+        return SnapshotRecords(
+            self.section(f"{name}.records"),
+            self.array(f"{name}.offsets", np.uint64),
+            self.strings(f"{name}.keys"),
+            cache_size,
+        )
+
+
+class StringTable(Sequence):
+    """Strings read by position straight from a mapped section.
+
+    Tables written in sorted order can be searched with ``bisect``.
+    """
+
+    def __init__(self, data: memoryview, offsets: np.ndarray):
+        self._data = data
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, position: int) -> str:
+        if not 0 <= position < len(self._offsets) - 1:
+            raise IndexError(position)
+        start, end = self._offsets[position:position + 2].tolist()
+        return str(self._data[start:end], "utf-8")
+
+
+class KeyTable(StringTable):
+    """A string table with a hash index from string to position"""
+
+    def __init__(self, data: memoryview, offsets: np.ndarray, slots: np.ndarray):
+        super().__init__(data, offsets)
+        self._slots = slots
+        self._mask = len(slots) - 1
+
+    def position(self, key: Any) -> Optional[int]:
+        if key.__class__ is not str:
+            return None
+        encoded = key.encode()
+        data, offsets, slots = self._data, self._offsets, self._slots
+        slot = zlib.crc32(encoded) & self._mask
+        while True:
+            position = int(slots[slot])
+            if position < 0:
+                return None
+            start, end = offsets[position:position + 2].tolist()
+            if data[start:end] == encoded:
+                return position
+            slot = (slot + 1) & self._mask
+
+
+class SnapshotRecords:
+    """Items of one record collection, decoded on access.
+
+    Decoded items are kept in a small per-process LRU; everything else stays
+    in the shared mapping, so memory doesn't grow with the collection.
+    """
+
+    def __init__(self, data: memoryview, offsets: np.ndarray, keys: KeyTable, cache_size: int):
+        self.keys = keys
+        self._data = data
+        self._offsets = offsets
+        self._cache: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self.cache_size = cache_size
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __getitem__(self, position: int) -> Dict[str, Any]:
+        cache = self._cache
+        item = cache.get(position)
+        if item is not None:
+            cache.move_to_end(position)
+            return item
+        start, end = self._offsets[position:position + 2].tolist()
+        item = cache[position] = json.loads(bytes(self._data[start:end]))
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return item
+
+    def get(self, key: Any) -> Optional[Dict[str, Any]]:
+        position = self.keys.position(key)
+        return None if position is None else self[position]
@@ -0,0 +1,199 @@
+"""Per-user makeup style match scores"""
+
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.services.catalog import CatalogStore
+
+# Points each component can add on top of BASE_SCORE
+BASE_SCORE = 40
+UNDERTONE_POINTS = 15
+SKIN_TYPE_POINTS = 15
+BRAND_POINTS = 10
+BUDGET_POINTS = 5
+PREFERENCE_POINTS = 10
+MOOD_POINTS = 10
+MAX_SCORE = 99
+
+# Rankings kept per user before the oldest contexts are dropped
+MAX_CONTEXTS = 8
+
+# Preferred style -> comfortable difficulty range
+PREFERENCE_DIFFICULTY = {
+    "natural": (1, 2),
+    "elegant": (2, 3),
+    "glam": (3, 5),
+    "bold": (4, 5),
+}
+
+# Mood -> occasions whose looks suit it
+MOOD_OCCASIONS = {
+    "relaxed": ("casual", "work"),
+    "confident": ("work", "party"),
+    "romantic": ("date",),
+    "playful": ("casual", "party"),
+    "festive": ("party",),
+}
+
+UNDERTONE_LABELS = {"warm": "暖", "cool": "冷", "neutral": "中性"}
+PREFERENCE_LABELS = {"natural": "自然", "elegant": "优雅", "glam": "精致", "bold": "大胆"}
+MOOD_LABELS = {
+    "relaxed": "轻松",
+    "confident": "自信",
+    "romantic": "浪漫",
+    "playful": "俏皮",
+    "festive": "欢庆",
+}
+
+# (score, style_id, occasion, match_reason), best first
+Ranking = List[Tuple[int, str, Optional[str], str]]
+
+
+def _fraction(products: List[Dict[str, Any]], test: Callable[[Dict[str, Any]], bool]) -> float:
+    return sum(1 for p in products if test(p)) / len(products) if products else 0.0
+
+
+def style_match(
+    style: Dict[str, Any],
+    products: List[Dict[str, Any]],
+    skin_profile: Dict[str, Any],
+    preferences: Dict[str, Any],
+    mood: Optional[str] = None,
+) -> Tuple[int, str]:
+    """Match score (0-99) of a style for one user, and the reason that drove it"""
+    points: Dict[str, float] = {}
+
+    undertone = skin_profile.get("undertone")
+    undertones = style.get("undertones")
+    if undertone and undertones:
+        points["undertone"] = UNDERTONE_POINTS if undertone in undertones else 0
+    elif undertone:
+        points["undertone"] = UNDERTONE_POINTS / 3
+
+    skin_type = skin_profile.get("skin_type")
+    if skin_type:
+        points["skin_type"] = SKIN_TYPE_POINTS * _fraction(
+            products,
+            lambda p: not p.get("suitable_skin_types")
+            or "all" in p["suitable_skin_types"]
+            or skin_type in p["suitable_skin_types"],
+        )
+
+    brands = set(preferences.get("brands") or ())
+    if brands:
+        points["brand"] = BRAND_POINTS * _fraction(products, lambda p: p.get("brand") in brands)
+
+    budget = preferences.get("budget_range")
+    if budget:
+        lo, hi = budget[0], budget[-1]
+        points["budget"] = BUDGET_POINTS * _fraction(products, lambda p: lo <= p.get("price", 0) <= hi)
+
+    difficulty_range = PREFERENCE_DIFFICULTY.get(preferences.get("style"))
+    if difficulty_range and style.get("difficulty") is not None:
+        lo, hi = difficulty_range
+        distance = max(lo - style["difficulty"], style["difficulty"] - hi, 0)
+        points["preference"] = max(PREFERENCE_POINTS - 5 * distance, -PREFERENCE_POINTS)
+
+    if mood in MOOD_OCCASIONS:
+        points["mood"] = MOOD_POINTS if style.get("occasion") in MOOD_OCCASIONS[mood] else 0
+
+    score = int(round(min(max(BASE_SCORE + sum(points.values()), 0), MAX_SCORE)))
+    best = max(points, key=points.get) if points else None
+    if best is None or points[best] <= 0:
+        return score, style.get("match_reason") or "与您的风格相配"
+    if best == "undertone":
+        reason = f"色调与您的{UNDERTONE_LABELS.get(undertone, undertone)}调肤色相配"
+    elif best == "skin_type":
+        reason = f"所用产品适合您的{skin_type}肤质"
+    elif best == "brand":
+        reason = "使用您喜爱的品牌产品"
+    elif best == "budget":
+        reason = "所用产品在您的预算内"
+    elif best == "preference":
+        reason = f"符合您偏好的{PREFERENCE_LABELS.get(preferences['style'], preferences['style'])}风格"
+    else:
+        reason = f"契合您{MOOD_LABELS.get(mood, mood)}的心情"
+    return score, reason
+
+
+class StyleMatchCache:
+    """Bounded LRU of per-user style rankings.
+
+    Each user entry holds their skin profile and preferences plus one ranking
+    of every style per ``(mood, skin_type)`` context. Rankings are rebuilt
+    when the style or product store changes. A read passes the user's
+    current profile version and an entry built from another version is
+    reloaded, so writes made through other workers are seen; ``invalidate``
+    drops a user after a profile write in this worker.
+    """
+
+    def __init__(self, styles: CatalogStore, products: CatalogStore, max_users: int = 10000):
+        self.styles = styles
+        self.products = products
+        self.max_users = max_users
+        self._users: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._loading: Dict[str, object] = {}
+
+    async def ranking(
+        self,
+        user_id: str,
+        fetch_profile: Callable[[], Awaitable[Tuple[Dict[str, Any], Dict[str, Any]]]],
+        mood: Optional[str] = None,
+        skin_type: Optional[str] = None,
+        version: Optional[int] = None,
+    ) -> Ranking:
+        """Every style ranked for the user; ``fetch_profile`` runs on a miss"""
+        entry = self._users.get(user_id)
+        if entry is not None and entry["version"] != version:
+            entry = None
+        if entry is None:
+            token = self._loading[user_id] = object()
+            try:
+                skin_profile, preferences = await fetch_profile()
+            finally:
+                # An invalidation mid-fetch replaces our token; serve but don't cache
+                current = self._loading.pop(user_id, None)
+            entry = {"skin_profile": skin_profile, "preferences": preferences, "version": version}
+            if current is token:
+                self._users[user_id] = entry
+                while len(self._users) > self.max_users:
+                    self._users.popitem(last=False)
+        else:
+            self._users.move_to_end(user_id)
+
+        versions = (self.styles.version, self.products.version)
+        if entry.get("versions") != versions:
+            entry["versions"] = versions
+            entry["rankings"] = {}
+        # Unknown moods don't change scores, so they share the no-mood ranking
+        key = (mood if mood in MOOD_OCCASIONS else None, skin_type)
+        rankings = entry["rankings"]
+        ranking = rankings.get(key)
+        if ranking is None:
+            if len(rankings) >= MAX_CONTEXTS:
+                del rankings[next(iter(rankings))]
+            skin_profile = entry["skin_profile"]
+            if skin_type:
+                skin_profile = {**skin_profile, "skin_type": skin_type}
+            ranking = rankings[key] = self._rank(skin_profile, entry["preferences"], key[0])
+        return ranking
+
+    def _rank(self, skin_profile: Dict[str, Any], preferences: Dict[str, Any], mood: Optional[str]) -> Ranking:
+        styles = self.styles.all()
+        products = self.products.get_map({pid for style in styles for pid in style.get("products", ())})
+        ranking = []
+        for style in styles:
+            style_products = [products[pid] for pid in style.get("products", ()) if pid in products]
+            score, reason = style_match(style, style_products, skin_profile, preferences, mood)
+            ranking.append((score, style["id"], style.get("occasion"), reason))
+        # Highest score first, ties by id
+        ranking.sort(key=lambda entry: (-entry[0], entry[1]))
+        return ranking
+
+    def invalidate(self, user_id: str) -> None:
+        self._users.pop(user_id, None)
+        if user_id in self._loading:
+            self._loading[user_id] = None
+
+    def clear(self) -> None:
+        self._users.clear()
@@ -0,0 +1,233 @@
+"""Per-user skin analysis time series with calendar rollups"""
+
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+
+SERIES_FIELDS = (
+    "score",
+    "hydration",
+    "oil",
+    "pores",
+    "wrinkles",
+    "dark_circles",
+    "acne",
+    "sensitivity",
+    "brightness",
+)
+
+# period -> (days covered, rollup read); keeps every period to ~30 points or fewer
+PERIODS = {
+    "7d": (7, "daily"),
+    "30d": (30, "daily"),
+    "90d": (90, "weekly"),
+    "180d": (180, "weekly"),
+    "1y": (365, "monthly"),
+}
+
+
+def _week(day: int) -> int:
+    return day - date.fromordinal(day).weekday()
+
+
+def _month(day: int) -> int:
+    d = date.fromordinal(day)
+    return d.year * 12 + d.month - 1
+
+
+def _month_start(key: int) -> date:
+    return date(key // 12, key % 12 + 1, 1)
+
+
+# resolution -> (bucket key for a day ordinal, bucket start date for a key)
+RESOLUTIONS: Dict[str, Tuple[Callable[[int], int], Callable[[int], date]]] = {
+    "daily": (lambda day: day, date.fromordinal),
+    "weekly": (_week, date.fromordinal),
+    "monthly": (_month, _month_start),
+}
+
+
+def analysis_values(analysis: Any) -> np.ndarray:
+    """Series row for an Analysis; missing metrics are NaN"""
+    metrics = analysis.data.get("metrics", {})
+    row = [analysis.overall_score]
+    row += [metrics.get(field, {}).get("score") for field in SERIES_FIELDS[1:]]
+    return np.array([np.nan if v is None else v for v in row], dtype=np.float64)
+
+
+class Rollup:
+    """Per-bucket sums and counts for every series field, sorted by bucket"""
+
+    def __init__(self, bucket: Callable[[int], int]):
+        self.bucket = bucket
+        self.keys: List[int] = []
+        self._sums = np.zeros((16, len(SERIES_FIELDS)))
+        self._counts = np.zeros((16, len(SERIES_FIELDS)), dtype=np.int32)
+
+    def add(self, day: int, values: np.ndarray) -> None:
+        key = self.bucket(day)
+        i = bisect_left(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            n = len(self.keys)
+            if n == len(self._sums):
+                self._sums = np.concatenate([self._sums, np.zeros_like(self._sums)])
+                self._counts = np.concatenate([self._counts, np.zeros_like(self._counts)])
+            # Scans arrive in date order, so this shift is almost always empty
+            self._sums[i + 1:n + 1] = self._sums[i:n]
+            self._counts[i + 1:n + 1] = self._counts[i:n]
+            self._sums[i] = 0
+            self._counts[i] = 0
+            self.keys.insert(i, key)
+        present = ~np.isnan(values)
+        self._sums[i, present] += values[present]
+        self._counts[i] += present
+
+    def means(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """(buckets, fields) means for key positions [start, stop); NaN when empty"""
+        stop = len(self.keys) if stop is None else stop
+        counts = self._counts[start:stop]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(counts > 0, self._sums[start:stop] / counts, np.nan)
+
+    def counts(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        stop = len(self.keys) if stop is None else stop
+        return self._counts[start:stop].max(axis=1)
+
+
+class UserSeries:
+    """One user's analyses rolled up by day, week and month"""
+
+    def __init__(self):
+        self.rollups = {name: Rollup(bucket) for name, (bucket, _) in RESOLUTIONS.items()}
+        self.last_day: Optional[int] = None
+        self.scans = 0
+
+    def add(self, day: date, values: np.ndarray) -> None:
+        ordinal = day.toordinal()
+        for rollup in self.rollups.values():
+            rollup.add(ordinal, values)
+        self.last_day = ordinal if self.last_day is None else max(self.last_day, ordinal)
+        self.scans += 1
+
+    def window(self, resolution: str, start_day: Optional[int] = None) -> Tuple[List[int], np.ndarray, np.ndarray]:
+        """Bucket keys, means and scan counts from ``start_day`` on"""
+        rollup = self.rollups[resolution]
+        start = 0 if start_day is None else bisect_left(rollup.keys, rollup.bucket(start_day))
+        return rollup.keys[start:], rollup.means(start), rollup.counts(start)
+
+    def page(self, resolution: str, limit: int, after: Optional[int] = None) -> Tuple[List[int], np.ndarray, np.ndarray]:
+        """Up to ``limit`` buckets with keys greater than ``after``"""
+        rollup = self.rollups[resolution]
+        start = 0 if after is None else bisect_right(rollup.keys, after)
+        stop = min(len(rollup.keys), start + limit)
+        return rollup.keys[start:stop], rollup.means(start, stop), rollup.counts(start, stop)
+
+    def period(self, period: str) -> Tuple[str, List[int], np.ndarray, np.ndarray]:
+        """Rollup for ``period``, ending at the user's most recent scan"""
+        days, resolution = PERIODS[period]
+        if self.last_day is None:
+            empty = np.empty((0, len(SERIES_FIELDS)))
+            return resolution, [], empty, np.empty(0, dtype=np.int32)
+        return (resolution, *self.window(resolution, self.last_day - days + 1))
+
+
+def series_changes(means: np.ndarray) -> np.ndarray:
+    """Last minus first present value of each column; NaN for empty columns"""
+    if not len(means):
+        return np.full(means.shape[1], np.nan)
+    present = ~np.isnan(means)
+    first = present.argmax(axis=0)
+    last = len(means) - 1 - present[::-1].argmax(axis=0)
+    cols = np.arange(means.shape[1])
+    changes = means[last, cols] - means[first, cols]
+    changes[~present.any(axis=0)] = np.nan
+    return changes
+
+
+def format_change(value: float) -> str:
+    if np.isnan(value):
+        return "0"
+    change = int(round(value))
+    return f"{change:+d}" if change else "0"
+
+
+def series_points(resolution: str, keys: List[int], means: np.ndarray, counts: np.ndarray) -> List[Dict[str, Any]]:
+    start_date = RESOLUTIONS[resolution][1]
+    rounded = np.round(means)
+    points = []
+    for key, row, count in zip(keys, rounded.tolist(), counts.tolist()):
+        point = {"date": start_date(key).isoformat()}
+        for field, value in zip(SERIES_FIELDS, row):
+            point[field] = None if value != value else int(value)
+        point["scans"] = count
+        points.append(point)
+    return points
+
+
+class AnalysisTimeSeries:
+    """LRU of per-user series, loaded from the database on first use.
+
+    Scans recorded through other workers never reach this cache, so a read
+    may pass the user's analysis count from the database; a series built
+    from a different number of scans is reloaded.
+    """
+
+    def __init__(self, max_users: int = 10000):
+        self.max_users = max_users
+        self._users: "OrderedDict[str, UserSeries]" = OrderedDict()
+        self._loading: Dict[str, object] = {}
+
+    def get(self, user_id: str) -> Optional[UserSeries]:
+        series = self._users.get(user_id)
+        if series is not None:
+            self._users.move_to_end(user_id)
+        return series
+
+    async def load(
+        self,
+        user_id: str,
+        fetch: Callable[[], Awaitable[Iterable[Any]]],
+        scans: Optional[int] = None,
+    ) -> UserSeries:
+        """Cached series for ``user_id``, built from ``fetch()`` on a miss or a stale entry"""
+        series = self.get(user_id)
+        if series is not None and (scans is None or series.scans == scans):
+            return series
+
+        token = self._loading[user_id] = object()
+        try:
+            analyses = await fetch()
+        finally:
+            # Anything but our token means a scan was recorded mid-fetch (or a
+            # concurrent load started); serve this series but don't cache it
+            current = self._loading.pop(user_id, None)
+        series = UserSeries()
+        for analysis in analyses:
+            series.add(date.fromisoformat(analysis.date), analysis_values(analysis))
+        if current is token:
+            self._users[user_id] = series
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        return series
+
+    def record(self, analysis: Any) -> None:
+        """Add a new analysis to its user's series, if that series is loaded"""
+        series = self._users.get(analysis.user_id)
+        if series is not None:
+            series.add(date.fromisoformat(analysis.date), analysis_values(analysis))
+        elif analysis.user_id in self._loading:
+            self._loading[analysis.user_id] = None
+
+    def discard(self, user_id: str) -> None:
+        self._users.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._users.clear()
+
+
+analysis_series = AnalysisTimeSeries(settings.ANALYSIS_SERIES_MAX_USERS)
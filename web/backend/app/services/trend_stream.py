@@ -0,0 +1,426 @@
+"""Streaming social-trend ingestion with sliding-window heavy-hitter counters"""
+
+import asyncio
+import heapq
+import json
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.catalog import CatalogStore
+
+# Bytes read from the feed per ingest batch
+READ_CHUNK_BYTES = 1 << 20
+
+# Seconds between reads once a followed feed is exhausted
+FOLLOW_POLL_SECONDS = 1.0
+
+# Stands in for a missing hashtags or products list
+NO_KEYS: List[str] = []
+
+# Called with each published snapshot
+SnapshotListener = Callable[[Dict[str, Any]], None]
+
+
+def _hashes(keys: Sequence[str]) -> np.ndarray:
+    return np.fromiter((hash(key) for key in keys), dtype=np.int64, count=len(keys)).view(np.uint64)
+
+
+def event_time(event: Dict[str, Any]) -> float:
+    """Event timestamp in epoch seconds, from ``ts`` (number) or ``time`` (ISO)"""
+    ts = event.get("ts")
+    if ts is not None:
+        return float(ts)
+    moment = datetime.fromisoformat(event["time"])
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+class SlidingWindowCounter:
+    """Approximate per-key counts over a sliding window, plus the top keys.
+
+    The window is a ring of ``buckets`` count-min sketches, one per time
+    slice, and a running total that always equals their sum: adding touches
+    the current slice and the total, and expiring a slice subtracts it from
+    the total. Counts never underestimate and overestimate by at most
+    ``e / width`` of the window total with probability ``1 - e^-depth``.
+
+    The heaviest ``top_k`` keys are tracked alongside with their estimates,
+    so memory stays at ``(buckets + 1) * depth * width`` counters plus ``top_k``
+    keys however many distinct keys the stream carries.
+    """
+
+    def __init__(self, bucket_seconds: float, buckets: int, width: int = 2048, depth: int = 4, top_k: int = 200):
+        self.bucket_seconds = bucket_seconds
+        self.buckets = buckets
+        self.width = width
+        self.depth = depth
+        self.top_k = top_k
+        self.current: Optional[int] = None
+        self._slots = np.zeros((buckets, depth * width), dtype=np.int64)
+        self._total = np.zeros(depth * width, dtype=np.int64)
+        self._top: Dict[str, int] = {}
+        self._row_offsets = (np.arange(depth, dtype=np.uint64) * np.uint64(width))[:, None]
+
+    @property
+    def window_seconds(self) -> float:
+        return self.bucket_seconds * self.buckets
+
+    @property
+    def nbytes(self) -> int:
+        return self._slots.nbytes + self._total.nbytes
+
+    def bucket_of(self, ts: float) -> int:
+        return int(ts // self.bucket_seconds)
+
+    def _cells(self, keys: Sequence[str]) -> np.ndarray:
+        """(depth, n) flat table positions by double hashing"""
+        hashes = _hashes(keys)
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        rows = np.arange(self.depth, dtype=np.uint64)[:, None]
+        return ((h1 + rows * h2) % np.uint64(self.width) + self._row_offsets).astype(np.intp)
+
+    def advance(self, bucket: int) -> None:
+        """Move the window forward so ``bucket`` is the newest slice"""
+        if self.current is None:
+            self.current = bucket
+            return
+        if bucket <= self.current:
+            return
+        for b in range(self.current + 1, min(bucket, self.current + self.buckets) + 1):
+            slot = self._slots[b % self.buckets]
+            self._total -= slot
+            slot[:] = 0
+        self.current = bucket
+        # Top counts only shrink on expiry; refresh them and drop emptied keys
+        if self._top:
+            keys = list(self._top)
+            self._top = {k: c for k, c in zip(keys, self.estimate(keys).tolist()) if c > 0}
+
+    def add(self, bucket: int, counts: Dict[str, int]) -> None:
+        """Add per-key counts observed in ``bucket``; slices already expired are dropped"""
+        if not counts:
+            return
+        self.advance(bucket)
+        if bucket <= self.current - self.buckets:
+            return
+        keys = list(counts)
+        values = np.fromiter(counts.values(), dtype=np.int64, count=len(keys))
+        cells = self._cells(keys)
+        added = np.bincount(cells.ravel(), np.tile(values, self.depth), minlength=self._total.size)
+        added = added.astype(np.int64)
+        self._slots[bucket % self.buckets] += added
+        self._total += added
+
+        estimates = self._total[cells].min(axis=0)
+        floor = min(self._top.values()) if len(self._top) >= self.top_k else 0
+        candidates = np.flatnonzero(estimates > floor)
+        if len(candidates):
+            top = self._top
+            for i, estimate in zip(candidates.tolist(), estimates[candidates].tolist()):
+                top[keys[i]] = estimate
+            if len(top) > self.top_k:
+                self._top = dict(heapq.nlargest(self.top_k, top.items(), key=lambda kv: kv[1]))
+
+    def estimate(self, keys: Sequence[str]) -> np.ndarray:
+        if not keys:
+            return np.empty(0, dtype=np.int64)
+        return self._total[self._cells(keys)].min(axis=0)
+
+    def slices(self, keys: Sequence[str]) -> np.ndarray:
+        """(buckets, n) per-slice estimates, oldest slice first"""
+        if not keys or self.current is None:
+            return np.zeros((self.buckets, len(keys)), dtype=np.int64)
+        order = [b % self.buckets for b in range(self.current - self.buckets + 1, self.current + 1)]
+        cells = self._cells(keys)
+        return self._slots[order][:, cells].min(axis=1)
+
+    def top(self, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        ranked = sorted(self._top.items(), key=lambda kv: (-kv[1], kv[0]))
+        return ranked if n is None else ranked[:n]
+
+    def clear(self) -> None:
+        self.current = None
+        self._slots[:] = 0
+        self._total[:] = 0
+        self._top.clear()
+
+
+def trend_score(count: int, top: int) -> int:
+    """Count scaled against the window's heaviest key, 1-99 (0 if unseen)"""
+    if count <= 0 or top <= 0:
+        return 0
+    return max(1, min(99, round(99 * count / top)))
+
+
+def growth(slices: np.ndarray) -> List[Optional[int]]:
+    """Percent change of the newer half of the window over the older half"""
+    half = len(slices) // 2
+    older = slices[:half].sum(axis=0)
+    newer = slices[half:].sum(axis=0)
+    return [
+        None if old == 0 else round(100 * (new - old) / old)
+        for old, new in zip(older.tolist(), newer.tolist())
+    ]
+
+
+class TrendPipeline:
+    """Ingests post/mention events into hashtag and product window counters.
+
+    Events are dicts with a timestamp (``ts`` or ``time``), ``source``,
+    optional ``hashtags`` and ``products`` lists and an ``engagement`` count.
+    A hashtag on a source counts ``1 + engagement``; a product mention counts
+    one. ``publish`` turns the counters into a snapshot for readers and, when
+    a trend store is attached, syncs engagement and trend scores into it.
+    """
+
+    def __init__(
+        self,
+        store: Optional[CatalogStore] = None,
+        window_seconds: float = 7 * 86400,
+        buckets: int = 28,
+        width: int = 2048,
+        depth: int = 4,
+        top_k: int = 200,
+    ):
+        bucket_seconds = window_seconds / buckets
+        self.store = store
+        self.hashtags = SlidingWindowCounter(bucket_seconds, buckets, width, depth, top_k)
+        self.products = SlidingWindowCounter(bucket_seconds, buckets, width, depth, top_k)
+        self.events = 0
+        self.errors = 0
+        self.snapshot: Dict[str, Any] = self._empty_snapshot()
+        self._listeners: List[SnapshotListener] = []
+        self._live_ids: set = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, listener: SnapshotListener) -> None:
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: SnapshotListener) -> None:
+        self._listeners.remove(listener)
+
+    def ingest(self, events: Iterable[Dict[str, Any]]) -> int:
+        """Count a batch of events; returns how many were counted"""
+        bucket_of = self.hashtags.bucket_of
+        # bucket -> key -> count; a batch normally spans one or two buckets
+        tags: Dict[int, Dict[str, int]] = {}
+        mentions: Dict[int, Dict[str, int]] = {}
+        counted = 0
+        newest = None
+        for event in events:
+            # A malformed event is counted in ``errors`` and skipped, before it touches a counter
+            try:
+                if type(event) is not dict:
+                    raise TypeError("event must be an object")
+                bucket = bucket_of(event_time(event))
+                hashtags = event.get("hashtags") or NO_KEYS
+                products = event.get("products") or NO_KEYS
+                if type(hashtags) is not list or type(products) is not list:
+                    raise TypeError("hashtags and products must be lists")
+                # join raises TypeError on anything but strings
+                "".join(hashtags)
+                "".join(products)
+                engagement = event.get("engagement") or 0
+                if type(engagement) is not int and type(engagement) is not float:
+                    raise TypeError("engagement must be a number")
+                # int raises on inf and NaN
+                weight = 1 + int(engagement)
+                if weight < 1:
+                    raise ValueError("engagement must not be negative")
+            except (KeyError, TypeError, ValueError, OverflowError):
+                self.errors += 1
+                continue
+            counted += 1
+            if newest is None or bucket > newest:
+                newest = bucket
+            if hashtags:
+                prefix = f"{event.get('source', '')}\t"
+                counts = tags.get(bucket)
+                if counts is None:
+                    counts = tags[bucket] = {}
+                for tag in hashtags:
+                    key = prefix + tag
+                    counts[key] = counts.get(key, 0) + weight
+            if products:
+                counts = mentions.get(bucket)
+                if counts is None:
+                    counts = mentions[bucket] = {}
+                for product_id in products:
+                    counts[product_id] = counts.get(product_id, 0) + 1
+
+        if newest is not None:
+            # Both windows move together, even if a batch only feeds one
+            self.hashtags.advance(newest)
+            self.products.advance(newest)
+        for bucket in sorted(tags):
+            self.hashtags.add(bucket, tags[bucket])
+        for bucket in sorted(mentions):
+            self.products.add(bucket, mentions[bucket])
+        self.events += counted
+        return counted
+
+    def _empty_snapshot(self) -> Dict[str, Any]:
+        return {"as_of": None, "events": 0, "hashtags": [], "products": []}
+
+    def publish(self) -> Dict[str, Any]:
+        """Build a fresh snapshot, sync the trend store and notify listeners"""
+        hashtags = self.hashtags.top()
+        top_tag = hashtags[0][1] if hashtags else 0
+        products = self.products.top()
+        top_product = products[0][1] if products else 0
+        product_growth = growth(self.products.slices([p for p, _ in products]))
+
+        current = self.hashtags.current if self.hashtags.current is not None else self.products.current
+        as_of = None
+        if current is not None:
+            end = (current + 1) * self.hashtags.bucket_seconds
+            as_of = datetime.fromtimestamp(end, timezone.utc).isoformat()
+
+        snapshot = {
+            "as_of": as_of,
+            "window_seconds": self.hashtags.window_seconds,
+            "events": self.events,
+            "hashtags": [
+                {
+                    "source": key.partition("\t")[0],
+                    "hashtag": key.partition("\t")[2],
+                    "engagement": count,
+                    "trend_score": trend_score(count, top_tag),
+                }
+                for key, count in hashtags
+            ],
+            "products": [
+                {
+                    "product_id": product_id,
+                    "mentions": count,
+                    "trend_score": trend_score(count, top_product),
+                    "growth": change,
+                }
+                for (product_id, count), change in zip(products, product_growth)
+            ],
+        }
+        self.snapshot = snapshot
+        if self.store is not None and self.events:
+            self._sync_store(snapshot)
+        for listener in list(self._listeners):
+            listener(snapshot)
+        return snapshot
+
+    def _sync_store(self, snapshot: Dict[str, Any]) -> None:
+        """Write window counts into curated trends and keep live ones for new hashtags"""
+        store = self.store
+        top = snapshot["hashtags"][0]["engagement"] if snapshot["hashtags"] else 0
+        curated = [t for t in store if t["id"] not in self._live_ids]
+        keys = [f"{t.get('source', '')}\t{t.get('hashtag', '')}" for t in curated]
+        for trend, count in zip(curated, self.hashtags.estimate(keys).tolist()):
+            score = trend_score(count, top)
+            if trend.get("engagement") != count or trend.get("trend_score") != score:
+                store.update(trend["id"], engagement=count, trend_score=score)
+
+        known = set(keys)
+        live_ids = set()
+        for entry in snapshot["hashtags"]:
+            key = f"{entry['source']}\t{entry['hashtag']}"
+            if key in known:
+                continue
+            name = entry["hashtag"].lstrip("#")
+            trend_id = f"trend-live-{entry['source']}-{name}"
+            live_ids.add(trend_id)
+            current = store.get(trend_id)
+            if current is None:
+                store.add({
+                    "id": trend_id,
+                    "name": name,
+                    "name_en": name,
+                    "source": entry["source"],
+                    "engagement": entry["engagement"],
+                    "trend_score": entry["trend_score"],
+                    "description": f"{entry['hashtag']} 正在流行",
+                    "hashtag": entry["hashtag"],
+                })
+            elif current["engagement"] != entry["engagement"] or current["trend_score"] != entry["trend_score"]:
+                store.update(trend_id, engagement=entry["engagement"], trend_score=entry["trend_score"])
+        for trend_id in self._live_ids - live_ids:
+            store.remove(trend_id)
+        self._live_ids = live_ids
+
+    def resync(self) -> None:
+        """Re-apply the current counts after the trend store was replaced"""
+        self._live_ids = set()
+        if self.store is not None and self.events:
+            self._sync_store(self.snapshot)
+
+    def clear(self) -> None:
+        self.hashtags.clear()
+        self.products.clear()
+        self.events = 0
+        self.errors = 0
+        self.snapshot = self._empty_snapshot()
+        self._live_ids = set()
+
+    def _parse(self, lines: Iterable[bytes]) -> List[Dict[str, Any]]:
+        events = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                self.errors += 1
+        return events
+
+    def _read_batch(self, feed, pending: bytes) -> Tuple[List[Dict[str, Any]], bytes, bool]:
+        """Parse the next chunk of JSONL; a trailing partial line is carried over"""
+        lines = feed.readlines(READ_CHUNK_BYTES)
+        if not lines:
+            return [], pending, False
+        lines[0] = pending + lines[0]
+        pending = b""
+        if not lines[-1].endswith(b"\n"):
+            pending = lines.pop()
+        return self._parse(lines), pending, True
+
+    async def replay(self, path: str, follow: bool = False, publish_seconds: float = 5.0) -> None:
+        """Ingest a JSONL feed file; with ``follow``, keep reading appended events"""
+        pending = b""
+        unpublished = False
+        last_publish = time.monotonic()
+        with open(path, "rb") as feed:
+            while True:
+                events, pending, more = await asyncio.to_thread(self._read_batch, feed, pending)
+                if not more and not follow:
+                    # A final line without a newline
+                    events = self._parse([pending])
+                if events:
+                    self.ingest(events)
+                    unpublished = True
+                if unpublished and (not more or time.monotonic() - last_publish >= publish_seconds):
+                    self.publish()
+                    unpublished = False
+                    last_publish = time.monotonic()
+                if not more:
+                    if not follow:
+                        return
+                    await asyncio.sleep(FOLLOW_POLL_SECONDS)
+                else:
+                    await asyncio.sleep(0)
+
+    def start(self, path: str, follow: bool = False, publish_seconds: float = 5.0) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.replay(path, follow, publish_seconds))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            except Exception as exc:
+                print(f"Trend feed stopped with an error: {exc!r}")
+            self._task = None
@@ -0,0 +1,154 @@
+"""Materialized, dependency-tracked document views"""
+
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Set
+
+from app.services.catalog import CatalogStore
+
+if TYPE_CHECKING:
+    from app.services.loader import Loaders
+
+
+def tutorial_product_ids(tutorial: Dict[str, Any]) -> List[str]:
+    return [pid for step in tutorial.get("steps", []) for pid in step.get("products", [])]
+
+
+def _pick(products: Dict[str, Dict[str, Any]], ids: Iterable[str]) -> List[Dict[str, Any]]:
+    return [products[pid] for pid in ids if products.get(pid) is not None]
+
+
+def enrich_tutorial(tutorial: Dict[str, Any], products: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Tutorial with product details embedded in every step"""
+    return {
+        **tutorial,
+        "steps": [
+            {
+                **step,
+                "product_details": _pick(products, step.get("products", [])),
+            }
+            for step in tutorial["steps"]
+        ],
+    }
+
+
+def style_product_ids(style: Dict[str, Any]) -> List[str]:
+    return list(style.get("products", []))
+
+
+def enrich_style(style: Dict[str, Any], products: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Style with its related product details"""
+    return {
+        **style,
+        "product_details": _pick(products, style.get("products", [])),
+    }
+
+
+class MaterializedView:
+    """Fully enriched documents stored by id.
+
+    A document is built on first read from ``source`` and the ``products``
+    it references, then served as-is. The view subscribes to both stores and
+    tracks ``product_id -> {doc_id}`` dependencies, so a change drops only the
+    documents that embed the changed record; they are rebuilt on next read.
+    ``revision(doc_id)`` changes whenever a document is invalidated, which lets
+    callers key response caches on it.
+
+    ``build`` receives the raw document and an ``{id: product}`` map holding
+    every referenced product, fetched in one bulk lookup.
+    """
+
+    def __init__(
+        self,
+        source: CatalogStore,
+        products: CatalogStore,
+        build: Callable[[Dict[str, Any], Dict[str, Dict[str, Any]]], Dict[str, Any]],
+        references: Callable[[Dict[str, Any]], Iterable[str]],
+    ):
+        self.source = source
+        self.products = products
+        self.build = build
+        self.references = references
+        self._docs: Dict[Any, Dict[str, Any]] = {}
+        self._doc_refs: Dict[Any, Set[str]] = {}
+        self._dependents: Dict[str, Set[Any]] = {}
+        self._revisions: Dict[Any, int] = {}
+        self._generation = 0
+        self._epoch = 0
+        source.subscribe(self._on_source_change)
+        products.subscribe(self._on_product_change)
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def _on_source_change(self, doc_id, old, new) -> None:
+        if doc_id is None:
+            self.clear()
+        else:
+            self.invalidate(doc_id)
+
+    def _on_product_change(self, product_id, old, new) -> None:
+        if product_id is None:
+            self.clear()
+            return
+        for doc_id in list(self._dependents.get(product_id, ())):
+            self.invalidate(doc_id)
+
+    def invalidate(self, doc_id: Any) -> None:
+        # Only built documents can have been served, so only they need a bump
+        if self._docs.pop(doc_id, None) is None:
+            return
+        self._generation += 1
+        self._revisions[doc_id] = self._generation
+        for product_id in self._doc_refs.pop(doc_id, ()):
+            dependents = self._dependents.get(product_id)
+            if dependents is not None:
+                dependents.discard(doc_id)
+                if not dependents:
+                    del self._dependents[product_id]
+
+    def clear(self) -> None:
+        self._epoch += 1
+        self._docs.clear()
+        self._doc_refs.clear()
+        self._dependents.clear()
+        self._revisions.clear()
+
+    def revision(self, doc_id: Any) -> tuple:
+        # The epoch keeps revisions unique across clear()
+        return self._epoch, self._revisions.get(doc_id, 0), self.source.revision(doc_id)
+
+    def get(self, doc_id: Any) -> Optional[Dict[str, Any]]:
+        doc = self._docs.get(doc_id)
+        if doc is not None:
+            return doc
+
+        raw = self.source.get(doc_id)
+        if raw is None:
+            return None
+        refs = set(self.references(raw))
+        return self._store(doc_id, raw, refs, self.products.get_map(refs))
+
+    async def load(self, doc_id: Any, loaders: "Loaders") -> Optional[Dict[str, Any]]:
+        """Like ``get``, but fetches through request-scoped batch loaders"""
+        doc = self._docs.get(doc_id)
+        if doc is not None:
+            return doc
+
+        versions = self.source.version, self.products.version
+        raw = await loaders.for_store(self.source).load(doc_id)
+        if raw is None:
+            return None
+        refs = set(self.references(raw))
+        found = await loaders.for_store(self.products).load_many(refs)
+        products = dict(zip(refs, found))
+        if (self.source.version, self.products.version) != versions:
+            # A write landed while loading; serve this copy but don't keep it
+            return self.build(raw, products)
+        return self._store(doc_id, raw, refs, products)
+
+    def _store(self, doc_id: Any, raw: Dict[str, Any], refs: Set[str], products) -> Dict[str, Any]:
+        doc = self.build(raw, products)
+        self._docs[doc_id] = doc
+        self._doc_refs[doc_id] = refs
+        for product_id in refs:
+            self._dependents.setdefault(product_id, set()).add(doc_id)
+        return doc
@@ -0,0 +1,101 @@
+"""Trend ingestion throughput benchmark.
+
+Replays generated social events through ``TrendPipeline`` and reports
+events/second for in-memory batches and for a JSONL file replay, plus the
+heavy-hitter accuracy against exact counts over the final window.
+
+Usage (from web/backend)::
+
+    python -m bench.ingest --events 1000000 --batch 10000
+    python -m bench.ingest --events 200000 --write feed.jsonl
+"""
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List
+
+from app.mock.generator import DatasetGenerator, DatasetSizes
+from app.services.trend_stream import TrendPipeline
+
+WINDOW_SECONDS = 7 * 86400
+
+
+def exact_top(events: List[Dict[str, Any]], window_start: float, n: int) -> List[tuple]:
+    counts: Counter = Counter()
+    for event in events:
+        if event["ts"] >= window_start:
+            weight = 1 + event["engagement"]
+            for tag in event["hashtags"]:
+                counts[f"{event['source']}\t{tag}"] += weight
+    return counts.most_common(n)
+
+
+def accuracy(pipeline: TrendPipeline, events: List[Dict[str, Any]], n: int) -> Dict[str, float]:
+    counter = pipeline.hashtags
+    window_start = (counter.current - counter.buckets + 1) * counter.bucket_seconds
+    exact = exact_top(events, window_start, n)
+    reported = {key for key, _ in counter.top(n)}
+    estimates = counter.estimate([key for key, _ in exact]).tolist()
+    errors = [(est - true) / true for (_, true), est in zip(exact, estimates)]
+    return {
+        "recall": sum(key in reported for key, _ in exact) / len(exact),
+        "max_relative_error": max(errors),
+    }
+
+
+def run(args: argparse.Namespace) -> None:
+    generator = DatasetGenerator(DatasetSizes(products=args.products, trends=args.hashtags), seed=args.seed)
+    start = time.time() - args.days * 86400
+    t0 = time.perf_counter()
+    events = list(generator.iter_trend_events(args.events, start, args.days * 86400))
+    print(f"generated {len(events):,} events in {time.perf_counter() - t0:.1f}s")
+
+    pipeline = TrendPipeline(window_seconds=WINDOW_SECONDS, width=args.width, top_k=args.top_k)
+    t0 = time.perf_counter()
+    for i in range(0, len(events), args.batch):
+        pipeline.ingest(events[i:i + args.batch])
+    elapsed = time.perf_counter() - t0
+    t1 = time.perf_counter()
+    pipeline.publish()
+    publish_ms = (time.perf_counter() - t1) * 1000
+    memory = pipeline.hashtags.nbytes + pipeline.products.nbytes
+    print(f"ingest:  {len(events) / elapsed:,.0f} events/s (batch {args.batch:,})")
+    print(f"publish: {publish_ms:.1f} ms; sketch memory {memory / 1024:.0f} KiB")
+    for name, value in accuracy(pipeline, events, args.check_top).items():
+        print(f"top-{args.check_top} {name}: {value:.4f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(args.write) if args.write else Path(tmp) / "feed.jsonl"
+        with open(path, "w", encoding="utf-8") as feed:
+            for event in events:
+                feed.write(json.dumps(event, ensure_ascii=False) + "\n")
+        replay = TrendPipeline(window_seconds=WINDOW_SECONDS, width=args.width, top_k=args.top_k)
+        t0 = time.perf_counter()
+        asyncio.run(replay.replay(str(path), publish_seconds=1.0))
+        elapsed = time.perf_counter() - t0
+        print(f"replay:  {replay.events / elapsed:,.0f} events/s from {path.name} "
+              f"({path.stat().st_size / 1e6:.0f} MB)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--days", type=float, default=10, help="time span of the generated events")
+    parser.add_argument("--batch", type=int, default=10_000, help="events per ingest call")
+    parser.add_argument("--hashtags", type=int, default=5_000, help="generated trends to draw hashtags from")
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--width", type=int, default=2048, help="count-min sketch width")
+    parser.add_argument("--top-k", type=int, default=200)
+    parser.add_argument("--check-top", type=int, default=20, help="exact top-n to score accuracy on")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--write", help="keep the generated JSONL feed at this path")
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Landmark frame codec benchmark.
+
+Streams a synthetic 468-point face mesh (slow head motion plus tracking
+jitter) and compares the binary landmark format with JSON float arrays:
+bytes per frame, bandwidth at ``--fps`` and encode/decode time per frame.
+
+Usage (from web/backend)::
+
+    python -m bench.landmarks --frames 3000 --fps 30
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from app.services.landmarks import FACE_MESH_POINTS, LandmarkDecoder, LandmarkEncoder
+
+
+def mesh_stream(frames: int, seed: int) -> np.ndarray:
+    """(frames, 468, 3) float32 landmarks of a face drifting around the frame"""
+    rng = np.random.default_rng(seed)
+    angle = rng.uniform(0, 2 * np.pi, FACE_MESH_POINTS)
+    radius = np.sqrt(rng.uniform(0, 1, FACE_MESH_POINTS))
+    face = np.stack([0.18 * radius * np.cos(angle), 0.24 * radius * np.sin(angle), 0.05 * radius], axis=1)
+    t = np.arange(frames)[:, None] / 30
+    centre = np.stack([0.5 + 0.05 * np.sin(t), 0.5 + 0.03 * np.cos(0.7 * t), np.zeros_like(t)], axis=2)
+    jitter = rng.normal(0, 0.0006, (frames, FACE_MESH_POINTS, 3))
+    return (face + centre + jitter).astype(np.float32)
+
+
+def run(args: argparse.Namespace) -> None:
+    stream = mesh_stream(args.frames, args.seed)
+
+    t0 = time.perf_counter()
+    texts = [json.dumps({"seq": seq, "landmarks": np.round(coords, 5).tolist()}) for seq, coords in enumerate(stream)]
+    json_encode = (time.perf_counter() - t0) / args.frames
+    t0 = time.perf_counter()
+    for text in texts:
+        np.asarray(json.loads(text)["landmarks"], dtype=np.float32)
+    json_decode = (time.perf_counter() - t0) / args.frames
+    json_bytes = sum(len(text) for text in texts) / args.frames
+
+    encoder = LandmarkEncoder(keyframe_interval=args.keyframe_interval)
+    t0 = time.perf_counter()
+    frames = [bytes(encoder.encode(coords, seq)) for seq, coords in enumerate(stream)]
+    binary_encode = (time.perf_counter() - t0) / args.frames
+    decoder = LandmarkDecoder()
+    t0 = time.perf_counter()
+    error = 0.0
+    for frame, coords in zip(frames, stream):
+        error = max(error, float(np.abs(decoder.decode(frame)[1] - coords).max()))
+    binary_decode = (time.perf_counter() - t0) / args.frames
+    binary_bytes = sum(len(frame) for frame in frames) / args.frames
+
+    print(f"{args.frames:,} frames of {FACE_MESH_POINTS} points, keyframe every {args.keyframe_interval}")
+    for name, size, encode, decode in (
+        ("json", json_bytes, json_encode, json_decode),
+        ("binary", binary_bytes, binary_encode, binary_decode),
+    ):
+        print(f"{name:>6}: {size:8,.0f} B/frame  {size * args.fps * 8 / 1e3:7,.0f} kbit/s at {args.fps:g} fps  "
+              f"encode {encode * 1e6:6.1f} us  decode {decode * 1e6:6.1f} us")
+    print(f"binary max abs error {error:.2e}; {json_bytes / binary_bytes:.1f}x smaller")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=3000)
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("--keyframe-interval", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Live mirror WebSocket load benchmark.
+
+Starts the app in a uvicorn subprocess (one worker) and connects
+``--sessions`` WebSocket clients from this process, each streaming raw
+frames at ``--fps``. Reports frames sent versus answered, the share dropped
+as stale, end-to-end frame latency (send to lighting reply) and the
+server's own per-session counters. Clients share the machine with the
+server, so on small hosts the client side caps the offered load.
+
+Usage (from web/backend)::
+
+    python -m bench.live --sessions 200 --fps 30 --seconds 10
+"""
+
+import argparse
+import asyncio
+import json
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+import httpx
+import numpy as np
+from websockets.asyncio.client import connect
+
+from app.services.live import VIDEO_FRAME, VIDEO_MAGIC
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def client(url: str, args: argparse.Namespace, results: List[Dict[str, Any]]) -> None:
+    pixels = bytes([200, 160, 130]) * (args.width * args.height)
+    sent_at: Dict[int, float] = {}
+    latencies: List[float] = []
+    sent = answered = 0
+    async with connect(url, max_size=None) as ws:
+
+        async def reader():
+            nonlocal answered
+            async for raw in ws:
+                message = json.loads(raw)
+                kind = message["type"]
+                if kind == "lighting":
+                    answered += 1
+                    started = sent_at.pop(message["seq"], None)
+                    if started is not None:
+                        latencies.append((time.perf_counter() - started) * 1000)
+                elif kind == "ping":
+                    await ws.send(json.dumps({"type": "pong", "t": message["t"]}))
+
+        reading = asyncio.create_task(reader())
+        interval = 1 / args.fps
+        deadline = time.perf_counter() + args.seconds
+        next_frame = time.perf_counter()
+        seq = 0
+        while time.perf_counter() < deadline:
+            seq += 1
+            header = VIDEO_FRAME.pack(VIDEO_MAGIC, seq, args.width, args.height, 0)
+            sent_at[seq] = time.perf_counter()
+            await ws.send(header + pixels)
+            sent += 1
+            next_frame += interval
+            await asyncio.sleep(max(0.0, next_frame - time.perf_counter()))
+        await asyncio.sleep(0.5)
+        reading.cancel()
+    results.append({"sent": sent, "answered": answered, "latencies": latencies})
+
+
+async def run(args: argparse.Namespace) -> None:
+    port = free_port()
+    server = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning",
+    ])
+    base = f"127.0.0.1:{port}"
+    results: List[Dict[str, Any]] = []
+    peak: Dict[str, Any] = {}
+    try:
+        async with httpx.AsyncClient(base_url=f"http://{base}") as http:
+            for _ in range(200):
+                try:
+                    await http.get("/health")
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+
+            async def sample_server():
+                await asyncio.sleep(args.seconds / 2)
+                peak.update((await http.get("/api/live/sessions")).json())
+
+            sampler = asyncio.create_task(sample_server())
+            started = time.perf_counter()
+            await asyncio.gather(*(client(f"ws://{base}/api/live/ws", args, results) for _ in range(args.sessions)))
+            elapsed = time.perf_counter() - started
+            await sampler
+    finally:
+        server.terminate()
+        server.wait()
+
+    sent = sum(r["sent"] for r in results)
+    answered = sum(r["answered"] for r in results)
+    latencies = np.array([ms for r in results for ms in r["latencies"]])
+    print(f"{args.sessions} sessions x {args.fps} fps, {args.width}x{args.height} frames, {elapsed:.1f}s")
+    print(f"frames sent {sent:,} ({sent / elapsed:,.0f}/s), answered {answered:,} "
+          f"({answered / max(sent, 1):.1%}); the rest were dropped as stale")
+    if len(latencies):
+        p50, p95, p99 = np.percentile(latencies, (50, 95, 99))
+        print(f"frame latency ms: p50 {p50:.1f}  p95 {p95:.1f}  p99 {p99:.1f}")
+    sessions = peak.get("sessions") or []
+    if sessions:
+        rtts = [s["rtt_ms"]["p95"] for s in sessions if s["rtt_ms"]]
+        processing = [s["processing_ms"]["p95"] for s in sessions if s["processing_ms"]]
+        print(f"server at mid-run: {len(sessions)} sessions, "
+              f"max ping rtt p95 {max(rtts, default=0):.1f} ms, "
+              f"max processing p95 {max(processing, default=0):.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--width", type=int, default=160)
+    parser.add_argument("--height", type=int, default=120)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Metrics middleware overhead benchmark.
+
+Drives a minimal ASGI app directly (no server, no sockets) with and
+without ``MetricsMiddleware`` and reports the added cost per request, then
+the same through a FastAPI router so route templates and in-flight
+wrappers are exercised.
+
+Usage (from web/backend)::
+
+    python -m bench.metrics --requests 200000
+"""
+
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI
+from fastapi.responses import Response
+
+from app.services.metrics import MetricsMiddleware, MetricsRegistry
+
+START = {"type": "http.response.start", "status": 200, "headers": [(b"content-length", b"2")]}
+BODY = {"type": "http.response.body", "body": b"ok"}
+
+
+async def bare_app(scope, receive, send) -> None:
+    await send(START)
+    await send(BODY)
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message) -> None:
+    pass
+
+
+async def per_request(app, requests: int, path: str) -> float:
+    scope = {"type": "http", "method": "GET", "path": path, "root_path": "", "query_string": b"", "headers": []}
+    for _ in range(1000):
+        await app(dict(scope), receive, send)
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def routed_app() -> FastAPI:
+    app = FastAPI()
+
+    async def item(item_id: str):
+        return Response(b"ok")
+
+    for i in range(40):
+        app.get(f"/api/thing-{i}/{{item_id}}")(item)
+    return app
+
+
+async def run(args: argparse.Namespace) -> None:
+    bare = await per_request(bare_app, args.requests, "/")
+    measured = await per_request(MetricsMiddleware(bare_app, MetricsRegistry()), args.requests, "/")
+    print(f"bare ASGI app:   {bare:6.2f} us/request")
+    print(f"with metrics:    {measured:6.2f} us/request  (+{measured - bare:.2f} us)")
+
+    # Middleware wrapped inside the app so scope["app"] and scope["route"] are set
+    plain = routed_app()
+    instrumented = routed_app()
+    instrumented.add_middleware(MetricsMiddleware, registry=MetricsRegistry())
+    path = "/api/thing-39/item-1"
+    routed = await per_request(plain, args.requests, path)
+    routed_measured = await per_request(instrumented, args.requests, path)
+    print(f"routed app:      {routed:6.2f} us/request")
+    print(f"with metrics:    {routed_measured:6.2f} us/request  (+{routed_measured - routed:.2f} us)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200_000)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""Per-route throughput and latency benchmark.
+
+Drives every route registered on ``app.main.app`` through an in-process ASGI
+client at one or more generated dataset sizes and reports requests/second and
+p50/p95/p99 latency per route.
+
+Usage (from web/backend)::
+
+    python -m bench.routes --sizes 1000,100000 --requests 200 --concurrency 8
+    python -m bench.routes --sizes 1000000 --users-ratio 0.1 --json results.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+from fastapi.routing import APIRoute
+
+from app.config import settings
+from app.db import database
+from app.db.seed import seed_generated_data
+from app.main import app
+from app.mock.generator import DatasetGenerator, DatasetSizes, load_catalog
+from app.services.landmarks import LandmarkEncoder
+from app.services.profiling import ADMIN_PREFIX
+from bench.landmarks import mesh_stream
+
+# Demo ids always present (the generator keeps the demo records)
+PATH_PARAM_SAMPLES = {
+    "product_id": "product-001",
+    "style_id": "style-001",
+    "tutorial_id": "tutorial-001",
+    "analysis_id": "analysis-001",
+    "inventory_id": "inv-001",
+}
+
+
+def landmark_stream(frames: int = 30) -> bytes:
+    """A keyframe and deltas of the synthetic face mesh, back to back"""
+    encoder = LandmarkEncoder()
+    return b"".join(bytes(encoder.encode(coords, seq)) for seq, coords in enumerate(mesh_stream(frames, seed=0)))
+
+
+# Query strings and bodies for routes that need more than path params
+ROUTE_CASES: Dict[str, Dict[str, Any]] = {
+    "GET /api/products/search": {"params": {"q": "lancome"}},
+    "GET /api/products": {"params": {"category": "makeup", "sort": "rating"}},
+    "GET /api/products/price-statistics": {
+        "params": {"ids": ",".join(f"product-{i:07d}" for i in range(50)), "period": "1y"},
+    },
+    "POST /api/analysis/scan": {"json": {"mode": "quick"}},
+    # A flat 640x480 RGB raw frame
+    "POST /api/analysis/scan/upload": {
+        "params": {"width": 640, "height": 480},
+        "content": bytes([200, 160, 130]) * (640 * 480),
+    },
+    "POST /api/analysis/landmarks": {"content": landmark_stream()},
+    "POST /api/recommendations/ar-preview": {"json": {"style_id": "style-001"}},
+    "POST /api/tutorials/{tutorial_id}/progress": {"json": {"current_step": 1}},
+    "POST /api/inventory": {"json": {"product_id": "product-001"}},
+    "PATCH /api/inventory/{inventory_id}": {"json": {"remaining_percent": 50}},
+    # Deleting the demo item would turn later runs into 404s; measure the miss path
+    "DELETE /api/inventory/{inventory_id}": {
+        "path_params": {"inventory_id": "inv-missing"},
+        "expect": 404,
+    },
+    "PUT /api/products/{product_id}/price-alert": {"json": {"threshold": 900}},
+    # As with inventory, repeated deletes only hit the miss path
+    "DELETE /api/products/{product_id}/price-alert": {
+        "path_params": {"product_id": "product-missing"},
+        "expect": 404,
+    },
+    "POST /api/inventory/subscriptions": {"params": {"product_id": "product-001"}},
+    "PATCH /api/users/profile": {"json": {"name": "Amy"}},
+    "POST /api/users/skin-profile": {"json": {"skin_type": "combination"}},
+}
+
+PARAM_RE = re.compile(r"{(\w+)(?::\w+)?}")
+
+
+def collect_cases(
+    path_samples: Dict[str, str],
+    only: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Build one request description per (method, route) on the app.
+
+    Admin routes are token-protected tooling (profilers), not traffic, and
+    are left out.
+    """
+    cases = []
+    for route in app.routes:
+        if not isinstance(route, APIRoute) or route.path.startswith(ADMIN_PREFIX):
+            continue
+        for method in sorted(route.methods - {"HEAD", "OPTIONS"}):
+            name = f"{method} {route.path}"
+            if only and not re.search(only, name):
+                continue
+            case = ROUTE_CASES.get(name, {})
+            samples = {**path_samples, **case.get("path_params", {})}
+            url = PARAM_RE.sub(lambda m: samples[m.group(1)], route.path)
+            cases.append({
+                "name": name,
+                "method": method,
+                "url": url,
+                "params": case.get("params"),
+                "json": case.get("json"),
+                "content": case.get("content"),
+                "expect": case.get("expect"),
+            })
+    return cases
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_case(
+    client: httpx.AsyncClient,
+    case: Dict[str, Any],
+    requests: int,
+    concurrency: int,
+    warmup: int,
+) -> Dict[str, Any]:
+    async def send() -> int:
+        response = await client.request(
+            case["method"],
+            case["url"],
+            params=case["params"],
+            json=case["json"],
+            content=case["content"],
+        )
+        return response.status_code
+
+    for _ in range(warmup):
+        await send()
+
+    latencies: List[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            status = await send()
+            latencies.append(time.perf_counter() - start)
+            expected = case["expect"]
+            if (expected and status != expected) or (not expected and status >= 400):
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "route": case["name"],
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+async def run_size(
+    products: int,
+    args: argparse.Namespace,
+    workdir: Path,
+) -> Dict[str, Any]:
+    sizes = DatasetSizes(
+        products=products,
+        users=max(1, int(products * args.users_ratio)),
+        price_history_products=min(products, args.price_history_products),
+    )
+    generator = DatasetGenerator(sizes, seed=args.seed)
+
+    started = time.perf_counter()
+    load_catalog(generator)
+    catalog_seconds = time.perf_counter() - started
+
+    settings.DATABASE_URL = f"sqlite+aiosqlite:///{workdir / f'bench-{products}.db'}"
+    results = []
+    async with app.router.lifespan_context(app):
+        started = time.perf_counter()
+        async with database.SessionLocal() as session:
+            seeded = await seed_generated_data(session, generator)
+        db_seconds = time.perf_counter() - started
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for case in collect_cases(PATH_PARAM_SAMPLES, args.only):
+                results.append(
+                    await run_case(client, case, args.requests, args.concurrency, args.warmup)
+                )
+
+    return {
+        "products": products,
+        "users": sizes.users,
+        "load_seconds": {"catalog": catalog_seconds, "database": db_seconds},
+        "seeded": seeded,
+        "routes": results,
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(
+        f"\n== products={report['products']:,} users={report['users']:,} "
+        f"(catalog load {report['load_seconds']['catalog']:.1f}s, "
+        f"db seed {report['load_seconds']['database']:.1f}s)"
+    )
+    print(f"{'route':<52} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'err':>5}")
+    for row in report["routes"]:
+        print(
+            f"{row['route']:<52} {row['rps']:>9.1f} {row['p50_ms']:>8.2f} "
+            f"{row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} {row['errors']:>5}"
+        )
+
+
+def parse_sizes(value: str) -> List[int]:
+    units = {"k": 1_000, "m": 1_000_000}
+    sizes = []
+    for part in value.split(","):
+        part = part.strip().lower()
+        multiplier = units.get(part[-1:], 1)
+        sizes.append(int(float(part.rstrip("km")) * multiplier))
+    return sizes
+
+
+async def main(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    reports = []
+    with tempfile.TemporaryDirectory(prefix="agentic-mirror-bench-") as tmp:
+        for products in args.sizes:
+            report = await run_size(products, args, Path(tmp))
+            print_report(report)
+            reports.append(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(reports, indent=2))
+    return reports
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=parse_sizes, default=parse_sizes("1k,10k"),
+                        help="comma-separated product counts, e.g. 1k,100k,1m")
+    parser.add_argument("--users-ratio", type=float, default=0.1,
+                        help="users generated per product")
+    parser.add_argument("--price-history-products", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=200, help="requests per route")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", help="regex filter on 'METHOD /path'")
+    parser.add_argument("--json", help="write results to this file")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,97 @@
+"""Catalog memory per worker as workers are added: rebuilt vs mapped snapshot.
+
+Starts ``--workers`` processes at once, each importing the app and then
+either generating and indexing a ``--products`` catalog (``rebuild``) or
+mapping a prebuilt snapshot (``snapshot``). Every worker runs the same mix
+of searches, filtered pages, price statistics and recommendations, then
+reports its memory from ``/proc/self/smaps_rollup`` while all are alive:
+private memory is what each extra worker costs, PSS splits shared pages
+between the processes mapping them. Linux only.
+
+Usage (from web/backend)::
+
+    python -m bench.shared_memory --products 20000 --workers 4
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List
+
+from bench.startup import VARIANTS
+
+WORKLOAD = """\
+import sys
+import app.main
+{body}
+from app.mock.data import PRICE_HISTORY, PRODUCT_EMBEDDINGS, PRODUCT_SEARCH, PRODUCT_STORE
+for query in ("serum", "lip", "matte long", "口红", "hydra", "lan"):
+    PRODUCT_SEARCH.search(query, 20)
+for category in PRODUCT_STORE.values("category"):
+    PRODUCT_STORE.page("price", 20, category=category)
+    PRODUCT_STORE.page("rating", 20, reverse=True, category=category)
+PRICE_HISTORY.statistics(PRODUCT_STORE.ids()[:1000], "90d")
+PRODUCT_EMBEDDINGS.top_k({{"concern:hydration": 1.0, "skin:dry": 1.0}}, 20)
+print("ready", flush=True)
+sys.stdin.readline()
+print(open("/proc/self/smaps_rollup").read(), flush=True)
+"""
+
+
+def _rollup(text: str) -> Dict[str, int]:
+    """smaps_rollup fields in kB"""
+    fields = {}
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) == 3 and parts[2] == "kB":
+            fields[parts[0].rstrip(":")] = int(parts[1])
+    return fields
+
+
+def measure(body: str, workers: int) -> List[Dict[str, int]]:
+    script = WORKLOAD.format(body=body)
+    processes = [
+        subprocess.Popen(
+            [sys.executable, "-c", script], stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+        )
+        for _ in range(workers)
+    ]
+    for process in processes:
+        for line in process.stdout:
+            if line.strip() == "ready":
+                break
+    results = []
+    for process in processes:
+        out, _ = process.communicate("\n")
+        results.append(_rollup(out))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "catalog.snap")
+        subprocess.run(
+            [sys.executable, "-m", "app.mock.snapshot", "build", path, "--products", str(args.products)],
+            check=True,
+            capture_output=True,
+        )
+        print(f"{args.products:,} products, snapshot {os.path.getsize(path) / 1e6:.1f} MB, {args.workers} workers")
+        for name, body in VARIANTS.items():
+            results = measure(body.format(n=args.products, path=path), args.workers)
+            private = [r["Private_Clean"] + r["Private_Dirty"] for r in results]
+            print(
+                f"{name:>8}: private {sum(private) / len(private) / 1024:6.1f} MB/worker  "
+                f"RSS {sum(r['Rss'] for r in results) / len(results) / 1024:6.1f} MB/worker  "
+                f"total PSS {sum(r['Pss'] for r in results) / 1024:7.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
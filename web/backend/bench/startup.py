@@ -0,0 +1,75 @@
+"""Worker cold-start benchmark: rebuilding the catalog vs loading a snapshot.
+
+Each variant runs in a fresh interpreter, like a newly started worker:
+``import`` only imports the app (demo catalog), ``rebuild`` also generates
+and indexes a ``--products`` catalog, and ``snapshot`` loads the same
+catalog from a prebuilt snapshot. Reported times are wall clock from
+interpreter start, plus resident memory.
+
+Usage (from web/backend)::
+
+    python -m bench.startup --products 20000 --runs 3
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+VARIANTS = {
+    "import": "",
+    "rebuild": (
+        "from app.mock.generator import DatasetGenerator, DatasetSizes, load_catalog\n"
+        "load_catalog(DatasetGenerator(DatasetSizes(products={n}, price_history_products={n})))\n"
+    ),
+    "snapshot": "from app.mock.snapshot import load_snapshot\nload_snapshot({path!r})\n",
+}
+
+SCRIPT = """\
+import resource, time
+started = time.perf_counter()
+import app.main
+{body}
+from app.mock.data import PRODUCT_STORE, PRODUCT_SEARCH
+ready = time.perf_counter()
+PRODUCT_SEARCH.search("serum", 20)
+PRODUCT_STORE.page("price", 20, category="makeup")
+first = time.perf_counter()
+print(ready - started, first - ready, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def measure(body: str, runs: int):
+    results = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", SCRIPT.format(body=body)], capture_output=True, text=True, check=True
+        ).stdout
+        ready, first, rss = out.split()[-3:]
+        results.append((float(ready), float(first), int(rss)))
+    return min(results)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=20_000)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "catalog.snap")
+        subprocess.run(
+            [sys.executable, "-m", "app.mock.snapshot", "build", path, "--products", str(args.products)],
+            check=True,
+            capture_output=True,
+        )
+        print(f"{args.products:,} products, snapshot {os.path.getsize(path) / 1e6:.1f} MB, best of {args.runs}")
+        for name, body in VARIANTS.items():
+            ready, first, rss = measure(body.format(n=args.products, path=path), args.runs)
+            print(f"{name:>8}: ready {ready * 1000:7.0f} ms  first queries {first * 1000:6.1f} ms  "
+                  f"max RSS {rss / 1024:6.0f} MB")
+
+
+if __name__ == "__main__":
+    main()